@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
 from core.apps.accounts.forms import UserChangeForm, UserCreateForm
+from core.apps.accounts.utils import invalidate_cached_user
 from core.common.admin import SearchByIdMixin
 
 User = get_user_model()
@@ -13,14 +14,24 @@ class UserAdminActionsMixin:
 
     @admin.action(description='Activate selected users')
     def activate_users(self, request, queryset):
-        count = queryset.update(is_active=True)
+        count = self.set_users_active(queryset, True)
         self.message_user(request, f'Activated {count} users')
 
     @admin.action(description='Deactivate selected users')
     def deactivate_users(self, request, queryset):
-        count = queryset.update(is_active=False)
+        count = self.set_users_active(queryset, False)
         self.message_user(request, f'Deactivated {count} users', messages.WARNING)
 
+    def set_users_active(self, queryset, is_active: bool) -> int:
+        users_ids = list(queryset.values_list('pk', flat=True))
+        count = queryset.update(is_active=is_active)
+
+        # update doesn't send signals, deactivated users must not stay authenticated by the cache
+        for user_id in users_ids:
+            invalidate_cached_user(user_id)
+
+        return count
+
 
 class UserHasBrandFilter(admin.SimpleListFilter):
     title = 'Has Brand'
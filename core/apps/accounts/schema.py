@@ -1,3 +1,4 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
 from drf_spectacular.extensions import OpenApiViewExtension
 from drf_spectacular.utils import extend_schema, inline_serializer
 from rest_framework import serializers
@@ -127,3 +128,10 @@ def user_me_postprocessing_hook(result, generator, request, public):
             schema.update(description[method])
 
     return result
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """
+    Схема аутентификации такая же, как у JWTAuthentication.
+    """
+    target_class = 'core.apps.accounts.authentication.CachedJWTAuthentication'
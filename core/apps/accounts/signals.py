@@ -0,0 +1,14 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.apps.accounts.utils import invalidate_cached_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User, dispatch_uid='invalidate_cached_user_on_save')
+@receiver(post_delete, sender=User, dispatch_uid='invalidate_cached_user_on_delete')
+def invalidate_cached_user_on_change(instance, **kwargs):
+    # covers is_active and password changes, cached user must not stay authenticated after them
+    invalidate_cached_user(instance.pk)
@@ -1,7 +1,23 @@
+import copy
 import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
 from django.utils.crypto import get_random_string
 
+User = get_user_model()
+
+# users cached by the current process: id as a string (as in tokens) -> (expiration time, user),
+# least recently used go first
+_local_users: OrderedDict[str, tuple[float, User]] = OrderedDict()
+_local_users_lock = threading.Lock()
+
 
 def get_recovery_token():
     return get_random_string(22)
@@ -9,3 +25,100 @@ def get_recovery_token():
 
 def get_recovery_token_hash(token: str):
     return hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_user_cache_key(user_id: Any) -> str:
+    return f'auth_user_{user_id}'
+
+
+def get_cached_user(user_id: Any) -> User | None:
+    """
+    Get user by id for authentication. Use instead of querying the user on every request.
+
+    Users are cached by the current process (at most AUTH_USER_CACHE_LOCAL_MAX_SIZE users,
+    the least recently used are evicted) and, if AUTH_USER_CACHE_SHARED is set, in the shared cache,
+    both for AUTH_USER_CACHE_TIMEOUT seconds. Cache is invalidated when the user is saved or deleted
+    (see invalidate_cached_user), but users cached by other processes are kept until the timeout.
+
+    Args:
+        user_id: id of the user
+
+    Returns:
+        A copy of the cached user, so that changes made to it are not shared between requests.
+        None if the user does not exist.
+    """
+    user_id = str(user_id)
+    user = _get_local_user(user_id)
+
+    if user is None and settings.AUTH_USER_CACHE_SHARED:
+        user = cache.get(get_user_cache_key(user_id))
+
+        if user is not None:
+            _set_local_user(user_id, user)
+
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+
+        if user is None:
+            return None
+
+        if settings.AUTH_USER_CACHE_SHARED:
+            cache.set(get_user_cache_key(user_id), user, settings.AUTH_USER_CACHE_TIMEOUT)
+
+        _set_local_user(user_id, user)
+
+    return copy.copy(user)
+
+
+def invalidate_cached_user(user_id: Any) -> None:
+    """
+    Delete the user from the cache of the current process and from the shared cache (see get_cached_user).
+
+    Cache is deleted immediately and once again after the transaction is committed,
+    so that the user cached by concurrent requests before the commit is not left stale.
+
+    Args:
+        user_id: id of the user
+    """
+    user_id = str(user_id)
+
+    def delete():
+        with _local_users_lock:
+            _local_users.pop(user_id, None)
+
+        cache.delete(get_user_cache_key(user_id))
+
+    delete()
+    transaction.on_commit(delete)
+
+
+def _get_local_user(user_id: str) -> User | None:
+    with _local_users_lock:
+        entry = _local_users.get(user_id)
+
+        if entry is None:
+            return None
+
+        expires_at, user = entry
+
+        if expires_at <= time.monotonic():
+            del _local_users[user_id]
+            return None
+
+        _local_users.move_to_end(user_id)
+
+        return user
+
+
+def _set_local_user(user_id: str, user: User) -> None:
+    max_size = settings.AUTH_USER_CACHE_LOCAL_MAX_SIZE
+
+    if max_size <= 0:
+        return
+
+    with _local_users_lock:
+        _local_users[user_id] = (time.monotonic() + settings.AUTH_USER_CACHE_TIMEOUT, user)
+        _local_users.move_to_end(user_id)
+
+        while len(_local_users) > max_size:
+            _local_users.popitem(last=False)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from core.apps.analytics.models import BrandActivity
+from core.apps.payments.utils import get_brand_context
 
 
 class LogPaymentSerializer(serializers.ModelSerializer):
@@ -10,7 +11,7 @@ class LogPaymentSerializer(serializers.ModelSerializer):
         read_only_fields = ['brand', 'performed_at']
 
     def create(self, validated_data):
-        brand = self.context['request'].user.brand
+        brand = get_brand_context(self.context['request']).brand
 
         instance = BrandActivity.objects.create(brand=brand, action=BrandActivity.PAYMENT)
 
@@ -8,6 +8,7 @@ from core.apps.articles.models import (
     NewsArticle
 )
 from core.common.admin import SearchByIdMixin
+from core.common.cache import invalidate_cache_tags, ARTICLES_CACHE_TAG
 
 admin.site.register(Article)
 
@@ -31,6 +32,9 @@ class BaseArticleAdmin(SearchByIdMixin, admin.ModelAdmin):
     @admin.action(description='Publish selected articles')
     def publish(self, request, queryset):
         count = queryset.update(is_published=True)
+
+        # update doesn't send signals
+        invalidate_cache_tags(ARTICLES_CACHE_TAG)
         self.message_user(
             request,
             f'Published {count} objects. Now users can see them!',
@@ -40,6 +44,9 @@ class BaseArticleAdmin(SearchByIdMixin, admin.ModelAdmin):
     @admin.action(description='Unpublish selected articles')
     def unpublish(self, request, queryset):
         count = queryset.update(is_published=False)
+
+        # update doesn't send signals
+        invalidate_cache_tags(ARTICLES_CACHE_TAG)
         self.message_user(
             request,
             f'Unpublished {count} objects. Now users cannot see them!',
@@ -1,3 +1,6 @@
+import hashlib
+
+from django.conf import settings
 from drf_spectacular.utils import extend_schema
 from rest_framework import generics, status, viewsets, mixins
 from rest_framework.permissions import IsAuthenticated
@@ -18,6 +21,7 @@ from core.apps.articles.serializers import (
 )
 from core.apps.brand.permissions import IsBrand
 from core.apps.payments.permissions import HasActiveSub
+from core.common.cache import get_or_set_tagged_cache, ARTICLES_CACHE_TAG
 
 
 @extend_schema(exclude=True)
@@ -40,6 +44,32 @@ class BaseArticleViewSet(
 ):
     permission_classes = [IsAuthenticated, IsBrand, HasActiveSub]
 
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cached_response(self, get_response, request, *args, **kwargs) -> Response:
+        """
+        Get response data from the cache. Data is cached under the articles tag until any article is changed.
+
+        Args:
+            get_response: method that returns the response if data isn't cached
+            request: current request
+        """
+        # urls of files are absolute, so the host is a part of the key
+        uri_hash = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+
+        data = get_or_set_tagged_cache(
+            f'articles_{self.basename}_{uri_hash}',
+            [ARTICLES_CACHE_TAG],
+            lambda: get_response(request, *args, **kwargs).data,
+            settings.ARTICLES_CACHE_TIMEOUT
+        )
+
+        return Response(data=data, status=status.HTTP_200_OK)
+
 
 class TutorialViewSet(BaseArticleViewSet):
     queryset = Tutorial.objects.filter(is_published=True)
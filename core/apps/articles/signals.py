@@ -1,9 +1,10 @@
 from bs4 import BeautifulSoup
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-from core.apps.articles.models import Article, ArticleFile
+from core.apps.articles.models import Article, ArticleFile, Tutorial, CommunityArticle, MediaArticle, NewsArticle
+from core.common.cache import invalidate_cache_tags, ARTICLES_CACHE_TAG
 
 
 @receiver(post_save, sender=Article, dispatch_uid='attach_uploaded_files_to_article')
@@ -29,3 +30,20 @@ def attach_uploaded_files_to_article(instance, created, **kwargs):
 
         if to_update:
             ArticleFile.objects.filter(file__in=to_update).update(article=instance)
+
+
+def invalidate_cache_tags_on_article_change(**kwargs):
+    invalidate_cache_tags(ARTICLES_CACHE_TAG)
+
+
+for model in (Article, Tutorial, CommunityArticle, MediaArticle, NewsArticle):
+    post_save.connect(
+        invalidate_cache_tags_on_article_change,
+        sender=model,
+        dispatch_uid=f'invalidate_cache_tags_on_{model._meta.model_name}_save'
+    )
+    post_delete.connect(
+        invalidate_cache_tags_on_article_change,
+        sender=model,
+        dispatch_uid=f'invalidate_cache_tags_on_{model._meta.model_name}_delete'
+    )
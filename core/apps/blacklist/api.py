@@ -4,7 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 from core.apps.blacklist.models import BlackList
 from core.apps.blacklist.permissions import IsBlacklistInitiator
 from core.apps.blacklist.serializers import BlacklistListSerializer, BlacklistCreateSerializer
-from core.apps.brand.pagination import StandardResultsSetPagination
+from core.apps.brand.pagination import KeysetResultsSetPagination
 from core.apps.brand.permissions import IsBrand
 from core.apps.payments.permissions import HasActiveSub
 
@@ -18,7 +18,7 @@ class BlacklistViewSet(
     queryset = BlackList.objects.all()
     serializer_class = BlacklistListSerializer
     permission_classes = [IsAuthenticated, IsBrand, HasActiveSub]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetResultsSetPagination
 
     def get_queryset(self):
         if self.action == 'list':
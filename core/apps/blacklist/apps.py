@@ -7,3 +7,4 @@ class BlacklistConfig(AppConfig):
 
     def ready(self):
         import core.apps.blacklist.schema
+        from . import signals
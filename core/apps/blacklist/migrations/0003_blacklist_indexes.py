@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blacklist', '0002_initial'),
+        ('brand', '0008_match_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blacklist',
+            index=models.Index(fields=['initiator', 'blocked'], name='blacklist_init_blocked_idx'),
+        ),
+    ]
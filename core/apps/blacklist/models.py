@@ -15,6 +15,9 @@ class BlackList(models.Model):
     class Meta:
         verbose_name = 'Blacklist'
         verbose_name_plural = 'Blacklist'
+        indexes = [
+            models.Index(fields=['initiator', 'blocked'], name='blacklist_init_blocked_idx'),
+        ]
 
     def __str__(self):
         return f'Blacklist [{self.initiator} blocked {self.blocked}]'
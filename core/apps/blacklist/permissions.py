@@ -1,9 +1,11 @@
 from rest_framework import permissions
 
+from core.apps.payments.utils import get_brand_context
+
 
 class IsBlacklistInitiator(permissions.BasePermission):
     """
     Allow access only to brand that is the initiator of the blacklist entity.
     """
     def has_object_permission(self, request, view, obj):
-        return obj.initiator == request.user.brand
+        return obj.initiator_id == get_brand_context(request).brand_id
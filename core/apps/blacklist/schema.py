@@ -3,7 +3,7 @@ from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
 from core.apps.blacklist.serializers import BlacklistListSerializer
-from core.apps.brand.utils import get_schema_standard_pagination_parameters
+from core.apps.brand.utils import get_schema_keyset_pagination_parameters
 
 
 class Fix1(OpenApiViewExtension):
@@ -15,7 +15,7 @@ class Fix1(OpenApiViewExtension):
             @extend_schema(
                 description='Get a list of blocked brands.\n\n'
                             'Authenticated brand with active subscription only.',
-                parameters=[] + get_schema_standard_pagination_parameters()
+                parameters=[] + get_schema_keyset_pagination_parameters()
             )
             def list(self, request, *args, **kwargs):
                 return super().list(request, *args, **kwargs)
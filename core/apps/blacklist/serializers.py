@@ -2,6 +2,7 @@ from rest_framework import serializers
 
 from core.apps.blacklist.models import BlackList
 from core.apps.brand.serializers import GetShortBrandSerializer
+from core.apps.payments.utils import get_brand_context
 
 
 class BlacklistListSerializer(serializers.ModelSerializer):
@@ -25,7 +26,7 @@ class BlacklistCreateSerializer(serializers.ModelSerializer):
         return obj
 
     def validate(self, attrs):
-        initiator = self.context['request'].user.brand
+        initiator = get_brand_context(self.context['request']).brand
         blocked = attrs.get('blocked')
 
         if initiator.id == blocked.id:
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.apps.blacklist.models import BlackList
+from core.common.cache import invalidate_cache_tags, get_brand_cache_tag
+
+
+@receiver(post_save, sender=BlackList, dispatch_uid='invalidate_cache_tags_on_blacklist_save')
+@receiver(post_delete, sender=BlackList, dispatch_uid='invalidate_cache_tags_on_blacklist_delete')
+def invalidate_cache_tags_on_blacklist_change(instance, **kwargs):
+    invalidate_cache_tags(get_brand_cache_tag(instance.initiator_id), get_brand_cache_tag(instance.blocked_id))
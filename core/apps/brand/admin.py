@@ -18,6 +18,7 @@ from core.apps.brand.models import (
     ProductPhoto, GalleryPhoto, BusinessGroup, Match, Collaboration
 )
 from core.common.admin import SearchByIdMixin
+from core.common.cache import invalidate_cache_tags, QUESTIONNAIRE_CACHE_TAG
 
 
 class ProductPhotoInline(admin.TabularInline):
@@ -43,6 +44,9 @@ class BaseBrandRelatedModelActionsMixin:
     @admin.action(description='Set selected objects as other')
     def set_as_other(self, request, queryset):
         count = queryset.update(is_other=True)
+
+        # update doesn't send signals
+        invalidate_cache_tags(QUESTIONNAIRE_CACHE_TAG)
         self.message_user(
             request,
             f'Set {count} objects as other. Nobody will be able to select them!',
@@ -52,6 +56,9 @@ class BaseBrandRelatedModelActionsMixin:
     @admin.action(description='Set selected objects as common')
     def set_common(self, request, queryset):
         count = queryset.update(is_other=False)
+
+        # update doesn't send signals
+        invalidate_cache_tags(QUESTIONNAIRE_CACHE_TAG)
         self.message_user(
             request,
             f'Set {count} objects as common. All users can see and select them now!',
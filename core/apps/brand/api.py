@@ -10,6 +10,7 @@ from rest_framework import viewsets, status, generics, serializers, mixins
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 from core.apps.analytics.models import BrandActivity
 from core.apps.analytics.utils import log_brand_activity
@@ -26,7 +27,7 @@ from core.apps.brand.models import (
     Blog,
     Match
 )
-from core.apps.brand.pagination import StandardResultsSetPagination
+from core.apps.brand.pagination import KeysetResultsSetPagination
 from core.apps.brand.permissions import (
     IsBrand,
     CanInstantCoop,
@@ -39,6 +40,7 @@ from core.apps.brand.serializers import (
     BrandCreateSerializer,
     BrandGetSerializer,
     MatchSerializer,
+    BatchLikeSerializer,
     InstantCoopSerializer,
     BrandUpdateSerializer,
     CollaborationSerializer,
@@ -49,10 +51,19 @@ from core.apps.brand.serializers import (
     BrandMeSerializer,
     StatisticsSerializer,
 )
-from core.apps.brand.utils import get_statistics_list, get_recommended_brands
+from core.apps.brand.utils import (
+    get_statistics_list,
+    get_recommended_brands,
+    get_recommended_brands_filter_kwargs,
+    get_brand_exclusions,
+    get_recommended_brands_snapshot,
+    create_recommended_brands_snapshot
+)
 from core.apps.chat.models import Room
 from core.apps.payments.models import Subscription
 from core.apps.payments.permissions import HasActiveSub, IsBusinessSub
+from core.apps.payments.utils import get_brand_context
+from core.common.cache import get_or_set_tagged_cache, QUESTIONNAIRE_CACHE_TAG
 
 
 class QuestionnaireChoicesListView(generics.GenericAPIView):
@@ -62,6 +73,17 @@ class QuestionnaireChoicesListView(generics.GenericAPIView):
     serializer_class = QuestionnaireChoicesSerializer
 
     def get(self, request, *args, **kwargs):
+        # choices are cached until any of them is changed
+        data = get_or_set_tagged_cache(
+            'questionnaire_choices',
+            [QUESTIONNAIRE_CACHE_TAG],
+            self.get_choices_data,
+            settings.QUESTIONNAIRE_CHOICES_CACHE_TIMEOUT
+        )
+
+        return Response(data=data, status=status.HTTP_200_OK)
+
+    def get_choices_data(self):
         categories = Category.objects.filter(is_other=False)
         tags = Tag.objects.filter(is_other=False)
         formats = Format.objects.filter(is_other=False)
@@ -74,7 +96,7 @@ class QuestionnaireChoicesListView(generics.GenericAPIView):
             'goals': goals
         })
 
-        return Response(data=serializer.data, status=status.HTTP_200_OK)
+        return serializer.data
 
 
 class BrandViewSet(
@@ -84,24 +106,19 @@ class BrandViewSet(
 ):
     queryset = Brand.objects.filter(user__isnull=False)  # if user is null, then brand was deleted
     serializer_class = BrandGetSerializer
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetResultsSetPagination
 
     def get_queryset(self):
         if self.action == 'liked_by':
             current_brand = self.request.user.brand
-
-            # get all brands that current brand added to its blacklist
-            blocked_brands = current_brand.blacklist_as_initiator.values_list('blocked', flat=True)
-
-            # get all brands that added the current one to the blacklist
-            blocked_by = current_brand.blacklist_as_blocked.values_list('initiator', flat=True)
+            exclusions = get_brand_exclusions(current_brand.id)
 
             # get ids of all brands which liked current one and haven't been liked in response yet
+            # exclude brands that current brand added to its blacklist and brands that blocked the current one
             liked_by_ids = current_brand.target.filter(
                 is_match=False
             ).exclude(
-                Q(initiator__in=blocked_brands)
-                | Q(initiator__in=blocked_by)
+                initiator__in=exclusions['blocked'] + exclusions['blocked_by']
             ).values_list('initiator', flat=True)
 
             # get time of each like
@@ -111,20 +128,11 @@ class BrandViewSet(
 
         elif self.action == 'my_likes':
             current_brand = self.request.user.brand
+            exclusions = get_brand_exclusions(current_brand.id)
 
-            # get all brands that current brand added to its blacklist
-            blocked_brands = current_brand.blacklist_as_initiator.values_list('blocked', flat=True)
-
-            # get all brands that added the current one to the blacklist
-            blocked_by = current_brand.blacklist_as_blocked.values_list('initiator', flat=True)
-
-            # get ids of all brands that were liked by the current brand.
-            my_likes_ids = current_brand.initiator.filter(
-                is_match=False
-            ).exclude(
-                Q(target__in=blocked_brands)
-                | Q(target__in=blocked_by)
-            ).values_list('target', flat=True)
+            # get ids of all brands that were liked by the current brand
+            # exclude brands that current brand added to its blacklist and brands that blocked the current one
+            my_likes_ids = set(exclusions['liked']).difference(exclusions['blocked'], exclusions['blocked_by'])
 
             # get time of each like
             like_at = Subquery(current_brand.initiator.filter(target=OuterRef('id')).values('like_at')[:1])
@@ -132,7 +140,7 @@ class BrandViewSet(
             # Prefetch product_photos of the CARD format to improve performance
             # and set them to a 'card_photos' attribute
             # prefetch instant rooms for the brand user
-            return Brand.objects.filter(pk__in=Subquery(my_likes_ids)).select_related('user', 'city').prefetch_related(
+            return Brand.objects.filter(pk__in=my_likes_ids).select_related('user', 'city').prefetch_related(
                 Prefetch(
                     'product_photos',
                     queryset=ProductPhoto.objects.filter(format=ProductPhoto.CARD),
@@ -148,15 +156,8 @@ class BrandViewSet(
         elif self.action == 'my_matches':
             current_brand = self.request.user.brand
 
-            # get ids of brands that have match with current brand as initiator
-            my_matches_ids_as_initiator = current_brand.initiator.filter(
-                is_match=True
-            ).values_list('target', flat=True)
-
-            # get ids of brands that have match with current brand as target
-            my_matches_ids_as_target = current_brand.target.filter(
-                is_match=True
-            ).values_list('initiator', flat=True)
+            # get ids of brands that have match with current brand
+            my_matches_ids = get_brand_exclusions(current_brand.id)['matched']
 
             match_at = Subquery(Match.objects.filter(
                 Q(initiator=current_brand, target=OuterRef('id')) | Q(initiator=OuterRef('id'), target=current_brand),
@@ -165,9 +166,7 @@ class BrandViewSet(
 
             # get all brands that have match with current brand
             # prefetch card photos and match rooms to improve performance
-            return Brand.objects.filter(
-                Q(pk__in=Subquery(my_matches_ids_as_initiator)) | Q(pk__in=Subquery(my_matches_ids_as_target))
-            ).select_related('user', 'city').prefetch_related(
+            return Brand.objects.filter(pk__in=my_matches_ids).select_related('user', 'city').prefetch_related(
                 Prefetch(
                     'product_photos',
                     queryset=ProductPhoto.objects.filter(format=ProductPhoto.CARD),
@@ -186,11 +185,31 @@ class BrandViewSet(
             categories_ids = self.request.query_params.getlist('category')
             cities_ids = self.request.query_params.getlist('city')
 
+            # "true" to start the snapshot mode, token of the snapshot on the next pages
+            snapshot = self.request.query_params.get('snapshot')
+
             current_brand = self.request.user.brand
+            filter_kwargs = get_recommended_brands_filter_kwargs(avg_bill, subs_count, categories_ids, cities_ids)
+
+            # take next pages from the list calculated for the first page with the same filters
+            recommended_brands = None
+            self.snapshot_token = None
 
-            recommended_brands = get_recommended_brands(
-                current_brand, avg_bill, subs_count, categories_ids, cities_ids
-            )
+            if snapshot is not None and snapshot.lower() not in ('true', '1'):
+                recommended_brands = get_recommended_brands_snapshot(current_brand, filter_kwargs, snapshot)
+                self.snapshot_token = snapshot if recommended_brands is not None else None
+
+            if recommended_brands is None:
+                recommended_brands = get_recommended_brands(
+                    current_brand, avg_bill, subs_count, categories_ids, cities_ids
+                )
+
+                # snapshot loads scores of all candidates, so it is built only if the client asked for it,
+                # otherwise pages are taken from the queryset by LIMIT queries
+                if snapshot is not None:
+                    self.snapshot_token, recommended_brands = create_recommended_brands_snapshot(
+                        current_brand, filter_kwargs, recommended_brands
+                    )
 
             return recommended_brands
 
@@ -229,6 +248,8 @@ class BrandViewSet(
                 return BrandUpdateSerializer
         elif self.action == 'like':
             return MatchSerializer
+        elif self.action == 'batch_like':
+            return BatchLikeSerializer
         elif self.action == 'instant_coop':
             return InstantCoopSerializer
         elif self.action == 'liked_by':
@@ -269,7 +290,9 @@ class BrandViewSet(
         elif self.action == 'me':
             if self.request.method in ('GET', 'PATCH', 'DELETE'):
                 permission_classes = [IsAuthenticated, IsBrand]
-        elif self.action in ('like', 'liked_by', 'my_likes', 'my_matches', 'recommended_brands', 'statistics'):
+        elif self.action in (
+                'like', 'batch_like', 'liked_by', 'my_likes', 'my_matches', 'recommended_brands', 'statistics'
+        ):
             permission_classes = [IsAuthenticated, IsBrand, HasActiveSub]
 
             if self.action == 'like':
@@ -395,7 +418,7 @@ class BrandViewSet(
 
     @action(detail=False, methods=['get', 'patch', 'delete'], url_name='me')
     def me(self, request, *args, **kwargs):
-        brand = request.user.brand
+        brand = get_brand_context(request).brand
         if request.method == 'GET':
             serializer = self.get_serializer(brand)
 
@@ -408,7 +431,7 @@ class BrandViewSet(
                 'category',
                 'target_audience__age',
                 'target_audience__gender'
-            ).get(pk=request.user.brand.id)
+            ).get(pk=brand.id)
 
             serializer = self.get_serializer(instance, data=transformed_data, partial=True)
             serializer.is_valid(raise_exception=True)
@@ -431,6 +454,13 @@ class BrandViewSet(
         serializer.save()
         return Response(data=serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'], url_name='batch_like')
+    def batch_like(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['post'])
     def instant_coop(self, request):
         serializer = self.get_serializer(data=request.data)
@@ -481,7 +511,14 @@ class BrandViewSet(
 
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(serializer.data)
+
+            response.data['snapshot'] = self.snapshot_token
+
+            if response.data['next'] is not None and self.snapshot_token is not None:
+                response.data['next'] = replace_query_param(response.data['next'], 'snapshot', self.snapshot_token)
+
+            return response
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(data=serializer.data, status=status.HTTP_200_OK)
@@ -7,3 +7,4 @@ class BrandConfig(AppConfig):
 
     def ready(self):
         import core.apps.brand.schema
+        from . import signals
@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+
+from core.apps.brand.models import Match
+from core.apps.brand.utils import rollup_brand_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Recalculate daily statistics rollups of all brands for complete days.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Number of last complete days to recalculate. By default, the whole history is recalculated.'
+        )
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=30,
+            help='Number of days recalculated at once.'
+        )
+
+    def handle(self, *args, **options):
+        end_date = timezone.localdate() - timedelta(days=1)
+
+        if options['days'] is not None:
+            start_date = end_date - timedelta(days=options['days'] - 1)
+        else:
+            first_like_at = Match.objects.aggregate(Min('like_at'))['like_at__min']
+
+            if first_like_at is None:
+                self.stdout.write(self.style.SUCCESS('Nothing to backfill.'))
+                return
+
+            start_date = timezone.localtime(first_like_at).date()
+
+        chunk_start_date = start_date
+
+        while chunk_start_date <= end_date:
+            chunk_end_date = min(chunk_start_date + timedelta(days=options['chunk'] - 1), end_date)
+
+            rollup_brand_daily_stats(chunk_start_date, chunk_end_date)
+            self.stdout.write(f'Recalculated {chunk_start_date} - {chunk_end_date}')
+
+            chunk_start_date = chunk_end_date + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS('Brand daily stats backfilled successfully!'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.apps.brand.models import Brand
+from core.apps.brand.utils import refresh_brand_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Recalculate precomputed recommendations for all brands.'
+
+    def handle(self, *args, **options):
+        brands = Brand.objects.filter(user__isnull=False).order_by('id')
+        total = brands.count()
+
+        for i, brand in enumerate(brands.iterator(), start=1):
+            refresh_brand_recommendations(brand)
+
+            if i % 100 == 0 or i == total:
+                self.stdout.write(f'Refreshed {i}/{total} brands')
+
+        self.stdout.write(self.style.SUCCESS('Brand recommendations refreshed successfully!'))
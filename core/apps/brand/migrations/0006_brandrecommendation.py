@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brand', '0005_goals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BrandRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('priority', models.PositiveSmallIntegerField(verbose_name='Приоритет')),
+                ('formats_matches_num', models.PositiveSmallIntegerField(default=0, verbose_name='Совпадений форматов')),
+                ('tags_matches_num', models.PositiveSmallIntegerField(default=0, verbose_name='Совпадений ценностей')),
+                ('goals_matches_num', models.PositiveSmallIntegerField(default=0, verbose_name='Совпадений бизнес задач')),
+                ('brand', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='brand.brand', verbose_name='Бренд')),
+                ('recommended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_to', to='brand.brand', verbose_name='Рекомендуемый бренд')),
+            ],
+            options={
+                'verbose_name': 'Brand Recommendation',
+                'verbose_name_plural': 'Brand Recommendations',
+                'indexes': [models.Index(fields=['brand', 'priority', '-formats_matches_num', '-tags_matches_num', '-goals_matches_num'], name='brand_recommendation_order_idx')],
+                'constraints': [models.UniqueConstraint(fields=('brand', 'recommended'), name='unique_brand_recommendation')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brand', '0006_brandrecommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BrandDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('likes', models.PositiveIntegerField(default=0, verbose_name='Лайки')),
+                ('matches', models.PositiveIntegerField(default=0, verbose_name='Метчи')),
+                ('collabs', models.PositiveIntegerField(default=0, verbose_name='Коллаборации')),
+                ('brand', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='brand.brand', verbose_name='Бренд')),
+            ],
+            options={
+                'verbose_name': 'Brand Daily Stats',
+                'verbose_name_plural': 'Brand Daily Stats',
+                'indexes': [models.Index(fields=['date'], name='brand_daily_stats_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('brand', 'date'), name='unique_brand_daily_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:33
+
+import logging
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Least, Greatest
+
+logger = logging.getLogger(__name__)
+
+
+def delete_duplicate_matches(apps, schema_editor):
+    """
+    Leave one like or match per pair of brands, including reciprocal likes, so that the unique constraint can be added.
+    Match is kept over likes, then the one with the room, then the earliest one.
+    Collaborations of deleted duplicates are moved to the kept one.
+
+    Rooms of deleted duplicates are not left orphaned: if the kept one has no room, the room of the first duplicate
+    is moved to it, messages of other rooms are moved to the room of the kept one and these rooms are deleted.
+    """
+    Match = apps.get_model('brand', 'Match')
+    Collaboration = apps.get_model('brand', 'Collaboration')
+    Room = apps.get_model('chat', 'Room')
+    Message = apps.get_model('chat', 'Message')
+
+    # foreign keys are checked right away, otherwise indexes can't be created in the same transaction
+    schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+    duplicated_pairs = Match.objects.annotate(
+        low=Least('initiator', 'target'),
+        high=Greatest('initiator', 'target')
+    ).values(
+        'low', 'high'
+    ).annotate(
+        num=Count('id')
+    ).filter(
+        num__gt=1
+    ).values_list(
+        'low', 'high'
+    )
+
+    for low, high in duplicated_pairs:
+        matches = sorted(
+            Match.objects.filter(Q(initiator_id=low, target_id=high) | Q(initiator_id=high, target_id=low)),
+            key=lambda match: (not match.is_match, match.room_id is None, match.like_at, match.pk)
+        )
+        kept, duplicates_ids = matches[0], [match.pk for match in matches[1:]]
+        duplicates_rooms_ids = [match.room_id for match in matches[1:] if match.room_id is not None]
+
+        Collaboration.objects.filter(match_id__in=duplicates_ids).update(match=kept)
+        Match.objects.filter(pk__in=duplicates_ids).delete()
+        logger.warning('Deleted duplicate matches %s of brands %s and %s, kept %s', duplicates_ids, low, high, kept.pk)
+
+        if not duplicates_rooms_ids:
+            continue
+
+        # room is a one-to-one field, so it's moved only after the duplicate is deleted
+        if kept.room_id is None:
+            kept.room_id = duplicates_rooms_ids.pop(0)
+            kept.save(update_fields=['room'])
+            logger.warning('Moved room %s to match %s', kept.room_id, kept.pk)
+
+        if duplicates_rooms_ids:
+            Message.objects.filter(room_id__in=duplicates_rooms_ids).update(room_id=kept.room_id)
+
+            last_message = Message.objects.filter(room=OuterRef('pk')).order_by('-created_at', '-id')
+            Room.objects.filter(pk=kept.room_id).update(
+                last_message=Subquery(last_message.values('pk')[:1]),
+                last_message_at=Subquery(last_message.values('created_at')[:1])
+            )
+
+            Room.objects.filter(pk__in=duplicates_rooms_ids).delete()
+            logger.warning(
+                'Deleted rooms %s of duplicate matches, their messages are moved to room %s',
+                duplicates_rooms_ids, kept.room_id
+            )
+
+    schema_editor.execute('SET CONSTRAINTS ALL DEFERRED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brand', '0007_branddailystats'),
+        ('chat', '0009_message_change_sync_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['initiator', 'target', 'is_match'], name='match_initiator_target_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['target', 'is_match'], name='match_target_is_match_idx'),
+        ),
+        migrations.RunPython(delete_duplicate_matches, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='match',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Least('initiator', 'target'), django.db.models.functions.comparison.Greatest('initiator', 'target'), name='unique_match_pair'),
+        ),
+    ]
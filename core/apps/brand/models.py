@@ -4,6 +4,7 @@ from cities_light.models import City
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.db.models.functions import Least, Greatest
 from django.utils import timezone
 from django.utils.deconstruct import deconstructible
 
@@ -399,6 +400,16 @@ class Match(models.Model):
     class Meta:
         verbose_name = 'Match'
         verbose_name_plural = 'Matches'
+        constraints = [
+            # only one like/match between two brands, regardless of who is the initiator
+            models.UniqueConstraint(
+                Least('initiator', 'target'), Greatest('initiator', 'target'), name='unique_match_pair'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['initiator', 'target', 'is_match'], name='match_initiator_target_idx'),
+            models.Index(fields=['target', 'is_match'], name='match_target_is_match_idx'),
+        ]
 
     def __str__(self):
         type_ = 'Match' if self.is_match else 'Like'
@@ -469,3 +480,84 @@ class Collaboration(models.Model):
 
     def __repr__(self):
         return f'{self.__class__.__name__} {self.pk} [match_id={self.match_id}]'
+
+
+class BrandRecommendation(models.Model):
+    """
+    Precomputed recommendation score of the "recommended" brand for the "brand".
+
+    Only pairs that share at least one collaboration format are stored.
+    All other brands have the lowest priority and zero matches, so there is no need to store them.
+    """
+    LAST_PRIORITY = 7
+
+    brand = models.ForeignKey(
+        Brand, on_delete=models.CASCADE, related_name='recommendations', verbose_name='Бренд'
+    )
+    recommended = models.ForeignKey(
+        Brand, on_delete=models.CASCADE, related_name='recommended_to', verbose_name='Рекомендуемый бренд'
+    )
+
+    priority = models.PositiveSmallIntegerField(verbose_name='Приоритет')
+    formats_matches_num = models.PositiveSmallIntegerField(default=0, verbose_name='Совпадений форматов')
+    tags_matches_num = models.PositiveSmallIntegerField(default=0, verbose_name='Совпадений ценностей')
+    goals_matches_num = models.PositiveSmallIntegerField(default=0, verbose_name='Совпадений бизнес задач')
+
+    class Meta:
+        verbose_name = 'Brand Recommendation'
+        verbose_name_plural = 'Brand Recommendations'
+        constraints = [
+            models.UniqueConstraint(fields=['brand', 'recommended'], name='unique_brand_recommendation'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['brand', 'priority', '-formats_matches_num', '-tags_matches_num', '-goals_matches_num'],
+                name='brand_recommendation_order_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Recommendation [{self.recommended} for {self.brand}] priority {self.priority}'
+
+    def __repr__(self):
+        return (
+            f'{self.__class__.__name__}(brand_id={self.brand_id}, recommended_id={self.recommended_id}, '
+            f'priority={self.priority}, formats_matches_num={self.formats_matches_num}, '
+            f'tags_matches_num={self.tags_matches_num}, goals_matches_num={self.goals_matches_num})'
+        )
+
+
+class BrandDailyStats(models.Model):
+    """
+    Daily rollup of the brand activity used in statistics.
+
+    Collaboration is counted on the day it was reported for the first time,
+    so that collabs reported by both brands are counted once.
+    """
+    brand = models.ForeignKey(
+        Brand, on_delete=models.CASCADE, related_name='daily_stats', verbose_name='Бренд'
+    )
+    date = models.DateField(verbose_name='Дата')
+
+    likes = models.PositiveIntegerField(default=0, verbose_name='Лайки')
+    matches = models.PositiveIntegerField(default=0, verbose_name='Метчи')
+    collabs = models.PositiveIntegerField(default=0, verbose_name='Коллаборации')
+
+    class Meta:
+        verbose_name = 'Brand Daily Stats'
+        verbose_name_plural = 'Brand Daily Stats'
+        constraints = [
+            models.UniqueConstraint(fields=['brand', 'date'], name='unique_brand_daily_stats'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='brand_daily_stats_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'Daily stats [{self.brand} {self.date}]'
+
+    def __repr__(self):
+        return (
+            f'{self.__class__.__name__}(brand_id={self.brand_id}, date={self.date}, likes={self.likes}, '
+            f'matches={self.matches}, collabs={self.collabs})'
+        )
@@ -1,17 +1,271 @@
-from django.core.paginator import Paginator
-from django.utils.functional import cached_property
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import datetime
+import json
+import operator
+from collections import OrderedDict
+from functools import reduce
+from typing import Any
 
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet, Q, F, OrderBy
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-class FasterDjangoPaginator(Paginator):
-    # doesn't execute counting query
-    @cached_property
-    def count(self):
-        return len(self.object_list)
 
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    JSON encoder of cursor values.
 
-class StandardResultsSetPagination(PageNumberPagination):
-    django_paginator_class = FasterDjangoPaginator
+    DjangoJSONEncoder cuts datetimes and times to milliseconds, cursor must keep microseconds,
+    otherwise objects with the same millisecond as the last object of the page are skipped or repeated.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+
+        return super().default(o)
+
+
+class KeysetResultsSetPagination(BasePagination):
+    """
+    Cursor pagination based on the ordering of the queryset.
+
+    Cursor is an opaque (base64 encoded) list of values of the ordering keys of the last object on the page.
+    The next page is selected by comparing ordering keys with the cursor values,
+    so only objects of the page are fetched from the database no matter how far the page is.
+    Primary key is added to the ordering as the last key, if it isn't there already, to make keys unique.
+
+    Nullable ordering keys must specify position of nulls explicitly, e.g. F('field').desc(nulls_last=True).
+
+    Besides querysets, any sequence that has "ordering" attribute and "after(cursor_values)" method is supported
+    (e.g. RecommendedBrandsList).
+
+    Total number of objects is returned only if it was requested (see count_query_param).
+    Counting stops after max_count objects, in this case "count_is_exact" is false.
+
+    Lists paginated by this class used to be paginated by page numbers. Requests with the "page" parameter
+    are rejected with 400, so that old clients don't get the first page again and again.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    page_query_param = 'page'
+    page_not_supported_message = 'Page number pagination is not supported, use "next" link from the response.'
     page_size = 100
     page_size_query_param = 'page_size'
     max_page_size = 1000
+    count_query_param = 'with_count'
+    max_count = 10000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_query_param in request.query_params:
+            raise ValidationError({self.page_query_param: [self.page_not_supported_message]})
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.count = None
+        self.count_is_exact = None
+
+        ordering = self.get_ordering(queryset)
+
+        if isinstance(queryset, QuerySet):
+            queryset = queryset.order_by(*(self.get_order_by_expression(*key) for key in ordering))
+
+        if self.is_count_requested(request):
+            self.count, self.count_is_exact = self.get_count(queryset)
+
+        cursor_values = self.decode_cursor(request, len(ordering))
+
+        if cursor_values is not None:
+            queryset = self.filter_after(queryset, ordering, cursor_values)
+
+        # fetch one more object to find out whether there is a next page
+        objects = list(queryset[:self.page_size + 1])
+
+        self.has_next = len(objects) > self.page_size
+        self.page = objects[:self.page_size]
+        self.ordering = ordering
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        response_data = OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ])
+
+        if self.count is not None:
+            response_data['count'] = self.count
+            response_data['count_is_exact'] = self.count_is_exact
+
+        return Response(response_data)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+                'count': {
+                    'type': 'integer',
+                    'description': f'Only if "{self.count_query_param}" is true.',
+                },
+                'count_is_exact': {
+                    'type': 'boolean',
+                    'description': f'Only if "{self.count_query_param}" is true. '
+                                   f'False if there are more than {self.max_count} objects.',
+                },
+            },
+        }
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def is_count_requested(self, request) -> bool:
+        return request.query_params.get(self.count_query_param, '').lower() in ('true', '1')
+
+    def get_count(self, queryset) -> tuple[int, bool]:
+        """
+        Count objects up to max_count.
+
+        Returns:
+            Tuple of number of objects and whether it is exact
+        """
+        if not isinstance(queryset, QuerySet):
+            return len(queryset), True
+
+        count = queryset.order_by()[:self.max_count + 1].count()
+
+        if count > self.max_count:
+            return self.max_count, False
+
+        return count, True
+
+    @staticmethod
+    def get_ordering(queryset) -> list[tuple[str, bool, bool | None]]:
+        """
+        Get ordering keys of the queryset.
+
+        Returns:
+            List of (name, descending, nulls_last) tuples.
+            nulls_last is None if position of nulls is not specified.
+        """
+        if isinstance(queryset, QuerySet):
+            order_by = queryset.query.order_by
+        else:
+            order_by = queryset.ordering
+
+        ordering = []
+
+        for key in order_by:
+            if isinstance(key, str):
+                descending = key.startswith('-')
+                name = key.removeprefix('-')
+                nulls_last = None
+            elif isinstance(key, OrderBy) and isinstance(key.expression, F):
+                descending = key.descending
+                name = key.expression.name
+                nulls_last = True if key.nulls_last else False if key.nulls_first else None
+            else:
+                raise ValueError(f'Unsupported ordering key for keyset pagination: {key}')
+
+            ordering.append(('pk' if name == 'id' else name, descending, nulls_last))
+
+        if not ordering or ordering[-1][0] != 'pk':
+            # make keys unique, keep direction of the main key
+            ordering.append(('pk', ordering[0][1] if ordering else False, None))
+
+        return ordering
+
+    @staticmethod
+    def get_order_by_expression(name: str, descending: bool, nulls_last: bool | None) -> OrderBy:
+        return OrderBy(
+            F(name),
+            descending=descending,
+            nulls_last=True if nulls_last else None,
+            nulls_first=True if nulls_last is False else None
+        )
+
+    def filter_after(self, queryset, ordering: list[tuple[str, bool, bool | None]], cursor_values: list[Any]):
+        """
+        Get objects that come after the cursor in the ordering.
+        """
+        if not isinstance(queryset, QuerySet):
+            return queryset.after(cursor_values)
+
+        # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+        conditions = []
+        equal_condition = Q()
+
+        for (name, descending, nulls_last), value in zip(ordering, cursor_values):
+            if value is None:
+                after_condition = None if nulls_last else Q(**{f'{name}__isnull': False})
+                equal_key_condition = Q(**{f'{name}__isnull': True})
+            else:
+                after_condition = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+                equal_key_condition = Q(**{name: value})
+
+                if nulls_last:
+                    after_condition |= Q(**{f'{name}__isnull': True})
+
+            if after_condition is not None:
+                conditions.append(equal_condition & after_condition)
+
+            equal_condition &= equal_key_condition
+
+        try:
+            return queryset.filter(reduce(operator.or_, conditions))
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def decode_cursor(self, request, keys_num: int) -> list[Any] | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if encoded is None:
+            return None
+
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        except (UnicodeError, binascii.Error, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if (
+                not isinstance(values, list)
+                or len(values) != keys_num
+                or not all(isinstance(value, (int, float, str)) or value is None for value in values)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values
+
+    @staticmethod
+    def encode_cursor(values: list[Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(values, cls=CursorJSONEncoder).encode('utf-8')).decode('ascii')
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next:
+            return None
+
+        last_object = self.page[-1]
+        values = [getattr(last_object, name) for name, *_ in self.ordering]
+
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(values)
+        )
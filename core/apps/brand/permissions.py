@@ -1,7 +1,17 @@
 from rest_framework import permissions
 
-from core.apps.blacklist.models import BlackList
-from core.apps.brand.models import Match
+from core.apps.brand.utils import get_brand_exclusions
+from core.apps.payments.utils import get_brand_context
+
+
+def get_target_id(target_id) -> int | None:
+    """
+    Convert target id from request data or url kwargs to int. Returns None if target id is invalid.
+    """
+    try:
+        return int(target_id)
+    except (TypeError, ValueError):
+        return None
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -20,7 +30,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
 
 class IsNotCurrentBrand(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return request.user.brand.id != obj.id
+        return get_brand_context(request).brand_id != obj.id
 
 
 class IsBrand(permissions.BasePermission):
@@ -32,7 +42,7 @@ class IsBrand(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        return hasattr(request.user, 'brand')
+        return get_brand_context(request).brand_id is not None
 
 
 class CanInstantCoop(permissions.BasePermission):
@@ -41,18 +51,18 @@ class CanInstantCoop(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        current_brand_id = request.user.brand.id
-        target_id = request.data['target']
+        current_brand_id = get_brand_context(request).brand_id
+        target_id = get_target_id(request.data['target'])
+
+        if target_id is None:
+            # invalid target will be rejected by serializer
+            return True
 
         # no need to check for match because
         # access allowed only if the current brand liked the target but don't have match with it yet.
         # It means that access allowed only if the current brand
         # is the initiator and haven't received like in response yet
-        has_liked_target = Match.objects.filter(
-            initiator_id=current_brand_id,
-            target_id=target_id,
-            is_match=False
-        ).exists()
+        has_liked_target = target_id in get_brand_exclusions(current_brand_id)['liked']
 
         return has_liked_target
 
@@ -73,9 +83,15 @@ class NotInBlacklistOfTarget(permissions.BasePermission):
         if target_id is None:
             return False
 
-        current_brand = request.user.brand
+        target_id = get_target_id(target_id)
 
-        return not BlackList.objects.filter(initiator_id=target_id, blocked=current_brand).exists()
+        if target_id is None:
+            # invalid target will be rejected later
+            return True
+
+        current_brand_id = get_brand_context(request).brand_id
+
+        return target_id not in get_brand_exclusions(current_brand_id)['blocked_by']
 
 
 class DidNotBlockTarget(permissions.BasePermission):
@@ -89,6 +105,12 @@ class DidNotBlockTarget(permissions.BasePermission):
         if target_id is None:
             return False
 
-        current_brand = request.user.brand
+        target_id = get_target_id(target_id)
+
+        if target_id is None:
+            # invalid target will be rejected by serializer
+            return True
+
+        current_brand_id = get_brand_context(request).brand_id
 
-        return not BlackList.objects.filter(initiator=current_brand, blocked_id=target_id).exists()
+        return target_id not in get_brand_exclusions(current_brand_id)['blocked']
@@ -0,0 +1,580 @@
+import bisect
+import threading
+import uuid
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+
+from core.apps.brand.models import Brand, BrandRecommendation, Category, Format, Goal, ProductPhoto, Tag
+
+# number of bits in one element of a packed bitset
+BITSET_WORD_SIZE = 64
+
+# cache key of the version of brands data shared by all processes (see VectorizedRecommendationEngine)
+VECTORIZED_BRANDS_VERSION_CACHE_KEY = 'vectorized_brands_version'
+
+
+def pack_bitsets(bits: np.ndarray) -> np.ndarray:
+    """
+    Pack boolean matrix into bitsets.
+
+    Args:
+        bits: boolean matrix (rows x columns)
+
+    Returns:
+        uint64 matrix, where each row is a bitset of the corresponding row of the boolean matrix
+    """
+    rows_num, columns_num = bits.shape
+    words_num = max(-(-columns_num // BITSET_WORD_SIZE), 1)
+
+    padded = np.zeros((rows_num, words_num * BITSET_WORD_SIZE), dtype=bool)
+    padded[:, :columns_num] = bits
+
+    return np.ascontiguousarray(np.packbits(padded, axis=1, bitorder='little')).view(np.uint64)
+
+
+def unpack_bitset(bitset: np.ndarray) -> np.ndarray:
+    """
+    Unpack single bitset packed by pack_bitsets into boolean array (including padding bits).
+    """
+    return np.unpackbits(np.ascontiguousarray(bitset).view(np.uint8), bitorder='little').astype(bool)
+
+
+def parse_ids(ids: Iterable[Any], name: str) -> np.ndarray:
+    """
+    Convert ids from query params into array of integers.
+
+    Raises:
+        ValidationError: one of the ids is not a number
+    """
+    try:
+        return np.array([int(id_) for id_ in ids], dtype=np.int64)
+    except (TypeError, ValueError):
+        raise serializers.ValidationError(f'"{name}" must be a list of numbers')
+
+
+class RecommendedBrandsList:
+    """
+    Lazy list of recommended brands produced by VectorizedRecommendationEngine.
+
+    Holds only ordered ids and scores of brands.
+    Brands are fetched from the database on slicing, so only brands of the requested page are loaded.
+    """
+    ordering = ('priority', '-formats_matches_num', '-tags_matches_num', '-goals_matches_num', 'id')
+
+    def __init__(
+            self,
+            ids: np.ndarray,
+            priorities: np.ndarray,
+            formats_matches_nums: np.ndarray,
+            tags_matches_nums: np.ndarray,
+            goals_matches_nums: np.ndarray
+    ):
+        self.ids = ids
+        self.priorities = priorities
+        self.formats_matches_nums = formats_matches_nums
+        self.tags_matches_nums = tags_matches_nums
+        self.goals_matches_nums = goals_matches_nums
+
+    @classmethod
+    def from_queryset(cls, queryset) -> 'RecommendedBrandsList':
+        """
+        Build the list from the ordered queryset of recommended brands (see get_recommended_brands).
+        Only ids and scores are fetched.
+        """
+        rows = np.array(
+            list(queryset.values_list(
+                'id', 'priority', 'formats_matches_num', 'tags_matches_num', 'goals_matches_num'
+            )),
+            dtype=np.int64
+        ).reshape(-1, 5)
+
+        return cls(*rows.T)
+
+    def dumps(self) -> bytes:
+        """
+        Serialize the list into compact bytes representation.
+        """
+        return np.stack([
+            self.ids,
+            self.priorities,
+            self.formats_matches_nums,
+            self.tags_matches_nums,
+            self.goals_matches_nums,
+        ]).astype(np.int64).tobytes()
+
+    @classmethod
+    def loads(cls, data: bytes) -> 'RecommendedBrandsList':
+        """
+        Deserialize the list serialized with dumps.
+        """
+        return cls(*np.frombuffer(data, dtype=np.int64).reshape(5, -1))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, item):
+        positions = range(len(self.ids))
+
+        if isinstance(item, slice):
+            return self._get_brands(positions[item])
+
+        return self._get_brands([positions[item]])[0]
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def after(self, cursor_values: list[Any]) -> 'RecommendedBrandsList':
+        """
+        Get brands that come after the cursor in the ordering (see KeysetResultsSetPagination).
+        """
+        try:
+            priority, formats_matches_num, tags_matches_num, goals_matches_num, id_ = (
+                int(value) for value in cursor_values
+            )
+        except (TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+
+        start = bisect.bisect_right(
+            range(len(self.ids)),
+            (priority, -formats_matches_num, -tags_matches_num, -goals_matches_num, id_),
+            key=lambda position: (
+                self.priorities[position],
+                -self.formats_matches_nums[position],
+                -self.tags_matches_nums[position],
+                -self.goals_matches_nums[position],
+                self.ids[position],
+            )
+        )
+
+        return RecommendedBrandsList(
+            ids=self.ids[start:],
+            priorities=self.priorities[start:],
+            formats_matches_nums=self.formats_matches_nums[start:],
+            tags_matches_nums=self.tags_matches_nums[start:],
+            goals_matches_nums=self.goals_matches_nums[start:],
+        )
+
+    def _get_brands(self, positions: Iterable[int]) -> list[Brand]:
+        positions = list(positions)
+
+        brands = Brand.objects.select_related(
+            'city',
+            'category'
+        ).prefetch_related(
+            Prefetch(
+                'product_photos',
+                queryset=ProductPhoto.objects.filter(format=ProductPhoto.MATCH),
+                to_attr='match_photos'
+            )
+        ).in_bulk([int(self.ids[position]) for position in positions])
+
+        result = []
+
+        for position in positions:
+            brand = brands.get(int(self.ids[position]))
+
+            if brand is None:
+                # deleted since the engine was loaded
+                continue
+
+            brand.priority = int(self.priorities[position])
+            brand.formats_matches_num = int(self.formats_matches_nums[position])
+            brand.tags_matches_num = int(self.tags_matches_nums[position])
+            brand.goals_matches_num = int(self.goals_matches_nums[position])
+
+            result.append(brand)
+
+        return result
+
+
+class BrandsVectors:
+    """
+    Brands data loaded by VectorizedRecommendationEngine.
+
+    Is never modified after it is built, so requests score brands against it without locking,
+    while the engine builds the next one.
+    """
+
+    def __init__(
+            self,
+            loaded_at: datetime,
+            version: str | None,
+            ids: np.ndarray,
+            category_ids: np.ndarray,
+            city_ids: np.ndarray,
+            avg_bills: np.ndarray,
+            subs_counts: np.ndarray,
+            columns: dict[str, dict[int, int]],
+            bitsets: dict[str, np.ndarray],
+            category_columns: np.ndarray
+    ):
+        self.loaded_at = loaded_at
+        self.version = version  # shared version of brands data at the moment of loading
+        self.ids = ids
+        self.category_ids = category_ids
+        self.city_ids = city_ids
+        self.avg_bills = avg_bills
+        self.subs_counts = subs_counts
+        self.columns = columns  # object id -> bit
+        self.bitsets = bitsets
+        # bit of the brand's category in categories_of_interest bitsets
+        self.category_columns = category_columns
+
+        self.positions = {int(brand_id): position for position, brand_id in enumerate(ids)}  # brand id -> row
+
+
+class VectorizedRecommendationEngine:
+    """
+    In-memory recommendation engine.
+
+    Keeps scalar fields of all brands in numpy arrays and m2m fields as packed bitsets
+    (a row per brand and a bit per related object), so that all brands are scored against the current one
+    with a few vectorized operations.
+
+    Data is fully reloaded from the database every BRAND_RECOMMENDATIONS_VECTORIZED_RELOAD_INTERVAL
+    or when the shared version of brands data in the cache changes, i.e. a brand was changed in any process
+    (see mark_brand_changed). Without a shared cache brands changed in the current process are reloaded
+    on the next call, changes made in other processes become visible after the next full reload.
+
+    New data is built aside and replaces the previous one at once, requests don't wait for a reload
+    unless the current brand is not loaded yet.
+    """
+    M2M_FIELDS = {
+        'formats': Format,
+        'tags': Tag,
+        'goals': Goal,
+        'categories_of_interest': Category,
+    }
+
+    # placeholder for empty city
+    NO_CITY = -1
+
+    def __init__(self):
+        # only one thread of the process loads data at a time
+        self._load_lock = threading.Lock()
+        self._changes_lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Drop all loaded data. Data will be loaded again on the next call.
+        """
+        with self._load_lock, self._changes_lock:
+            self._vectors: BrandsVectors | None = None
+            self._changed_brands_ids = set()
+
+    def mark_brand_changed(self, brand_id: int) -> None:
+        """
+        Mark brand as changed, so it is reloaded on the next call.
+
+        Changes the shared version of brands data, so all processes reload data on their next call.
+        Does nothing in the current process if data is not loaded yet.
+        """
+        cache.set(VECTORIZED_BRANDS_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+        with self._changes_lock:
+            if self._vectors is not None:
+                self._changed_brands_ids.add(brand_id)
+
+    def _load(self, version: str | None) -> BrandsVectors:
+        """
+        Load all brands from the database.
+        """
+        rows = list(
+            Brand.objects.filter(
+                user__isnull=False
+            ).order_by(
+                'id'
+            ).values_list(
+                'id', 'category_id', 'city_id', 'avg_bill', 'subs_count'
+            )
+        )
+        data = np.array(rows, dtype=object).reshape(-1, 5)
+        data[:, 2] = [self.NO_CITY if city_id is None else city_id for city_id in data[:, 2]]
+        data = data.astype(np.int64)
+
+        ids = data[:, 0]
+        category_ids = data[:, 1]
+
+        columns = {}
+        bitsets = {}
+
+        for field, model in self.M2M_FIELDS.items():
+            objects_ids = np.array(model.objects.order_by('id').values_list('id', flat=True), dtype=np.int64)
+            columns[field] = {int(object_id): column for column, object_id in enumerate(objects_ids)}
+
+            pairs = np.array(
+                list(self._get_through_pairs(field, user__isnull=False)), dtype=np.int64
+            ).reshape(-1, 2)
+
+            # skip pairs of brands and objects created after they were loaded
+            pairs = pairs[np.isin(pairs[:, 0], ids) & np.isin(pairs[:, 1], objects_ids)]
+
+            bits = np.zeros((len(ids), len(objects_ids)), dtype=bool)
+            bits[np.searchsorted(ids, pairs[:, 0]), np.searchsorted(objects_ids, pairs[:, 1])] = True
+
+            bitsets[field] = pack_bitsets(bits)
+
+        categories_columns = columns['categories_of_interest']
+
+        return BrandsVectors(
+            loaded_at=timezone.now(),
+            version=version,
+            ids=ids,
+            category_ids=category_ids,
+            city_ids=data[:, 2],
+            avg_bills=data[:, 3],
+            subs_counts=data[:, 4],
+            columns=columns,
+            bitsets=bitsets,
+            category_columns=np.array(
+                [categories_columns.get(int(category_id), -1) for category_id in category_ids], dtype=np.int64
+            )
+        )
+
+    def _get_through_pairs(self, field: str, **brand_filters):
+        """
+        Get (brand id, object id) pairs of the brand's m2m field.
+        """
+        model_field = Brand._meta.get_field(field)
+        brand_field_name = model_field.m2m_field_name()
+
+        return model_field.remote_field.through.objects.filter(
+            **{f'{brand_field_name}__{lookup}': value for lookup, value in brand_filters.items()}
+        ).values_list(
+            brand_field_name, model_field.m2m_reverse_field_name()
+        )
+
+    def _update_brands(self, vectors: BrandsVectors, brands_ids: set[int]) -> BrandsVectors | None:
+        """
+        Reload changed brands into a copy of the data.
+
+        Returns None if the set of brands or related objects has changed,
+        because it requires resizing of the arrays, so data must be fully reloaded.
+        """
+        rows = list(
+            Brand.objects.filter(
+                pk__in=brands_ids, user__isnull=False
+            ).values_list(
+                'id', 'category_id', 'city_id', 'avg_bill', 'subs_count'
+            )
+        )
+        found_ids = {row[0] for row in rows}
+
+        # a brand was created, deleted or its user was removed
+        if any(brand_id not in vectors.positions for brand_id in found_ids) or any(
+                brand_id in vectors.positions for brand_id in brands_ids - found_ids
+        ):
+            return None
+
+        pairs_by_field = {
+            field: list(self._get_through_pairs(field, pk__in=found_ids)) for field in self.M2M_FIELDS
+        }
+        categories_columns = vectors.columns['categories_of_interest']
+
+        # a new related object was created
+        if any(
+                object_id not in vectors.columns[field]
+                for field, pairs in pairs_by_field.items()
+                for _, object_id in pairs
+        ) or any(category_id not in categories_columns for _, category_id, *_ in rows):
+            return None
+
+        category_ids = vectors.category_ids.copy()
+        city_ids = vectors.city_ids.copy()
+        avg_bills = vectors.avg_bills.copy()
+        subs_counts = vectors.subs_counts.copy()
+        category_columns = vectors.category_columns.copy()
+
+        for brand_id, category_id, city_id, avg_bill, subs_count in rows:
+            position = vectors.positions[brand_id]
+
+            category_ids[position] = category_id
+            city_ids[position] = self.NO_CITY if city_id is None else city_id
+            avg_bills[position] = avg_bill
+            subs_counts[position] = subs_count
+            category_columns[position] = categories_columns[category_id]
+
+        bitsets = {}
+
+        for field, pairs in pairs_by_field.items():
+            bits = np.zeros((len(found_ids), len(vectors.columns[field])), dtype=bool)
+            rows_by_brand = {brand_id: row for row, brand_id in enumerate(found_ids)}
+
+            for brand_id, object_id in pairs:
+                bits[rows_by_brand[brand_id], vectors.columns[field][object_id]] = True
+
+            positions = [vectors.positions[brand_id] for brand_id in rows_by_brand]
+            bitsets[field] = vectors.bitsets[field].copy()
+            bitsets[field][positions] = pack_bitsets(bits)
+
+        return BrandsVectors(
+            loaded_at=vectors.loaded_at,
+            version=vectors.version,
+            ids=vectors.ids,
+            category_ids=category_ids,
+            city_ids=city_ids,
+            avg_bills=avg_bills,
+            subs_counts=subs_counts,
+            columns=vectors.columns,
+            bitsets=bitsets,
+            category_columns=category_columns
+        )
+
+    def _is_outdated(self, vectors: BrandsVectors, version: str | None) -> bool:
+        """
+        Check whether data must be fully reloaded.
+        """
+        reload_interval = settings.BRAND_RECOMMENDATIONS_VECTORIZED_RELOAD_INTERVAL
+
+        # version is missing if the cache is not shared or the key was evicted
+        return timezone.now() - vectors.loaded_at >= reload_interval or (
+                version is not None and version != vectors.version
+        )
+
+    def _get_vectors(self, current_brand_id: int) -> BrandsVectors:
+        """
+        Get data that includes the current brand and all known changes.
+
+        If data is being reloaded by another thread, the previous data is returned meanwhile.
+        """
+        vectors = self._vectors
+        version = cache.get(VECTORIZED_BRANDS_VERSION_CACHE_KEY)
+        has_current_brand = vectors is not None and current_brand_id in vectors.positions
+
+        if has_current_brand and not self._changed_brands_ids and not self._is_outdated(vectors, version):
+            return vectors
+
+        # the current brand is missing if it was created or got a user after data was loaded,
+        # it can't be scored until data is reloaded
+        if not self._load_lock.acquire(blocking=not has_current_brand):
+            return vectors
+
+        try:
+            # data could be reloaded while waiting for the lock
+            vectors = self._vectors
+
+            with self._changes_lock:
+                changed_brands_ids = self._changed_brands_ids
+                self._changed_brands_ids = set()
+
+            if vectors is not None and current_brand_id not in vectors.positions:
+                changed_brands_ids.add(current_brand_id)
+
+            if vectors is None or self._is_outdated(vectors, version):
+                vectors = self._load(version)
+            elif changed_brands_ids:
+                vectors = self._update_brands(vectors, changed_brands_ids) or self._load(version)
+
+            self._vectors = vectors
+
+            return vectors
+        finally:
+            self._load_lock.release()
+
+    def get_filter_mask(self, vectors: BrandsVectors, filter_kwargs: dict[str, Any]) -> np.ndarray:
+        """
+        Get mask of brands that satisfy the filters (see get_recommended_brands_filter_kwargs).
+        """
+        mask = np.ones(len(vectors.ids), dtype=bool)
+
+        if 'avg_bill' in filter_kwargs:
+            mask &= vectors.avg_bills == filter_kwargs['avg_bill']
+
+        if 'subs_count' in filter_kwargs:
+            mask &= vectors.subs_counts == filter_kwargs['subs_count']
+
+        if 'category__in' in filter_kwargs:
+            mask &= np.isin(vectors.category_ids, parse_ids(filter_kwargs['category__in'], 'category'))
+
+        if 'city__in' in filter_kwargs:
+            mask &= np.isin(vectors.city_ids, parse_ids(filter_kwargs['city__in'], 'city'))
+
+        return mask
+
+    def get_recommended_brands(
+            self,
+            current_brand: Brand,
+            filter_kwargs: dict[str, Any],
+            excluded_ids: list[int]
+    ) -> RecommendedBrandsList:
+        """
+        Score and sort brands for the current brand.
+
+        Priorities and numbers of matches are the same as in BrandRecommendation (see get_recommendation_priority).
+
+        Args:
+            current_brand: brand for which to get recommended brands
+            filter_kwargs: initial filters selected by user
+            excluded_ids: ids of brands that must not be recommended
+
+        Returns:
+            Ordered recommended brands
+        """
+        vectors = self._get_vectors(current_brand.pk)
+        position = vectors.positions.get(current_brand.pk)
+
+        if position is None:
+            # the brand was deleted or lost its user after the request had started
+            return RecommendedBrandsList.from_queryset(Brand.objects.none())
+
+        formats_matches_nums, tags_matches_nums, goals_matches_nums = (
+            np.bitwise_count(
+                vectors.bitsets[field] & vectors.bitsets[field][position]
+            ).sum(axis=1, dtype=np.int64)
+            for field in ('formats', 'tags', 'goals')
+        )
+
+        interests = unpack_bitset(vectors.bitsets['categories_of_interest'][position])
+        category_matches = (vectors.category_columns >= 0) & interests[np.maximum(vectors.category_columns, 0)]
+
+        conditions = np.stack([
+            formats_matches_nums > 0,
+            category_matches,
+            tags_matches_nums > 0,
+            goals_matches_nums > 0,
+            vectors.avg_bills == vectors.avg_bills[position],
+            vectors.subs_counts == vectors.subs_counts[position],
+        ])
+
+        # number of matched conditions until the first unmatched one
+        matched_nums = np.cumprod(conditions, axis=0).sum(axis=0)
+        priorities = BrandRecommendation.LAST_PRIORITY - matched_nums
+
+        # number of matches is taken into account only if the field is a part of the priority conditions
+        tags_matches_nums = np.where(priorities <= 4, tags_matches_nums, 0)
+        goals_matches_nums = np.where(priorities <= 3, goals_matches_nums, 0)
+
+        mask = self.get_filter_mask(vectors, filter_kwargs)
+        mask[position] = False
+        mask &= ~np.isin(vectors.ids, np.array(excluded_ids, dtype=np.int64))
+
+        candidates = np.flatnonzero(mask)
+        order = candidates[np.lexsort((
+            vectors.ids[candidates],
+            -goals_matches_nums[candidates],
+            -tags_matches_nums[candidates],
+            -formats_matches_nums[candidates],
+            priorities[candidates],
+        ))]
+
+        return RecommendedBrandsList(
+            ids=vectors.ids[order],
+            priorities=priorities[order],
+            formats_matches_nums=formats_matches_nums[order],
+            tags_matches_nums=tags_matches_nums[order],
+            goals_matches_nums=goals_matches_nums[order],
+        )
+
+
+# engine shared by all requests of the process
+vectorized_engine = VectorizedRecommendationEngine()
@@ -1,9 +1,11 @@
+from django.conf import settings
 from drf_spectacular.extensions import OpenApiViewExtension
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
 from core.apps.brand.serializers import (
     MatchSerializer,
+    BatchLikeSerializer,
     InstantCoopSerializer,
     LikedBySerializer,
     BrandCreateResponseSerializer,
@@ -11,7 +13,7 @@ from core.apps.brand.serializers import (
     MyLikesSerializer,
     MyMatchesSerializer, StatisticsSerializer
 )
-from core.apps.brand.utils import get_schema_standard_pagination_parameters
+from core.apps.brand.utils import get_schema_keyset_pagination_parameters
 
 
 class Fix1(OpenApiViewExtension):
@@ -68,6 +70,24 @@ class Fix1(OpenApiViewExtension):
             def like(self, request, *args, **kwargs):
                 return super().like(request, *args, **kwargs)
 
+            @extend_schema(
+                description='Like several brands at once\n\n'
+                            f'\ttargets: list of brand ids (max {settings.BRAND_BATCH_LIKE_MAX_TARGETS})\n\n'
+                            'Each target is handled the same way as in the "like" method, '
+                            'invalid targets do not prevent others from being liked.\n\n'
+                            'Returns a result for each target in the order they were passed '
+                            '(duplicates are removed):\n\n'
+                            '\tstatus: "liked" - like was created, "matched" - target liked the brand before, '
+                            'match was created, "error" - nothing was done\n\n'
+                            '\tmatch: created like/match or null in case of error\n\n'
+                            '\tdetail: reason of the error or null\n\n'
+                            'Authenticated brand with active subscription only',
+                tags=['Brand'],
+                responses={200: BatchLikeSerializer}
+            )
+            def batch_like(self, request, *args, **kwargs):
+                return super().batch_like(request, *args, **kwargs)
+
             @extend_schema(
                 tags=['Brand'],
                 description="Instant cooperation.\n\n"
@@ -89,7 +109,7 @@ class Fix1(OpenApiViewExtension):
                             "Excludes matches and likes of current brand.\n\n"
                             "Authenticated brand with active subscription only.",
                 responses={200: LikedBySerializer(many=True)},
-                parameters=[] + get_schema_standard_pagination_parameters()
+                parameters=[] + get_schema_keyset_pagination_parameters()
             )
             def liked_by(self, request, *args, **kwargs):
                 return super().liked_by(request, *args, **kwargs)
@@ -100,7 +120,7 @@ class Fix1(OpenApiViewExtension):
                             "instant_room: id of a room of type 'I' if it already exists OR null if it doesn't.\n\n"
                             "Authenticated brand with active subscription only.",
                 responses={200: MyLikesSerializer(many=True)},
-                parameters=[] + get_schema_standard_pagination_parameters()
+                parameters=[] + get_schema_keyset_pagination_parameters()
             )
             def my_likes(self, request, *args, **kwargs):
                 return super().my_likes(request, *args, **kwargs)
@@ -111,7 +131,7 @@ class Fix1(OpenApiViewExtension):
                             "match_room: id of a room of type 'M'\n\n"
                             "Authenticated brand with active subscription only.",
                 responses={200: MyMatchesSerializer(many=True)},
-                parameters=[] + get_schema_standard_pagination_parameters()
+                parameters=[] + get_schema_keyset_pagination_parameters()
             )
             def my_matches(self, request, *args, **kwargs):
                 return super().my_matches(request, *args, **kwargs)
@@ -121,6 +141,15 @@ class Fix1(OpenApiViewExtension):
                 description="Get a list of recommended brands.\n\n"
                             "Supports filtering.\n\n"
                             "Filters are joined using AND statement.\n\n"
+                            "By default pages are taken from the current recommendations, "
+                            "so they may shift if brands change.\n\n"
+                            "To page through a stable list pass \"snapshot=true\" with the first page. "
+                            "The list is calculated once and saved as a snapshot, "
+                            "\"snapshot\" token is returned in the response and is included in the \"next\" link. "
+                            "Next pages are taken from the snapshot, so they don't shift if brands change. "
+                            "If the snapshot has expired or filters were changed, "
+                            "the list is calculated again and a new token is returned. "
+                            "Without the snapshot mode \"snapshot\" is null.\n\n"
                             "Authenticated brand with active subscription only.",
                 parameters=[
                     OpenApiParameter(
@@ -154,7 +183,16 @@ class Fix1(OpenApiViewExtension):
                                     'Up to 10 cities.\n\n'
                                     'If brand has at least one of the specified cities it will be included.'
                     ),
-                ] + get_schema_standard_pagination_parameters(),
+                    OpenApiParameter(
+                        'snapshot',
+                        OpenApiTypes.STR,
+                        OpenApiParameter.QUERY,
+                        description='"true" to start the snapshot mode on the first page, '
+                                    'snapshot token from the previous page on the next pages.\n\n'
+                                    'The snapshot is bound to the filters of the first page, '
+                                    'if filters are changed, the list is calculated again and a new token is returned.'
+                    ),
+                ] + get_schema_keyset_pagination_parameters(),
                 responses={200: RecommendedBrandsSerializer(many=True)}
             )
             def recommended_brands(self, request, *args, **kwargs):
@@ -8,7 +8,6 @@ from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import TemporaryUploadedFile, InMemoryUploadedFile
 from django.db import transaction, DatabaseError
 from django.db.models import Q
-from django.utils import timezone
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
@@ -33,9 +32,12 @@ from core.apps.brand.models import (
     Blog,
     Collaboration
 )
+from core.apps.brand.utils import get_brand_exclusions, like_brands
 from core.apps.chat.models import Room
+from core.apps.chat.utils import notify_rooms_updated
 from core.apps.cities.serializers import CitySerializer
 from core.apps.payments.serializers import SubscriptionSerializer
+from core.apps.payments.utils import get_brand_context
 from core.common.exceptions import ServerError
 
 User = get_user_model()
@@ -767,7 +769,12 @@ class BrandMeSerializer(BrandGetSerializer):
 
     @extend_schema_field(SubscriptionSerializer())
     def get_subscription(self, brand):
-        sub = brand.get_active_subscription(True)
+        request = self.context.get('request')
+
+        if request is not None and get_brand_context(request).brand_id == brand.id:
+            sub = get_brand_context(request).active_subscription
+        else:
+            sub = brand.get_active_subscription(True)
 
         return sub and SubscriptionSerializer(sub).data  # if sub is None return None, otherwise return sub data
 
@@ -802,67 +809,110 @@ class MatchSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'is_match', 'room', 'match_at']
 
     def validate(self, attrs):
-        initiator = self.context['request'].user.brand
+        initiator = get_brand_context(self.context['request']).brand
         target = attrs.get('target')
 
         if initiator == target:
             raise serializers.ValidationError("You cannot 'like' yourself")
 
-        try:
-            # check if this brand have already performed that same 'like' action
-            match = Match.objects.get(initiator=initiator, target=target)
-            if match.is_match:
-                raise serializers.ValidationError(
-                    f"You already have 'match' with this brand! Room id: {match.room.pk}.")
-            raise serializers.ValidationError("You have already 'liked' this brand!")
-        except Match.DoesNotExist:
-            # at this point it means that there is no entry in db with that initiator and target,
-            # BUT there may be a reverse entry, which is checked further
-            pass
+        attrs['initiator'] = initiator
+
+        return attrs
+
+    def create(self, validated_data):
+        initiator = validated_data.get('initiator')
+        target = validated_data.get('target')  # target contains Brand obj
 
+        # existing like or match is checked in the same transaction in which the like is created,
+        # otherwise concurrent likes of the same brands could pass the check and create a like twice
         try:
-            # check if there is match
-            match = Match.objects.get(initiator=target, target=initiator)
-        except Match.DoesNotExist:
-            match = None
+            result = like_brands(initiator, {target.id: target.user_id})[target.id]
+        except DatabaseError:
+            raise ServerError("Failed to perform action!")
 
-        if match is not None and match.is_match:
-            # if is_match = True already, then raise an exception
-            raise serializers.ValidationError(f"You already have 'match' with this brand! Room id: {match.room.pk}.")
+        if isinstance(result, str):
+            raise serializers.ValidationError(result)
+
+        return result
+
+
+class BatchLikeResultSerializer(serializers.Serializer):
+    LIKED = 'liked'
+    MATCHED = 'matched'
+    ERROR = 'error'
+
+    target = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=[LIKED, MATCHED, ERROR])
+    match = MatchSerializer(allow_null=True)
+    detail = serializers.CharField(allow_null=True)
 
-        # at this point match is either None or is_match = False, passed to create method
-        attrs['match'] = match
-        attrs['initiator'] = initiator
+
+class BatchLikeSerializer(serializers.Serializer):
+    targets = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.BRAND_BATCH_LIKE_MAX_TARGETS,
+        write_only=True
+    )
+    results = BatchLikeResultSerializer(many=True, read_only=True)
+
+    def validate_targets(self, targets):
+        # remove duplicates keeping the order
+        return list(dict.fromkeys(targets))
+
+    def validate(self, attrs):
+        attrs['initiator'] = get_brand_context(self.context['request']).brand
 
         return attrs
 
     def create(self, validated_data):
-        initiator = validated_data.get('initiator')
-        target = validated_data.get('target')  # target contains Brand obj
-        match = validated_data.get('match')
+        """
+        Like all targets at once.
+
+        Targets are checked with a constant number of queries no matter how many of them were passed.
+        New likes are created with a single query, reciprocal likes are turned into matches with their rooms.
+        Invalid targets don't prevent others from being liked, the reason is returned in the result of the target.
+        """
+        initiator = validated_data['initiator']
+        targets = validated_data['targets']
+
+        targets_users_ids = dict(
+            Brand.objects.filter(pk__in=targets, user__isnull=False).values_list('pk', 'user_id')
+        )
+        exclusions = get_brand_exclusions(initiator.id)
+        blacklisted = set(exclusions['blocked'] + exclusions['blocked_by'])
+
+        results = {}
+
+        def set_result(target_id, status, match=None, detail=None):
+            results[target_id] = {'target': target_id, 'status': status, 'match': match, 'detail': detail}
+
+        def set_error(target_id, detail):
+            set_result(target_id, BatchLikeResultSerializer.ERROR, detail=detail)
+
+        for target_id in targets:
+            if target_id == initiator.id:
+                set_error(target_id, "You cannot 'like' yourself")
+            elif target_id not in targets_users_ids:
+                set_error(target_id, f'Invalid pk "{target_id}" - object does not exist.')
+            elif target_id in blacklisted:
+                set_error(target_id, 'You do not have permission to perform this action.')
 
         try:
-            with transaction.atomic():
-                if match is not None:
-                    # if not None, then is_match is False (checked in validate)
-                    match.is_match = True
-                    match.match_at = timezone.now()
-
-                    if match.room is not None:
-                        # if match already have room (instant), then change its type to match
-                        match.room.type = Room.MATCH
-                        match.room.save()
-                    else:
-                        room = Room.objects.create(type=Room.MATCH)
-                        room.participants.add(initiator.user, target.user)
-                        match.room = room
-                    match.save()
-                else:
-                    match = Match.objects.create(initiator=initiator, target=target)
+            liked = like_brands(initiator, {
+                target_id: targets_users_ids[target_id] for target_id in targets if target_id not in results
+            })
         except DatabaseError:
             raise ServerError("Failed to perform action!")
 
-        return match
+        for target_id, result in liked.items():
+            if isinstance(result, str):
+                set_error(target_id, result)
+            else:
+                status = BatchLikeResultSerializer.MATCHED if result.is_match else BatchLikeResultSerializer.LIKED
+                set_result(target_id, status, match=result)
+
+        return {'results': [results[target_id] for target_id in targets]}
 
 
 class InstantCoopSerializer(serializers.ModelSerializer):
@@ -877,7 +927,7 @@ class InstantCoopSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'is_match', 'match_at']
 
     def validate(self, attrs):
-        initiator = self.context['request'].user.brand
+        initiator = get_brand_context(self.context['request']).brand
         target = attrs.get('target')
 
         if initiator.pk == target.pk:
@@ -918,6 +968,8 @@ class InstantCoopSerializer(serializers.ModelSerializer):
 
                 match.room = room
                 match.save()
+
+                notify_rooms_updated([room.pk])
         except DatabaseError:
             raise ServerError('Failed to perform action. Please, try again!')
 
@@ -933,7 +985,7 @@ class CollaborationSerializer(serializers.ModelSerializer):
         read_only_fields = ['reporter', 'collab_with', 'created_at']
 
     def validate(self, attrs):
-        reporter = self.context['request'].user.brand
+        reporter = get_brand_context(self.context['request']).brand
         match = attrs.get('match')  # match obj
 
         match_initiator_id = match.initiator_id
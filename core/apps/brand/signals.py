@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.apps.brand.models import Brand, Match, Category, Tag, Format, Goal
+from core.apps.brand.recommendations import vectorized_engine
+from core.apps.brand.tasks import refresh_brand_recommendations_task
+from core.apps.brand.utils import get_brand_recommendations_refresh_cache_key
+from core.common.cache import invalidate_cache_tags, get_brand_cache_tag, QUESTIONNAIRE_CACHE_TAG
+
+# brand fields that affect recommendations
+RECOMMENDATION_FIELDS = {'user', 'category', 'avg_bill', 'subs_count'}
+
+
+def mark_brand_changed_on_commit(brand_id: int) -> None:
+    # marked after the commit, otherwise the engine may reload the brand before its changes are visible
+    # and keep the old data until the next reload
+    transaction.on_commit(lambda: vectorized_engine.mark_brand_changed(brand_id))
+
+
+def schedule_recommendations_refresh(brand_id: int) -> None:
+    # brand is saved and its m2m fields are set several times per request, the flag is kept until the task starts,
+    # so recommendations of the brand are recalculated once
+    if cache.add(
+            get_brand_recommendations_refresh_cache_key(brand_id),
+            True,
+            settings.BRAND_RECOMMENDATIONS_REFRESH_TIMEOUT
+    ):
+        refresh_brand_recommendations_task.delay(brand_id)
+
+
+def refresh_recommendations(brand_id: int) -> None:
+    if settings.BRAND_RECOMMENDATIONS_ENGINE == 'vectorized':
+        # vectorized engine scores brands in memory,
+        # stored recommendations (BrandRecommendation) are not kept up to date in this mode
+        mark_brand_changed_on_commit(brand_id)
+        return
+
+    # scheduled after the commit, otherwise the task may recalculate recommendations before changes are visible
+    transaction.on_commit(lambda: schedule_recommendations_refresh(brand_id))
+
+
+@receiver(post_save, sender=Brand, dispatch_uid='refresh_recommendations_on_brand_save')
+def refresh_recommendations_on_brand_save(instance, update_fields, **kwargs):
+    if update_fields is not None and not RECOMMENDATION_FIELDS.intersection(update_fields):
+        return
+
+    refresh_recommendations(instance.pk)
+
+
+@receiver(post_delete, sender=Brand, dispatch_uid='refresh_recommendations_on_brand_delete')
+def refresh_recommendations_on_brand_delete(instance, **kwargs):
+    # stored recommendations are deleted by cascade
+    mark_brand_changed_on_commit(instance.pk)
+
+
+def refresh_recommendations_on_questionnaire_change(instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        if action != 'post_clear' and not pk_set:
+            # nothing was actually added or removed
+            return
+
+        refresh_recommendations(instance.pk)
+    elif pk_set:
+        # changed from the other side of the relation, e.g. tag.brands.add(brand)
+        for brand_id in pk_set:
+            refresh_recommendations(brand_id)
+
+
+for field in ('formats', 'tags', 'goals', 'categories_of_interest'):
+    m2m_changed.connect(
+        refresh_recommendations_on_questionnaire_change,
+        sender=getattr(Brand, field).through,
+        dispatch_uid=f'refresh_recommendations_on_{field}_change'
+    )
+
+
+@receiver(post_save, sender=Match, dispatch_uid='invalidate_cache_tags_on_match_save')
+@receiver(post_delete, sender=Match, dispatch_uid='invalidate_cache_tags_on_match_delete')
+def invalidate_cache_tags_on_match_change(instance, **kwargs):
+    invalidate_cache_tags(get_brand_cache_tag(instance.initiator_id), get_brand_cache_tag(instance.target_id))
+
+
+@receiver(post_save, sender=Brand, dispatch_uid='invalidate_cache_tags_on_brand_save')
+@receiver(post_delete, sender=Brand, dispatch_uid='invalidate_cache_tags_on_brand_delete')
+def invalidate_cache_tags_on_brand_change(instance, **kwargs):
+    invalidate_cache_tags(get_brand_cache_tag(instance.pk))
+
+
+def invalidate_cache_tags_on_questionnaire_choice_change(**kwargs):
+    invalidate_cache_tags(QUESTIONNAIRE_CACHE_TAG)
+
+
+for model in (Category, Tag, Format, Goal):
+    post_save.connect(
+        invalidate_cache_tags_on_questionnaire_choice_change,
+        sender=model,
+        dispatch_uid=f'invalidate_cache_tags_on_{model._meta.model_name}_save'
+    )
+    post_delete.connect(
+        invalidate_cache_tags_on_questionnaire_choice_change,
+        sender=model,
+        dispatch_uid=f'invalidate_cache_tags_on_{model._meta.model_name}_delete'
+    )
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.apps.brand.models import Brand
+from core.apps.brand.utils import (
+    rollup_brand_daily_stats,
+    refresh_brand_recommendations,
+    get_brand_recommendations_refresh_cache_key
+)
+
+
+@shared_task
+def update_brand_daily_stats():
+    # recalculate the last complete days, including the ones that could be rolled up before they ended
+    yesterday = timezone.localdate() - timedelta(days=1)
+    rollup_brand_daily_stats(yesterday - timedelta(days=settings.BRAND_DAILY_STATS_RECALCULATED_DAYS - 1), yesterday)
+
+
+@shared_task
+def refresh_brand_recommendations_task(brand_id: int):
+    # cleared before recalculating, so changes made during the recalculation schedule another one
+    cache.delete(get_brand_recommendations_refresh_cache_key(brand_id))
+
+    # deleted brands are skipped, their recommendations are deleted by cascade
+    brand = Brand.objects.filter(pk=brand_id).first()
+
+    if brand is not None:
+        refresh_brand_recommendations(brand)
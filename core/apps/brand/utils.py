@@ -1,51 +1,101 @@
-from collections import Counter
-from datetime import datetime
-from typing import Any, Generator
+import hashlib
+import json
+import operator
+import re
+import uuid
+from datetime import datetime, date, time, timedelta
+from functools import reduce
+from typing import Any
 
 from dateutil.relativedelta import relativedelta
-from django.db.models import Q, Value, QuerySet, Prefetch, Count
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction, IntegrityError
+from django.db.models import (
+    Q,
+    Value,
+    QuerySet,
+    Prefetch,
+    Count,
+    OuterRef,
+    Subquery,
+    Exists,
+    IntegerField,
+    FilteredRelation,
+    Max,
+    Min,
+    Sum
+)
+from django.db.models.functions import Coalesce, TruncDate
 from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter
 from rest_framework import serializers
 
-from core.apps.brand.models import Match, Collaboration, Brand, ProductPhoto
-from core.apps.brand.pagination import StandardResultsSetPagination
-
-
-def get_schema_standard_pagination_parameters() -> list[OpenApiParameter]:
+from core.apps.blacklist.models import BlackList
+from core.apps.brand.models import (
+    Match,
+    Collaboration,
+    Brand,
+    ProductPhoto,
+    BrandRecommendation,
+    BrandDailyStats
+)
+from core.apps.brand.pagination import KeysetResultsSetPagination
+from core.apps.brand.recommendations import RecommendedBrandsList, vectorized_engine
+from core.apps.chat.models import Room
+from core.apps.chat.utils import notify_rooms_updated, notify_permissions_changed
+from core.common.cache import get_or_set_tagged_cache, get_brand_cache_tag, invalidate_cache_tags
+
+
+def get_schema_keyset_pagination_parameters() -> list[OpenApiParameter]:
     """
-    Get standard pagination query parameters for use in OpenAPI schema generation.
+    Get keyset pagination query parameters for use in OpenAPI schema generation.
     """
-    standard_pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetResultsSetPagination
 
     return [
         OpenApiParameter(
-            'page',
-            OpenApiTypes.INT,
+            pagination_class.cursor_query_param,
+            OpenApiTypes.STR,
             OpenApiParameter.QUERY,
-            description='Page number.\n\n'
-                        'To get next or previous page use "next" and "previous" links from the response.'
-                        '\n\n'
-                        f'To get last page pass "{standard_pagination_class.last_page_strings[0]}" as a value.'
+            description='Pagination cursor.\n\n'
+                        'To get next page use "next" link from the response.'
         ),
         OpenApiParameter(
-            standard_pagination_class.page_size_query_param,
+            pagination_class.page_size_query_param,
             OpenApiTypes.INT,
             OpenApiParameter.QUERY,
             description='Number of objects per page.\n\n'
-                        f'\tdefault: {standard_pagination_class.page_size}\n\n'
+                        f'\tdefault: {pagination_class.page_size}\n\n'
                         '\tmin: 1\n\n'
-                        f'\tmax: {standard_pagination_class.max_page_size}'
-        )
+                        f'\tmax: {pagination_class.max_page_size}'
+        ),
+        OpenApiParameter(
+            pagination_class.count_query_param,
+            OpenApiTypes.BOOL,
+            OpenApiParameter.QUERY,
+            description='Whether to return total number of objects ("count" and "count_is_exact" in the response).'
+                        '\n\n'
+                        f'Objects are counted up to {pagination_class.max_count}.'
+        ),
+        OpenApiParameter(
+            pagination_class.page_query_param,
+            OpenApiTypes.INT,
+            OpenApiParameter.QUERY,
+            description='Page number pagination was replaced by the cursor pagination. '
+                        'Requests with this parameter are rejected with 400.',
+            deprecated=True
+        ),
     ]
 
 
 def get_periods(number_of_months: int) -> list[tuple[datetime, datetime]]:
     """
-    Convert number of months to periods, which can be used as __range lookup input
+    Convert number of months to periods.
 
-    The step is 1 month.
+    The step is 1 month, the first period ends now.
+    Each period is a half-open interval: start <= x < end.
 
     Args:
         number_of_months: the number of months to break into periods
@@ -62,6 +112,58 @@ def get_periods(number_of_months: int) -> list[tuple[datetime, datetime]]:
     return result
 
 
+def get_start_of_date(value: date) -> datetime:
+    """
+    Get the start of the date (midnight in the current timezone).
+    """
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+def split_period(
+        period: tuple[datetime, datetime],
+        rolled_up_dates: tuple[date, date] | None
+) -> tuple[tuple[date, date] | None, list[tuple[datetime, datetime]]]:
+    """
+    Split the period into complete days that are read from daily rollups (see BrandDailyStats)
+    and the rest that is calculated live.
+
+    Args:
+        period: half-open interval of datetimes
+        rolled_up_dates: first and last rolled up dates (inclusive) or None if nothing was rolled up
+
+    Returns:
+        Half-open interval of rolled up dates or None if no days of the period were rolled up
+        and list of half-open intervals of datetimes to calculate live
+    """
+    start, end = period
+
+    if rolled_up_dates is None:
+        return None, [period]
+
+    # complete days of the period
+    first_date = timezone.localtime(start).date()
+
+    if get_start_of_date(first_date) < start:
+        first_date += timedelta(days=1)
+
+    end_date = timezone.localtime(end).date()
+
+    rollup_start_date = max(first_date, rolled_up_dates[0])
+    rollup_end_date = min(end_date, rolled_up_dates[1] + timedelta(days=1))
+
+    if rollup_start_date >= rollup_end_date:
+        return None, [period]
+
+    live_ranges = [
+        (start, get_start_of_date(rollup_start_date)),
+        (get_start_of_date(rollup_end_date), end),
+    ]
+
+    return (rollup_start_date, rollup_end_date), [
+        (range_start, range_end) for range_start, range_end in live_ranges if range_start < range_end
+    ]
+
+
 def period_to_str(period: tuple[datetime, datetime]) -> str:
     """
     Returns a string representation of given period.
@@ -71,81 +173,129 @@ def period_to_str(period: tuple[datetime, datetime]) -> str:
     return ' - '.join(map(str, period))
 
 
-def generate_queries_for_likes(periods: list[tuple[datetime, datetime]], brand: Brand) -> QuerySet[str]:
+def get_first_collaborations(queryset: QuerySet[Collaboration]) -> QuerySet[Collaboration]:
     """
-    Generate query for each period
+    Filter out collaborations that were already reported for the same match.
 
-    Returns a queryset that will return a list of string representations of periods.
-    Each period appears a number of times equal to the number of likes during this period.
+    There can be up to 2 collabs pointing at the same match (reported by both brands),
+    a collaboration is counted only once, when it is reported for the first time.
+    """
+    earlier_collaborations = Collaboration.objects.filter(
+        Q(created_at__lt=OuterRef('created_at')) | Q(created_at=OuterRef('created_at'), pk__lt=OuterRef('pk')),
+        match=OuterRef('match')
+    )
 
-    For example:
-        Queryset[period1, period1, period1, period2, period2]
-        This queryset means that there were 3 likes during period1 and 2 likes during period2
+    return queryset.exclude(Exists(earlier_collaborations))
+
+
+def get_live_statistics(
+        brand: Brand,
+        periods_ranges: list[list[tuple[datetime, datetime]]]
+) -> list[dict[str, int]]:
     """
-    for period in periods:
-        period_as_str = period_to_str(period)
+    Calculate statistics of the brand for periods from likes, matches and collaborations.
+
+    Every period is counted with a conditional aggregate (COUNT(...) FILTER (WHERE ...)),
+    so only counts are returned from the database.
+
+    Args:
+        brand: a brand instance for which to calculate statistics
+        periods_ranges: half-open intervals of datetimes to count for each period (see split_period)
+    """
+    likes_and_matches_aggregates = {}
+    collabs_aggregates = {}
+
+    def get_ranges_filter(field: str, ranges: list[tuple[datetime, datetime]]) -> Q:
+        return reduce(
+            operator.or_, (Q(**{f'{field}__gte': start, f'{field}__lt': end}) for start, end in ranges)
+        )
+
+    for i, ranges in enumerate(periods_ranges):
+        if not ranges:
+            continue
 
         # is_match=False MUST NOT be specified in filters,
         # because we want to count EVERY like, including those which led to match
-        likes_for_period = Match.objects.filter(
-            initiator=brand, like_at__range=period
-        ).annotate(period=Value(period_as_str)).values_list('period', flat=True)
-
-        yield likes_for_period
+        likes_and_matches_aggregates[f'likes_{i}'] = Count(
+            'pk', filter=Q(initiator=brand) & get_ranges_filter('like_at', ranges)
+        )
+        likes_and_matches_aggregates[f'matches_{i}'] = Count(
+            'pk', filter=Q(is_match=True) & get_ranges_filter('match_at', ranges)
+        )
+        collabs_aggregates[f'collabs_{i}'] = Count(
+            'pk', filter=get_ranges_filter('created_at', ranges)
+        )
 
+    likes_and_matches = {}
+    collabs = {}
 
-def generate_queries_for_matches(periods: list[tuple[datetime, datetime]], brand: Brand) -> QuerySet[str]:
-    """
-    Generate query for each period
+    if likes_and_matches_aggregates:
+        since = min(start for ranges in periods_ranges for start, _ in ranges)
 
-    Returns a queryset that will return a list of string representations of periods.
-    Each period appears a number of times equal to the number of matches during this period.
+        likes_and_matches = Match.objects.filter(
+            Q(initiator=brand) | Q(target=brand, is_match=True),
+            Q(like_at__gte=since) | Q(match_at__gte=since)
+        ).aggregate(**likes_and_matches_aggregates)
 
-    For example:
-        Queryset[period1, period1, period1, period2, period2]
-        This queryset means that there were 3 matches during period1 and 2 matches during period2
-    """
-    for period in periods:
-        period_as_str = period_to_str(period)
+        collabs = get_first_collaborations(
+            Collaboration.objects.filter(Q(reporter=brand) | Q(collab_with=brand), created_at__gte=since)
+        ).aggregate(**collabs_aggregates)
 
-        matches_for_period = Match.objects.filter(
-            Q(initiator=brand) | Q(target=brand), is_match=True, match_at__range=period
-        ).annotate(period=Value(period_as_str)).values_list('period', flat=True)
+    return [
+        {
+            'likes': likes_and_matches.get(f'likes_{i}', 0),
+            'matches': likes_and_matches.get(f'matches_{i}', 0),
+            'collabs': collabs.get(f'collabs_{i}', 0),
+        } for i in range(len(periods_ranges))
+    ]
 
-        yield matches_for_period
 
+def get_rollup_statistics(
+        brand: Brand,
+        periods_dates: list[tuple[date, date] | None]
+) -> list[dict[str, int]]:
+    """
+    Read statistics of the brand for periods from daily rollups (see BrandDailyStats).
 
-def generate_queries_for_collabs(periods: list[tuple[datetime, datetime]], brand: Brand) -> QuerySet[str]:
+    Args:
+        brand: a brand instance for which to read statistics
+        periods_dates: half-open interval of rolled up dates for each period or None (see split_period)
     """
-    Generate query for each period
+    aggregates = {}
 
-    Returns a queryset that will return a list of string representations of periods.
-    Each period appears a number of times equal to the number of collabs during this period.
+    for i, dates in enumerate(periods_dates):
+        if dates is None:
+            continue
 
-    For example:
-        Queryset[period1, period1, period1, period2, period2]
-        This queryset means that there were 3 collabs during period1 and 2 collabs during period2
-    """
-    for period in periods:
-        period_as_str = period_to_str(period)
+        days_filter = Q(date__gte=dates[0], date__lt=dates[1])
+
+        for field in ('likes', 'matches', 'collabs'):
+            aggregates[f'{field}_{i}'] = Sum(field, filter=days_filter, default=0)
+
+    rollups = {}
 
-        # there can be up to 2 collabs pointing at the same match
-        # to count collabs correctly, we must count only distinct ones.
-        # That's why we use distinct on "match" field
-        # WARNING distinct on specified fields works only on postgresql db backend
-        collabs_for_period = Collaboration.objects.filter(
-            Q(reporter=brand) | Q(collab_with=brand), created_at__range=period
-        ).order_by('match_id').distinct('match_id').annotate(
-            period=Value(period_as_str)
-        ).values_list('period', flat=True)
+    if aggregates:
+        rollups = BrandDailyStats.objects.filter(
+            brand=brand,
+            date__gte=min(dates[0] for dates in periods_dates if dates is not None),
+            date__lt=max(dates[1] for dates in periods_dates if dates is not None)
+        ).aggregate(**aggregates)
 
-        yield collabs_for_period
+    return [
+        {field: rollups.get(f'{field}_{i}', 0) for field in ('likes', 'matches', 'collabs')}
+        for i in range(len(periods_dates))
+    ]
 
 
 def get_statistics_list(brand: Brand, period: int) -> list[dict[str, Any]]:
     """
     Get a list of current brand statistics for period
 
+    Complete days that were already rolled up are read from BrandDailyStats,
+    the rest (at least the current day and parts of days at the bounds of periods) is calculated live.
+    Days are considered rolled up between the first and the last dates in BrandDailyStats,
+    so statistics are calculated live for the days before the backfill has reached them.
+
     Args:
         brand: a brand instance for which to calculate statistics
         period: number of months (statistics will be calculated from {now - period} to {now})
@@ -161,44 +311,82 @@ def get_statistics_list(brand: Brand, period: int) -> list[dict[str, Any]]:
     """
     periods = get_periods(period)
 
-    # generate queries for each period
-    likes_queries_gen = generate_queries_for_likes(periods, brand)
-    matches_queries_gen = generate_queries_for_matches(periods, brand)
-    collabs_queries_gen = generate_queries_for_collabs(periods, brand)
-
-    # get first query for each of like/match/collab
-    first_like_query = next(likes_queries_gen)
-    first_matches_query = next(matches_queries_gen)
-    first_collabs_query = next(collabs_queries_gen)
+    rolled_up_dates = BrandDailyStats.objects.aggregate(first=Min('date'), last=Max('date'))
+    rolled_up_dates = (rolled_up_dates['first'], rolled_up_dates['last']) if rolled_up_dates['last'] else None
 
-    # construct the final query for each of like/match/collab
-    # final query is a union of all queries for each period
-    likes_query_final = first_like_query.union(*[q for q in likes_queries_gen])
-    matches_query_final = first_matches_query.union(*[q for q in matches_queries_gen])
-    collabs_query_final = first_collabs_query.union(*[q for q in collabs_queries_gen])
+    periods_dates, periods_ranges = zip(*(split_period(period_range, rolled_up_dates) for period_range in periods))
 
-    # count number of period occurrences for each like/match/collab
-    # each variable will be a dict where key - string representation of the period and value - number of occurrences
-    likes_count_for_periods = dict(Counter(likes_query_final).most_common())
-    matches_count_for_periods = dict(Counter(matches_query_final).most_common())
-    collabs_count_for_periods = dict(Counter(collabs_query_final).most_common())
+    live_statistics = get_live_statistics(brand, list(periods_ranges))
+    rollup_statistics = get_rollup_statistics(brand, list(periods_dates))
 
     results = []
 
     # construct the resulting list
-    for period in periods:
-        period_as_str = period_to_str(period)
-
+    for period_range, live, rollup in zip(periods, live_statistics, rollup_statistics):
         results.append({
-            'period': period_as_str,
-            'likes': likes_count_for_periods.get(period_as_str, 0),
-            'matches': matches_count_for_periods.get(period_as_str, 0),
-            'collabs': collabs_count_for_periods.get(period_as_str, 0)
+            'period': period_to_str(period_range),
+            'likes': live['likes'] + rollup['likes'],
+            'matches': live['matches'] + rollup['matches'],
+            'collabs': live['collabs'] + rollup['collabs']
         })
 
     return results
 
 
+def rollup_brand_daily_stats(start_date: date, end_date: date) -> None:
+    """
+    Recalculate daily rollups of all brands (see BrandDailyStats) for days from start_date to end_date inclusive.
+
+    Only complete days must be rolled up, because statistics for days after the last rolled up one
+    are calculated live.
+    """
+    start = get_start_of_date(start_date)
+    end = get_start_of_date(end_date + timedelta(days=1))
+
+    stats = {}
+
+    def add(rows, field: str) -> None:
+        for brand_id, day, num in rows:
+            stats.setdefault((brand_id, day), {'likes': 0, 'matches': 0, 'collabs': 0})[field] += num
+
+    add(
+        Match.objects.filter(
+            like_at__gte=start, like_at__lt=end
+        ).values(
+            'initiator', day=TruncDate('like_at')
+        ).annotate(num=Count('pk')).values_list('initiator', 'day', 'num'),
+        'likes'
+    )
+
+    # match is counted for both brands
+    for side in ('initiator', 'target'):
+        add(
+            Match.objects.filter(
+                is_match=True, match_at__gte=start, match_at__lt=end
+            ).values(
+                side, day=TruncDate('match_at')
+            ).annotate(num=Count('pk')).values_list(side, 'day', 'num'),
+            'matches'
+        )
+
+    # collab is counted for both brands
+    for side in ('reporter', 'collab_with'):
+        add(
+            get_first_collaborations(
+                Collaboration.objects.filter(created_at__gte=start, created_at__lt=end)
+            ).values(
+                side, day=TruncDate('created_at')
+            ).annotate(num=Count('pk')).values_list(side, 'day', 'num'),
+            'collabs'
+        )
+
+    with transaction.atomic():
+        BrandDailyStats.objects.filter(date__range=(start_date, end_date)).delete()
+        BrandDailyStats.objects.bulk_create([
+            BrandDailyStats(brand_id=brand_id, date=day, **counts) for (brand_id, day), counts in stats.items()
+        ])
+
+
 def get_recommended_brands_filter_kwargs(
         avg_bill: int | None,
         subs_count: int | None,
@@ -255,38 +443,208 @@ def get_recommended_brands_filter_kwargs(
     return filter_kwargs
 
 
-def get_recommended_brands_initial_brands(current_brand: Brand, filter_kwargs: dict[str, Any]) -> QuerySet[Brand]:
+def get_brand_exclusions_cache_key(brand_id: int) -> str:
+    return f'brand_exclusions_{brand_id}'
+
+
+def get_brand_exclusions(brand_id: int) -> dict[str, list[int]]:
     """
-    Get initial brands queryset.
+    Get ids of brands the brand interacted with.
+    Result is cached under the tag of the brand (see get_brand_cache_tag) until one of the sets changes.
 
     Args:
-        current_brand: brand for which to get recommended brands
-        filter_kwargs: initial filters selected by user
+        brand_id: id of the brand
 
     Returns:
-        A queryset of brands that satisfy the filters
+        Dictionary with the following lists of ids:
+            - liked: brands that the brand liked (without matches)
+            - matched: brands that have match with the brand
+            - blocked: brands that the brand added to its blacklist
+            - blocked_by: brands that added the brand to their blacklist
+    """
+    return get_or_set_tagged_cache(
+        get_brand_exclusions_cache_key(brand_id),
+        [get_brand_cache_tag(brand_id)],
+        lambda: _get_brand_exclusions(brand_id),
+        settings.BRAND_EXCLUSIONS_CACHE_TIMEOUT
+    )
+
+
+def _get_brand_exclusions(brand_id: int) -> dict[str, list[int]]:
+    exclusions = {'liked': [], 'matched': [], 'blocked': [], 'blocked_by': []}
+
+    matches = Match.objects.filter(
+        Q(initiator_id=brand_id) | Q(target_id=brand_id, is_match=True)
+    ).values_list('initiator_id', 'target_id', 'is_match')
+
+    for initiator_id, target_id, is_match in matches:
+        if is_match:
+            exclusions['matched'].append(target_id if initiator_id == brand_id else initiator_id)
+        else:
+            exclusions['liked'].append(target_id)
+
+    blacklist = BlackList.objects.filter(
+        Q(initiator_id=brand_id) | Q(blocked_id=brand_id)
+    ).values_list('initiator_id', 'blocked_id')
+
+    for initiator_id, blocked_id in blacklist:
+        if initiator_id == brand_id:
+            exclusions['blocked'].append(blocked_id)
+        else:
+            exclusions['blocked_by'].append(initiator_id)
+
+    return exclusions
+
+
+def create_matches(initiator: Brand, reciprocal_likes: list[Match], targets_users_ids: dict[int, int]) -> None:
+    """
+    Turn likes of the initiator by targets into matches.
+
+    Instant rooms become match rooms, new match rooms are created for the rest.
+    Must be called in a transaction with reciprocal likes locked.
+    """
+    if not reciprocal_likes:
+        return
+
+    now = timezone.now()
+
+    instant_rooms_ids = [match.room_id for match in reciprocal_likes if match.room_id is not None]
+
+    if instant_rooms_ids:
+        Room.objects.filter(pk__in=instant_rooms_ids).update(type=Room.MATCH)
+
+    likes_wo_room = [match for match in reciprocal_likes if match.room_id is None]
+
+    if likes_wo_room:
+        rooms = Room.objects.bulk_create([Room(type=Room.MATCH) for _ in likes_wo_room])
+
+        Room.participants.through.objects.bulk_create([
+            Room.participants.through(room_id=room.pk, user_id=user_id)
+            for match, room in zip(likes_wo_room, rooms)
+            for user_id in (initiator.user_id, targets_users_ids[match.initiator_id])
+        ])
+        # bulk_create doesn't send m2m_changed signal, connections of the participants must learn about new rooms
+        notify_permissions_changed(
+            {initiator.user_id, *(targets_users_ids[match.initiator_id] for match in likes_wo_room)}
+        )
+
+        for match, room in zip(likes_wo_room, rooms):
+            match.room = room
+
+    for match in reciprocal_likes:
+        match.is_match = True
+        match.match_at = now
+
+    Match.objects.bulk_update(reciprocal_likes, ['is_match', 'match_at', 'room'])
+
+    notify_rooms_updated([match.room_id for match in reciprocal_likes])
+
+
+def like_brands_once(initiator: Brand, targets_users_ids: dict[int, int]) -> dict[int, Match | str]:
+    """
+    Like targets in one transaction. See like_brands.
+    """
+    results = {}
+
+    with transaction.atomic():
+        # lock likes and matches between the initiator and targets,
+        # so that concurrent requests don't turn the same like into a match
+        existing = Match.objects.select_for_update().filter(
+            Q(initiator=initiator, target__in=targets_users_ids) | Q(initiator__in=targets_users_ids, target=initiator)
+        )
+
+        reciprocal_likes = []
+
+        for match in existing:
+            is_own = match.initiator_id == initiator.id
+            target_id = match.target_id if is_own else match.initiator_id
+
+            if match.is_match:
+                results[target_id] = f"You already have 'match' with this brand! Room id: {match.room_id}."
+            elif is_own:
+                results[target_id] = "You have already 'liked' this brand!"
+            else:
+                reciprocal_likes.append(match)
+                results[target_id] = match
+
+        # there is no like between the initiator and these targets yet,
+        # if a concurrent transaction creates one first, unique constraint of the pair is violated
+        new_likes = Match.objects.bulk_create([
+            Match(initiator=initiator, target_id=target_id)
+            for target_id in targets_users_ids
+            if target_id not in results
+        ])
+
+        for match in new_likes:
+            results[match.target_id] = match
+
+        create_matches(initiator, reciprocal_likes, targets_users_ids)
+
+    return results
+
+
+def like_brands(initiator: Brand, targets_users_ids: dict[int, int]) -> dict[int, Match | str]:
+    """
+    Like targets on behalf of the initiator.
+
+    Targets that already liked the initiator get a match, the rest get a like.
+    Existing likes and matches are locked and new likes are inserted in the same transaction,
+    so it takes 2 queries if there are no matches, no matter how many targets were passed.
+
+    If a concurrent transaction created a like between the same brands (e.g. both brands liked each other
+    at the same time), the transaction is retried, this time that like is already visible.
+
+    Args:
+        initiator: brand that likes targets
+        targets_users_ids: ids of users of target brands by ids of target brands
+
+    Returns:
+        Dictionary where key is an id of the target
+        and value is either a created like/match or an error message if the target cannot be liked.
+    """
+    for attempt in range(settings.BRAND_LIKE_ATTEMPTS):
+        try:
+            results = like_brands_once(initiator, targets_users_ids)
+            break
+        except IntegrityError:
+            if attempt == settings.BRAND_LIKE_ATTEMPTS - 1:
+                raise
+
+    # bulk operations don't send signals
+    changed_targets_ids = [target_id for target_id, result in results.items() if isinstance(result, Match)]
+
+    if changed_targets_ids:
+        invalidate_cache_tags(*map(get_brand_cache_tag, [initiator.id, *changed_targets_ids]))
+
+    return results
+
+
+def get_recommended_brands_excluded_ids(current_brand: Brand) -> list[int]:
     """
-    # get ids of current brand likes including matches
-    # liked brands as initiator
-    # matched brands as initiator
-    current_brand_likes_including_matches = current_brand.initiator.values_list('target', flat=True)
+    Get ids of brands that must never be recommended to the current brand:
+        - brands that the current brand liked or has match with
+        - brands that are in the current brand's blacklist
+        - brands that blocked the current brand
 
-    # get ids of brands that have match with current brand as target
-    # matched brands as target
-    current_brand_matches_ids_as_target = current_brand.target.filter(
-        is_match=True
-    ).values_list('initiator', flat=True)
+    Args:
+        current_brand: brand for which to get recommended brands
+    """
+    exclusions = get_brand_exclusions(current_brand.pk)
 
-    likes_and_matches_ids = list(current_brand_likes_including_matches.union(current_brand_matches_ids_as_target))
+    return exclusions['liked'] + exclusions['matched'] + exclusions['blocked'] + exclusions['blocked_by']
 
-    # get all brands that current brand added to its blacklist
-    blocked_brands = current_brand.blacklist_as_initiator.values_list('blocked', flat=True)
 
-    # get all brands that added the current one to the blacklist
-    blocked_by = current_brand.blacklist_as_blocked.values_list('initiator', flat=True)
+def get_recommended_brands_initial_brands(current_brand: Brand, filter_kwargs: dict[str, Any]) -> QuerySet[Brand]:
+    """
+    Get initial brands queryset.
 
-    blacklist = list(blocked_brands.union(blocked_by))
+    Args:
+        current_brand: brand for which to get recommended brands
+        filter_kwargs: initial filters selected by user
 
+    Returns:
+        A queryset of brands that satisfy the filters
+    """
     initial_brands = Brand.objects.filter(
         user__isnull=False, **filter_kwargs
     ).exclude(
@@ -294,105 +652,208 @@ def get_recommended_brands_initial_brands(current_brand: Brand, filter_kwargs: d
         # - already have match with current one
         # - are in current brand's blacklist
         # - blocked current brand
-        pk__in=likes_and_matches_ids + blacklist
+        pk__in=get_recommended_brands_excluded_ids(current_brand)
     )
 
     return initial_brands
 
 
-def get_priority_kwargs(current_brand: Brand) -> dict[int, dict[str, Any]]:
+def get_recommendation_priority(
+        formats_matches_num: int,
+        category_matches: bool,
+        tags_matches_num: int,
+        goals_matches_num: int,
+        avg_bill_matches: bool,
+        subs_count_matches: bool
+) -> int:
     """
-    Get filters for each priority.
+    Get priority of the recommended brand.
 
-    Args:
-        current_brand: brand for which to get recommended brands
+    Priorities (1-indexed) are lowered by dropping conditions from the end of the list one by one:
+        1) formats, category, tags, goals, avg_bill and subs_count match
+        2) formats, category, tags, goals and avg_bill match
+        3) formats, category, tags and goals match
+        4) formats, category and tags match
+        5) formats and category match
+        6) formats match
+        7) everything else
+
+    "category matches" means that the recommended brand's category is one of the categories of interest of the brand.
+    m2m fields match if there is at least one common object.
 
     Returns:
-        Dictionary where the key is a priority (1-indexed) and the value is a dictionary of filters
-    """
-    # get ids of current brand m2m and instantly evaluate it to avoid unnecessary subqueries
-    current_brand_tags = list(current_brand.tags.values_list('id', flat=True))
-    current_brand_formats = list(current_brand.formats.values_list('id', flat=True))
-    current_brand_goals = list(current_brand.goals.values_list('id', flat=True))
-    current_brand_categories_of_interest = list(
-        current_brand.categories_of_interest.values_list('id', flat=True)
-    )
+        Priority of the recommended brand
+    """
+    conditions = [
+        formats_matches_num > 0,
+        category_matches,
+        tags_matches_num > 0,
+        goals_matches_num > 0,
+        avg_bill_matches,
+        subs_count_matches,
+    ]
 
-    priority_1_kwargs = {
-        'formats__in': current_brand_formats,
-        'category__in': current_brand_categories_of_interest,
-        'tags__in': current_brand_tags,
-        'goals__in': current_brand_goals,
-        'avg_bill': current_brand.avg_bill,
-        'subs_count': current_brand.subs_count
-    }
+    matched_num = 0
 
-    priorities = {}
+    for condition in conditions:
+        if not condition:
+            break
 
-    for priority in range(1, len(priority_1_kwargs) + 2):
-        priorities[priority] = {**priority_1_kwargs}  # MUST make a copy
+        matched_num += 1
+
+    return BrandRecommendation.LAST_PRIORITY - matched_num
 
-        try:
-            priority_1_kwargs.popitem()
-        except KeyError:
-            pass
 
-    return priorities
+def build_brand_recommendation(
+        brand_id: int,
+        recommended_id: int,
+        formats_matches_num: int,
+        category_matches: bool,
+        tags_matches_num: int,
+        goals_matches_num: int,
+        avg_bill_matches: bool,
+        subs_count_matches: bool
+) -> BrandRecommendation:
+    """
+    Build (but not save) recommendation of the recommended brand for the brand.
 
+    Number of matches is taken into account only if the corresponding field is a part of the priority conditions,
+    otherwise it is set to 0. E.g. tags matches are counted for priorities 1-4 only.
+    """
+    priority = get_recommendation_priority(
+        formats_matches_num,
+        category_matches,
+        tags_matches_num,
+        goals_matches_num,
+        avg_bill_matches,
+        subs_count_matches
+    )
 
-def generate_recommended_brands_queries(
-        current_brand: Brand,
-        initial_brands: QuerySet[Brand],
-        priority_kwargs: dict[int, dict[str, Any]]
-) -> Generator[QuerySet[Brand], None, None]:
+    return BrandRecommendation(
+        brand_id=brand_id,
+        recommended_id=recommended_id,
+        priority=priority,
+        formats_matches_num=formats_matches_num if priority <= 6 else 0,
+        tags_matches_num=tags_matches_num if priority <= 4 else 0,
+        goals_matches_num=goals_matches_num if priority <= 3 else 0,
+    )
+
+
+def get_m2m_matches_num_subquery(related_name: str, ids: list[int]) -> Coalesce:
     """
-    Generate a query for each priority in priority_kwargs
+    Get subquery that counts objects of the brand's m2m field that are in the given list of ids.
+
+    Counts through model rows instead of joining m2m tables to the brand queryset,
+    so that multiple counts in one query don't multiply each other.
 
     Args:
-        current_brand: brand for which to get recommended brands
-        initial_brands: queryset to get initial brands,
-                        which is used as a starting point for calculating recommended brands
-        priority_kwargs: priority - filters mapping for each priority
-
-    Returns: generator that yields queries to get recommended brands for each of the priorities
-    """
-    last_priority_num = len(priority_kwargs)
-    cur_exclude_set = {current_brand.pk}
-
-    for priority, kwargs in priority_kwargs.items():
-        cur_lookups_set = set(kwargs.keys())
-
-        cur_query = initial_brands.filter(
-            **kwargs
-        ).distinct().exclude(
-            pk__in=cur_exclude_set
-        ).select_related(
-            'city',
-            'category'
-        ).prefetch_related(
-            Prefetch(
-                'product_photos',
-                queryset=ProductPhoto.objects.filter(format=ProductPhoto.MATCH),
-                to_attr='match_photos'
-            )
-        ).annotate(
-            priority=Value(priority),
-            formats_matches_num=Count('formats') if 'formats__in' in cur_lookups_set else Value(0),
-            tags_matches_num=Count('tags') if 'tags__in' in cur_lookups_set else Value(0),
-            goals_matches_num=Count('goals') if 'goals__in' in cur_lookups_set else Value(0),
-        )
+        related_name: name of the brand's m2m field
+        ids: ids of the objects to count
+    """
+    field = Brand._meta.get_field(related_name)
+    through = field.remote_field.through
+
+    matches_num = through.objects.filter(
+        **{field.m2m_field_name(): OuterRef('pk'), f'{field.m2m_reverse_field_name()}__in': ids}
+    ).values(
+        field.m2m_field_name()
+    ).annotate(
+        num=Count('pk')
+    ).values('num')
 
-        if priority != last_priority_num:
-            # no need to update the exclude set with the last priority
-            cur_exclude = set(initial_brands.filter(
-                **kwargs
-            ).distinct().exclude(
-                pk__in=cur_exclude_set
-            ).values_list('id', flat=True))
+    return Coalesce(Subquery(matches_num, output_field=IntegerField()), Value(0))
 
-            cur_exclude_set.update(cur_exclude)
 
-        yield cur_query
+def get_brand_recommendations_refresh_cache_key(brand_id: int) -> str:
+    return f'brand_recommendations_refresh_{brand_id}'
+
+
+def refresh_brand_recommendations(brand: Brand) -> None:
+    """
+    Recalculate recommendations in both directions for the brand:
+        - brands recommended to the brand
+        - brands the brand is recommended to
+
+    Must be called every time brand's questionnaire changes,
+    i.e. formats, tags, goals, categories of interest, category, avg_bill or subs_count.
+
+    Brands without common formats are not stored (see BrandRecommendation).
+    """
+    recommendations = []
+
+    if brand.user_id is not None:
+        formats_ids = list(brand.formats.values_list('id', flat=True))
+
+        if formats_ids:
+            tags_ids = list(brand.tags.values_list('id', flat=True))
+            goals_ids = list(brand.goals.values_list('id', flat=True))
+            categories_of_interest_ids = set(brand.categories_of_interest.values_list('id', flat=True))
+
+            categories_of_interest_through = Brand.categories_of_interest.through
+
+            # m2m matches are symmetric, so they are calculated once for both directions
+            candidates = Brand.objects.filter(
+                user__isnull=False
+            ).exclude(
+                pk=brand.pk
+            ).annotate(
+                formats_matches_num=get_m2m_matches_num_subquery('formats', formats_ids),
+                tags_matches_num=get_m2m_matches_num_subquery('tags', tags_ids),
+                goals_matches_num=get_m2m_matches_num_subquery('goals', goals_ids),
+                # whether the candidate is interested in the brand's category
+                is_interested_in_brand=Exists(categories_of_interest_through.objects.filter(
+                    brand=OuterRef('pk'), category_id=brand.category_id
+                ))
+            ).filter(
+                formats_matches_num__gt=0
+            ).values_list(
+                'id',
+                'category_id',
+                'avg_bill',
+                'subs_count',
+                'formats_matches_num',
+                'tags_matches_num',
+                'goals_matches_num',
+                'is_interested_in_brand',
+            )
+
+            for (
+                    candidate_id,
+                    category_id,
+                    avg_bill,
+                    subs_count,
+                    formats_matches_num,
+                    tags_matches_num,
+                    goals_matches_num,
+                    is_interested_in_brand
+            ) in candidates:
+                common_kwargs = {
+                    'formats_matches_num': formats_matches_num,
+                    'tags_matches_num': tags_matches_num,
+                    'goals_matches_num': goals_matches_num,
+                    'avg_bill_matches': avg_bill == brand.avg_bill,
+                    'subs_count_matches': subs_count == brand.subs_count,
+                }
+
+                # candidate recommended to the brand
+                recommendations.append(build_brand_recommendation(
+                    brand_id=brand.pk,
+                    recommended_id=candidate_id,
+                    category_matches=category_id in categories_of_interest_ids,
+                    **common_kwargs
+                ))
+
+                # brand recommended to the candidate
+                recommendations.append(build_brand_recommendation(
+                    brand_id=candidate_id,
+                    recommended_id=brand.pk,
+                    category_matches=is_interested_in_brand,
+                    **common_kwargs
+                ))
+
+    with transaction.atomic():
+        BrandRecommendation.objects.filter(Q(brand=brand) | Q(recommended=brand)).delete()
+        BrandRecommendation.objects.bulk_create(recommendations)
 
 
 def get_recommended_brands(
@@ -401,10 +862,16 @@ def get_recommended_brands(
         subs_count: int | None,
         categories_ids: list[int] | None,
         cities_ids: list[int] | None
-) -> QuerySet[Brand]:
+) -> QuerySet[Brand] | RecommendedBrandsList:
     """
     Get recommended brands for the current brand.
 
+    Depending on BRAND_RECOMMENDATIONS_ENGINE setting:
+        - "sql": priority and number of matches are read from precomputed recommendations
+          (see refresh_brand_recommendations).
+          Brands without a recommendation have the last priority and zero matches.
+        - "vectorized": brands are scored in memory (see VectorizedRecommendationEngine).
+
     Args:
         current_brand: brand for which to get recommended brands
         avg_bill: "average bill" filter value
@@ -413,14 +880,103 @@ def get_recommended_brands(
         cities_ids: "cities ids" filter value
 
     Returns:
-        Recommended brands queryset
+        Recommended brands queryset or lazy list of recommended brands
     """
     filter_kwargs = get_recommended_brands_filter_kwargs(avg_bill, subs_count, categories_ids, cities_ids)
+
+    if settings.BRAND_RECOMMENDATIONS_ENGINE == 'vectorized':
+        return vectorized_engine.get_recommended_brands(
+            current_brand, filter_kwargs, get_recommended_brands_excluded_ids(current_brand)
+        )
+
     initial_brands = get_recommended_brands_initial_brands(current_brand, filter_kwargs)
-    priority_kwargs = get_priority_kwargs(current_brand)
 
-    queries_gen = generate_recommended_brands_queries(current_brand, initial_brands, priority_kwargs)
+    return initial_brands.exclude(
+        pk=current_brand.pk
+    ).annotate(
+        recommendation=FilteredRelation('recommended_to', condition=Q(recommended_to__brand=current_brand))
+    ).select_related(
+        'city',
+        'category'
+    ).prefetch_related(
+        Prefetch(
+            'product_photos',
+            queryset=ProductPhoto.objects.filter(format=ProductPhoto.MATCH),
+            to_attr='match_photos'
+        )
+    ).annotate(
+        priority=Coalesce('recommendation__priority', Value(BrandRecommendation.LAST_PRIORITY)),
+        formats_matches_num=Coalesce('recommendation__formats_matches_num', Value(0)),
+        tags_matches_num=Coalesce('recommendation__tags_matches_num', Value(0)),
+        goals_matches_num=Coalesce('recommendation__goals_matches_num', Value(0)),
+    ).order_by(
+        'priority', '-formats_matches_num', '-tags_matches_num', '-goals_matches_num', 'id'
+    )
+
+
+def get_recommended_brands_snapshot_cache_key(brand_id: int, filter_kwargs: dict[str, Any], token: str) -> str:
+    # snapshot is bound to the filters, so the token can't be used to page through brands selected by other filters
+    normalized_filters = {
+        lookup: sorted(map(str, value)) if isinstance(value, list) else value
+        for lookup, value in filter_kwargs.items()
+    }
+    filters_hash = hashlib.md5(json.dumps(normalized_filters, sort_keys=True).encode()).hexdigest()
+
+    return f'recommended_brands_snapshot_{brand_id}_{filters_hash}_{token}'
+
+
+def create_recommended_brands_snapshot(
+        current_brand: Brand,
+        filter_kwargs: dict[str, Any],
+        recommended_brands: QuerySet[Brand] | RecommendedBrandsList
+) -> tuple[str, RecommendedBrandsList]:
+    """
+    Save ordered ids and scores of the recommended brands, so that the next pages are taken from the same list.
+
+    Args:
+        current_brand: brand for which recommended brands were calculated
+        filter_kwargs: filters the brands were selected by (see get_recommended_brands_filter_kwargs)
+        recommended_brands: result of get_recommended_brands
+
+    Returns:
+        Tuple of the snapshot token and the saved list
+    """
+    if isinstance(recommended_brands, QuerySet):
+        recommended_brands = RecommendedBrandsList.from_queryset(recommended_brands)
+
+    token = uuid.uuid4().hex
 
-    return next(queries_gen).union(*queries_gen).order_by(
-        'priority', '-formats_matches_num', '-tags_matches_num', '-goals_matches_num'
+    cache.set(
+        get_recommended_brands_snapshot_cache_key(current_brand.pk, filter_kwargs, token),
+        recommended_brands.dumps(),
+        settings.BRAND_RECOMMENDATIONS_SNAPSHOT_TTL
     )
+
+    return token, recommended_brands
+
+
+def get_recommended_brands_snapshot(
+        current_brand: Brand,
+        filter_kwargs: dict[str, Any],
+        token: str
+) -> RecommendedBrandsList | None:
+    """
+    Get recommended brands saved by create_recommended_brands_snapshot.
+
+    Args:
+        current_brand: brand for which recommended brands were calculated
+        filter_kwargs: current filters (see get_recommended_brands_filter_kwargs)
+        token: token of the snapshot
+
+    Returns:
+        Saved list or None if the snapshot has expired, doesn't exist or was saved for other filters
+    """
+    if not re.fullmatch(r'[0-9a-f]{32}', token):
+        return None
+
+    data = cache.get(get_recommended_brands_snapshot_cache_key(current_brand.pk, filter_kwargs, token))
+
+    if data is None:
+        return None
+
+    return RecommendedBrandsList.loads(data)
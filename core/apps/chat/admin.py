@@ -1,7 +1,10 @@
+from collections import defaultdict
+
 from django.contrib import admin
 
 from core.apps.chat.forms import MessageAdminForm, RoomFavoritesAdminForm, MessageAttachmentAdminForm
-from core.apps.chat.models import Room, Message, RoomFavorites, MessageAttachment
+from core.apps.chat.models import Room, Message, RoomFavorites, MessageAttachment, MessageChange
+from core.apps.chat.utils import update_rooms_last_message, log_message_changes
 from core.common.admin import SearchByIdMixin, custom_title_filter_factory
 
 
@@ -54,6 +57,39 @@ class MessageAdmin(SearchByIdMixin, admin.ModelAdmin):
 
         return message.text
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+
+        # message could be moved from another room, so recalculate last messages of both rooms
+        rooms_ids = {obj.room_id, form.initial.get('room')} - {None}
+        update_rooms_last_message(rooms_ids)
+
+        if change:
+            # for clients of the old room the moved message is deleted
+            for room_id in rooms_ids - {obj.room_id}:
+                log_message_changes(room_id, [obj.pk], MessageChange.DELETED)
+
+            log_message_changes(obj.room_id, [obj.pk], MessageChange.EDITED)
+
+    def delete_model(self, request, obj):
+        pk = obj.pk
+
+        super().delete_model(request, obj)
+        update_rooms_last_message([obj.room_id])
+        log_message_changes(obj.room_id, [pk], MessageChange.DELETED)
+
+    def delete_queryset(self, request, queryset):
+        messages_ids = defaultdict(list)
+
+        for pk, room_id in queryset.values_list('pk', 'room_id'):
+            messages_ids[room_id].append(pk)
+
+        super().delete_queryset(request, queryset)
+        update_rooms_last_message(messages_ids.keys())
+
+        for room_id, ids in messages_ids.items():
+            log_message_changes(room_id, ids, MessageChange.DELETED)
+
 
 message_attachment_room_type_filter = custom_title_filter_factory(admin.ChoicesFieldListFilter, 'Room type')
 
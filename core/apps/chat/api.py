@@ -1,17 +1,19 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Subquery, OuterRef, Prefetch, Q, Max, F
+from django.db.models import Prefetch, Q, F
 from rest_framework import viewsets, mixins, generics
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-from core.apps.brand.pagination import StandardResultsSetPagination
+from core.apps.brand.pagination import KeysetResultsSetPagination
 from core.apps.brand.permissions import IsBrand
-from core.apps.chat.models import Message, MessageAttachment
 from core.apps.chat.permissions import IsOwnerOfRoomFavorite
 from core.apps.chat.serializers import (
     RoomFavoritesListSerializer,
     RoomFavoritesCreateSerializer,
-    MessageAttachmentCreateSerializer
+    MessageAttachmentCreateSerializer,
+    ChatSyncSerializer
 )
+from core.apps.chat.utils import get_last_message_prefetch, set_rooms_unread_count, get_chat_changes
 from core.apps.payments.permissions import HasActiveSub
 
 User = get_user_model()
@@ -25,39 +27,33 @@ class RoomFavoritesViewSet(
 ):
     serializer_class = RoomFavoritesListSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetResultsSetPagination
 
     def get_queryset(self):
         if self.action == 'list':
-            last_message_in_room = Message.objects.filter(
-                pk=Subquery(Message.objects.filter(room=OuterRef('room')).order_by('-created_at').values('pk')[:1])
-            ).prefetch_related(
-                Prefetch(
-                    'attachments',
-                    queryset=MessageAttachment.objects.all(),
-                    to_attr='attachments_objs'
-                )
-            )
-
             return self.request.user.room_favorites.select_related('room').prefetch_related(
                 Prefetch(
                     'room__participants',
                     queryset=User.objects.filter(~Q(pk=self.request.user.id)).select_related('brand__category'),
                     to_attr='interlocutor_users'
                 ),
-                Prefetch(
-                    'room__messages',
-                    queryset=last_message_in_room,
-                    to_attr='last_message'
-                )
+                get_last_message_prefetch('room__last_message')
             ).annotate(
-                last_message_created_at=Max('room__messages__created_at')
+                last_message_created_at=F('room__last_message_at')
             ).order_by(
                 F('last_message_created_at').desc(nulls_last=True)
             )
 
         return self.request.user.room_favorites.all()
 
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+
+        if page is not None and self.action == 'list':
+            set_rooms_unread_count([favorite.room for favorite in page], self.request.user)
+
+        return page
+
     def get_permissions(self):
         permission_classes = self.permission_classes
 
@@ -85,3 +81,15 @@ class MessageAttachmentCreateView(generics.CreateAPIView):
             permission_classes = [IsAuthenticated]
 
         return [permission() for permission in permission_classes]
+
+
+class ChatSyncView(generics.GenericAPIView):
+    serializer_class = ChatSyncSerializer
+    permission_classes = [IsAuthenticated, IsBrand, HasActiveSub]
+
+    def get(self, request, *args, **kwargs):
+        changes = get_chat_changes(request.user, request.query_params.get('sync_token'))
+
+        serializer = self.get_serializer(changes)
+
+        return Response(serializer.data)
@@ -7,3 +7,4 @@ class ChatConfig(AppConfig):
 
     def ready(self):
         import core.apps.chat.schema
+        from . import signals
@@ -1,8 +1,9 @@
 from typing import Type, Tuple, Optional, List
 
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import QuerySet, Prefetch, OuterRef, Subquery, Max, F
+from django.db.models import QuerySet, Prefetch, F
 from djangochannelsrestframework.decorators import action
 from djangochannelsrestframework.generics import GenericAsyncAPIConsumer
 from rest_framework import status
@@ -10,12 +11,13 @@ from rest_framework.exceptions import NotFound
 from rest_framework.serializers import Serializer
 from rest_framework.utils.serializer_helpers import ReturnList
 
-from core.apps.brand.models import Brand
 from core.apps.chat.mixins import (
     ConsumerSerializationMixin,
     ConsumerUtilitiesMixin,
     ConsumerPaginationMixin,
-    ConsumerObserveAdminActivityMixin, ConsumerReplyToGroupsMixin
+    ConsumerReplyToGroupsMixin,
+    ConsumerPermissionContextMixin,
+    ConsumerStateSizeMixin
 )
 from core.apps.chat.models import Room, Message, MessageAttachment
 from core.apps.chat.permissions import (
@@ -27,13 +29,23 @@ from core.apps.chat.permissions import (
     CanCreateMessage,
     CanAdminAct,
     CanAdminJoinRoom,
-    HasActiveSub, NotInBlacklist
+    HasActiveSub, NotInBlacklist,
+    IsDebug
 )
 from core.apps.chat.serializers import (
     RoomSerializer,
     MessageSerializer,
     RoomListSerializer,
+    ChatSyncSerializer,
+)
+from core.apps.chat.utils import (
+    ADMINS_GROUP_NAME,
+    get_last_message_prefetch,
+    notify_rooms_updated,
+    set_rooms_unread_count,
+    get_chat_changes
 )
+from core.common.exceptions import BadRequest
 
 User = get_user_model()
 
@@ -44,7 +56,8 @@ class BaseRoomConsumer(
     ConsumerSerializationMixin,
     ConsumerUtilitiesMixin,
     ConsumerPaginationMixin,
-    ConsumerObserveAdminActivityMixin,
+    ConsumerPermissionContextMixin,
+    ConsumerStateSizeMixin,
 ):
     serializer_class = RoomSerializer
     lookup_field = "pk"
@@ -57,6 +70,8 @@ class BaseRoomConsumer(
             return MessageSerializer
         elif action_ in ('get_rooms', 'get_support_room'):
             return RoomListSerializer
+        elif action_ == 'sync':
+            return ChatSyncSerializer
 
         return super().get_serializer_class()
 
@@ -69,6 +84,8 @@ class BaseRoomConsumer(
 
         page_objs = await self.get_page_objects(paginator, page)
 
+        await database_sync_to_async(set_rooms_unread_count)(page_objs, self.scope['user'])
+
         rooms_data = await self.get_serialized_data(page_objs, many=True, **kwargs)
 
         data = await self.get_paginated_data(rooms_data, paginator, page)
@@ -78,6 +95,13 @@ class BaseRoomConsumer(
     @action()
     async def join_room(self, room_id, **kwargs):
         self.room = await self.get_room_with_participants(room_id)
+        self.room_permission_context = None
+
+        if self.room is not None:
+            # events of the room are received through the room group while the room is joined
+            self.room_group_name = f'room_{self.room.pk}'
+            await self.add_group(self.room_group_name)
+
         room_data = await self.get_serialized_data(self.room, **kwargs)
 
         return room_data, status.HTTP_200_OK
@@ -88,14 +112,38 @@ class BaseRoomConsumer(
 
         pk = self.room.pk
         delattr(self, 'room')
+        self.room_permission_context = None
+        await self.leave_room_group()
 
         return {'response': f'Leaved room {pk} successfully!'}, status.HTTP_200_OK
 
     @action()
-    async def get_room_messages(self, page: int, **kwargs):
+    async def get_room_messages(
+            self,
+            page: Optional[int] = None,
+            before_id: Optional[int] = None,
+            after_id: Optional[int] = None,
+            around_id: Optional[int] = None,
+            **kwargs
+    ):
         action_ = kwargs.get('action')
         messages = await database_sync_to_async(self.get_queryset)(**kwargs)
 
+        cursors_num = sum(cursor is not None for cursor in (before_id, after_id, around_id))
+
+        if cursors_num > 1 or (cursors_num and page is not None):
+            raise BadRequest('Pass either page or one of before_id, after_id, around_id!')
+
+        if page is None:
+            # keyset pagination, doesn't depend on the depth in history and on the new messages
+            page_objs, pagination_info = await self.get_keyset_page(
+                messages, 100, before_id=before_id, after_id=after_id, around_id=around_id
+            )
+
+            messages_data = await self.get_serialized_data(page_objs, many=True, **kwargs)
+
+            return {'results': messages_data, **pagination_info}, status.HTTP_200_OK
+
         paginator = await self.paginate_queryset(messages, 100, action_)
 
         page_objs = await self.get_page_objects(paginator, page)
@@ -108,39 +156,24 @@ class BaseRoomConsumer(
 
     @action()
     async def create_message(self, text: str, attachments_ids: Optional[List[int]]=None, **kwargs):
-        message_obj = await Message.objects.acreate(
-            room=self.room,
-            user=self.scope['user'],
-            text=text
-        )
-
-        if attachments_ids:
-            # link attachments to newly created message
-            await MessageAttachment.objects.filter(
-                id__in=attachments_ids,
-                message__isnull=True  # filter out already linked attachments (where message is not null)
-            ).aupdate(message=message_obj)
-
-        message = await Message.objects.prefetch_related(
-            Prefetch(
-                'attachments',
-                queryset=MessageAttachment.objects.all(),
-                to_attr='attachments_objs'
-            )
-        ).aget(id=message_obj.id)
+        message = await self.create_message_in_db(text, attachments_ids)
 
         message_data = await self.get_serialized_data(message, **kwargs)
 
-        groups = self.get_user_groups_for_room(self.room)
+        self.room.last_message = message
+        self.room.last_message_at = message.created_at
 
-        await self.reply_to_groups(
-            groups=groups,
+        await self.reply_to_room(
+            room=self.room,
             action=kwargs['action'],
             data=message_data,
             status=status.HTTP_201_CREATED,
             request_id=kwargs['request_id']
         )
 
+        # sent after the message, so that clients receive the message first
+        await self.reply_room_updated(self.room)
+
     @action()
     async def edit_message(self, msg_id, edited_text, **kwargs):
         updated = bool(await self.edit_message_in_db(msg_id, edited_text))
@@ -152,15 +185,19 @@ class BaseRoomConsumer(
                 'text': edited_text,
             }
 
-            groups = self.get_user_groups_for_room(self.room)
+            await self.refresh_room_last_message(self.room)
 
-            await self.reply_to_groups(
-                groups=groups,
+            await self.reply_to_room(
+                room=self.room,
                 action=kwargs['action'],
                 data=data,
                 status=status.HTTP_200_OK,
                 request_id=kwargs['request_id']
             )
+
+            # the list of rooms changes only if the last message was edited
+            if self.room.last_message_id == msg_id:
+                await self.reply_room_updated(self.room)
         else:
             raise NotFound(
                 f"Message with id: {msg_id} and user: {self.scope['user'].email} not found! "
@@ -192,10 +229,10 @@ class BaseRoomConsumer(
 
         errors = []
 
-        groups = self.get_user_groups_for_room(self.room)
+        await self.refresh_room_last_message(self.room)
 
-        await self.reply_to_groups(
-            groups=groups,
+        await self.reply_to_room(
+            room=self.room,
             action=kwargs['action'],
             data=data,
             errors=errors,
@@ -203,6 +240,21 @@ class BaseRoomConsumer(
             request_id=kwargs['request_id']
         )
 
+        await self.reply_room_updated(self.room)
+
+    @action()
+    async def mark_read(self, message_id: Optional[int] = None, **kwargs):
+        data = await self.mark_room_read_in_db(message_id)
+
+        # other connections of the user update unread counters as well
+        await self.reply_to_groups(
+            groups=[self.user_group_name],
+            action=kwargs['action'],
+            data=data,
+            status=status.HTTP_200_OK,
+            request_id=kwargs['request_id']
+        )
+
     @action()
     async def get_support_room(self, **kwargs):
         room, created = await self.get_or_create_support_room()
@@ -210,10 +262,30 @@ class BaseRoomConsumer(
         room_data = await self.get_serialized_data(room, **kwargs)
 
         if created:
-            return room_data, status.HTTP_201_CREATED
+            await self.reply(
+                action=kwargs['action'],
+                data=room_data,
+                status=status.HTTP_201_CREATED,
+                request_id=kwargs['request_id']
+            )
+
+            # sent after the response, so that the client receives the room first
+            await database_sync_to_async(notify_rooms_updated)([room.pk])
+
+            return
 
         return room_data, status.HTTP_200_OK
 
+    @action()
+    async def get_state_size(self, **kwargs):
+        # debug action, available only in debug mode
+        return self.measure_state_size(), status.HTTP_200_OK
+
+    async def leave_room_group(self):
+        if hasattr(self, 'room_group_name'):
+            await self.remove_group(self.room_group_name)
+            delattr(self, 'room_group_name')
+
 
 class RoomConsumer(BaseRoomConsumer):
     async def get_permissions(self, action: str, **kwargs):
@@ -233,13 +305,24 @@ class RoomConsumer(BaseRoomConsumer):
                 'get_room_messages',
                 'edit_message',
                 'delete_messages',
+                'mark_read',
         ):
             permission_instances += [UserInRoom()]
         elif action == 'create_message':
             permission_instances += [CanCreateMessage()]
+        elif action == 'get_state_size':
+            permission_instances += [IsDebug()]
 
         return permission_instances
 
+    @action()
+    async def sync(self, sync_token: Optional[str] = None, **kwargs):
+        changes = await database_sync_to_async(get_chat_changes)(self.scope['user'], sync_token)
+
+        data = await self.get_serialized_data(changes, **kwargs)
+
+        return data, status.HTTP_200_OK
+
     def get_queryset(self, **kwargs) -> QuerySet:
         if 'action' in kwargs:
             action_ = kwargs['action']
@@ -252,65 +335,73 @@ class RoomConsumer(BaseRoomConsumer):
                     )
                 ).order_by('-created_at', 'id')
             elif action_ == 'get_rooms':
-                last_message_in_room = Message.objects.filter(
-                    pk=Subquery(Message.objects.filter(room=OuterRef('room')).order_by('-created_at').values('pk')[:1])
-                ).prefetch_related(
-                    Prefetch(
-                        'attachments',
-                        queryset=MessageAttachment.objects.all(),
-                        to_attr='attachments_objs'
-                    )
-                )
-
                 return self.scope['user'].rooms.prefetch_related(
                     Prefetch(
                         'participants',
                         queryset=User.objects.exclude(pk=self.scope['user'].id).select_related('brand__category'),
                         to_attr='interlocutor_users'
                     ),
-                    Prefetch(
-                        'messages',
-                        queryset=last_message_in_room,
-                        to_attr='last_message'
-                    )
-                ).annotate(
-                    last_message_created_at=Max('messages__created_at')
+                    get_last_message_prefetch()
                 ).order_by(
-                    F('last_message_created_at').desc(nulls_last=True)
+                    F('last_message_at').desc(nulls_last=True), '-id'
                 )
 
         return self.scope['user'].rooms.all()
 
+    async def websocket_connect(self, message):
+        if self.scope['user'].is_authenticated:
+            # Join the user group before loading data for permissions and the connection,
+            # so that changes made after loading are not missed (events about them are received).
+            self.user_group_name = f'user_{self.scope["user"].pk}'
+            await self.add_group(self.user_group_name)
+
+            if self.scope['user'].is_staff:
+                # admins are notified about events in support rooms through the shared group
+                await self.add_group(ADMINS_GROUP_NAME)
+
+            self.user_rooms = await self.load_connection_bootstrap()
+
+        await super().websocket_connect(message)
+
     async def connect(self):
-        if 'chat' in self.scope['subprotocols']:
-            await self.accept('chat')
-        else:
+        if 'chat' not in self.scope['subprotocols']:
             await self.close()
+            return
 
-        self.user_group_name = f'user_{self.scope["user"].pk}'
-        self.brand = await self.get_brand()
-        self.user_rooms = await self.get_user_rooms_pk_set()
-        self.action_paginators = {}
-        self.admins_pks_set = await self.get_admins_pks_set()
+        # permission context was loaded before checking permissions (see websocket_connect)
+        self.brand = (await self.get_permission_context())['brand']
 
-        await self.add_group(self.user_group_name)
-        await self.user_activity.subscribe()
+        self.action_counts = {}
+
+        # accept connection when the consumer is ready to handle actions
+        await self.accept('chat')
 
     async def disconnect(self, code):
         if hasattr(self, 'user_group_name'):
             await self.remove_group(self.user_group_name)
             delattr(self, 'user_group_name')
 
+        await self.remove_group(ADMINS_GROUP_NAME)
+        await self.leave_room_group()
+
         self.delete_all_paginators()
-        await self.user_activity.unsubscribe()
 
     @database_sync_to_async
-    def get_brand(self) -> Brand:
-        return self.scope['user'].brand
+    def get_user_rooms_pk_set(self) -> set[int] | None:
+        """
+        Get ids of rooms of the user to check access to rooms without queries.
 
-    @database_sync_to_async
-    def get_user_rooms_pk_set(self):
-        return set(self.scope['user'].rooms.values_list('pk', flat=True))
+        Returns:
+            Set of rooms ids or None if the user has more than CHAT_CONSUMER_MAX_CACHED_ROOMS rooms,
+            then access is checked by a query every time
+        """
+        max_rooms = settings.CHAT_CONSUMER_MAX_CACHED_ROOMS
+        rooms_ids = set(self.scope['user'].rooms.values_list('pk', flat=True)[:max_rooms + 1])
+
+        if len(rooms_ids) > max_rooms:
+            return None
+
+        return rooms_ids
 
 
 class AdminRoomConsumer(BaseRoomConsumer):
@@ -324,6 +415,7 @@ class AdminRoomConsumer(BaseRoomConsumer):
         elif action in (
                 'leave_room',
                 'get_room_messages',
+                'mark_read',
         ):
             permission_instances += [UserInRoom()]
         elif action in (
@@ -332,6 +424,8 @@ class AdminRoomConsumer(BaseRoomConsumer):
                 'delete_messages',
         ):
             permission_instances += [CanAdminAct()]
+        elif action == 'get_state_size':
+            permission_instances += [IsDebug()]
 
         return permission_instances
 
@@ -347,31 +441,15 @@ class AdminRoomConsumer(BaseRoomConsumer):
                     )
                 )
             elif action_ == 'get_rooms':
-                last_message_in_room = Message.objects.filter(
-                    pk=Subquery(Message.objects.filter(room=OuterRef('room')).order_by('-created_at').values('pk')[:1])
-                ).prefetch_related(
-                    Prefetch(
-                        'attachments',
-                        queryset=MessageAttachment.objects.all(),
-                        to_attr='attachments_objs'
-                    )
-                )
-
                 return Room.objects.prefetch_related(
                     Prefetch(
                         'participants',
                         queryset=User.objects.exclude(pk=self.scope['user'].id).select_related('brand__category'),
                         to_attr='interlocutor_users'
                     ),
-                    Prefetch(
-                        'messages',
-                        queryset=last_message_in_room,
-                        to_attr='last_message'
-                    )
-                ).annotate(
-                    last_message_created_at=Max('messages__created_at')
+                    get_last_message_prefetch()
                 ).order_by(
-                    F('last_message_created_at').desc(nulls_last=True)
+                    F('last_message_at').desc(nulls_last=True), '-id'
                 )
 
         return super().get_queryset(**kwargs)
@@ -382,17 +460,19 @@ class AdminRoomConsumer(BaseRoomConsumer):
         else:
             await self.close()
 
-        self.action_paginators = {}
+        self.action_counts = {}
         self.user_group_name = f'user_{self.scope["user"].pk}'
-        self.admins_pks_set = await self.get_admins_pks_set()
 
         await self.add_group(self.user_group_name)
-        await self.user_activity.subscribe()
+        # admins are notified about events in support rooms through the shared group
+        await self.add_group(ADMINS_GROUP_NAME)
 
     async def disconnect(self, code):
         if hasattr(self, 'user_group_name'):
             await self.remove_group(self.user_group_name)
             delattr(self, 'user_group_name')
 
+        await self.remove_group(ADMINS_GROUP_NAME)
+        await self.leave_room_group()
+
         self.delete_all_paginators()
-        await self.user_activity.unsubscribe()
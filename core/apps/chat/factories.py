@@ -6,7 +6,8 @@ from factory import post_generation
 from factory.django import DjangoModelFactory
 
 from core.apps.accounts.factories import UserFactory
-from core.apps.chat.models import Room, Message, MessageAttachment, RoomFavorites
+from core.apps.chat.models import Room, Message, MessageAttachment, RoomFavorites, RoomReadCursor, MessageChange
+from core.apps.chat.utils import set_room_last_message
 from core.common.factories import factory_sync_to_async
 
 
@@ -81,6 +82,14 @@ class MessageFactory(DjangoModelFactory):
         no_declaration=None
     )
 
+    @post_generation
+    def room_last_message(self, create, extracted, **kwargs):
+        # keep denormalized last message of the room up to date, as consumers do
+        if not create:
+            return
+
+        set_room_last_message(self)
+
 
 MessageAsyncFactory = factory_sync_to_async(MessageFactory)
 
@@ -92,3 +101,37 @@ class RoomFavoritesFactory(DjangoModelFactory):
 
     user = factory.SubFactory(UserFactory)
     room = factory.SubFactory(RoomFactory)
+
+
+class RoomReadCursorFactory(DjangoModelFactory):
+    class Meta:
+        model = RoomReadCursor
+        django_get_or_create = ('user', 'room',)
+
+    user = factory.SubFactory(UserFactory)
+    room = factory.SubFactory(RoomFactory)
+    last_read_message_id = 0
+
+
+RoomReadCursorAsyncFactory = factory_sync_to_async(RoomReadCursorFactory)
+
+
+class MessageChangeFactory(DjangoModelFactory):
+    class Meta:
+        model = MessageChange
+
+    room = factory.SubFactory(RoomFactory)
+    message_id = factory.Sequence(lambda n: n + 1)
+    type = MessageChange.EDITED
+
+    @post_generation
+    def expired(self, create, extracted, **kwargs):
+        """
+        Used to make a change that can't be synced anymore.
+        To make an expired change pass expired=True when calling factory
+        """
+        if not create:
+            return
+
+        if extracted:
+            self.created_at -= settings.CHAT_SYNC_TOKEN_LIFE_TIME
@@ -5,7 +5,6 @@ import jwt
 from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
 from django.conf import settings
-from django.contrib.auth import get_user_model
 from django.utils import timezone
 from rest_framework_simplejwt.utils import datetime_from_epoch
 
@@ -14,9 +13,9 @@ django.setup()
 
 from django.contrib.auth.models import AnonymousUser  # MUST be called after configuring settings
 
-ALGORITHM = "HS256"
+from core.apps.accounts.utils import get_cached_user
 
-User = get_user_model()
+ALGORITHM = "HS256"
 
 
 @database_sync_to_async
@@ -30,9 +29,9 @@ def get_user(token):
     if token_exp <= timezone.now():
         return AnonymousUser()
 
-    try:
-        user = User.objects.get(id=payload['user_id'])
-    except User.DoesNotExist:
+    user = get_cached_user(payload['user_id'])
+
+    if user is None:
         return AnonymousUser()
 
     return user
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_messageattachment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['room', 'created_at'], name='message_room_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='messageattachment',
+            index=models.Index(condition=models.Q(('message__isnull', True)), fields=['created_at'], name='attachment_dangling_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_rooms_last_message(apps, schema_editor):
+    Room = apps.get_model('chat', 'Room')
+    Message = apps.get_model('chat', 'Message')
+
+    last_message = Message.objects.filter(room=models.OuterRef('pk')).order_by('-created_at', '-id')
+
+    Room.objects.update(
+        last_message=models.Subquery(last_message.values('pk')[:1]),
+        last_message_at=models.Subquery(last_message.values('created_at')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_message_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='last_message',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message', verbose_name='Последнее сообщение'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, default=None, null=True, verbose_name='Время последнего сообщения'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(models.OrderBy(models.F('last_message_at'), descending=True, nulls_last=True), models.OrderBy(models.F('id'), descending=True), name='room_last_message_at_idx'),
+        ),
+        migrations.RunPython(fill_rooms_last_message, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-17 01:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_message_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messageattachment',
+            name='user',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='message_attachments', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+    ]
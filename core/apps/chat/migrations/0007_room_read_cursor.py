@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-17 01:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0006_messageattachment_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomReadCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_message_id', models.BigIntegerField(default=0, verbose_name='ID последнего прочитанного сообщения')),
+            ],
+            options={
+                'verbose_name': 'Room Read Cursor',
+                'verbose_name_plural': 'Room Read Cursors',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['room', 'id'], name='message_room_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='roomreadcursor',
+            name='room',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_cursors', to='chat.room', verbose_name='Комната'),
+        ),
+        migrations.AddField(
+            model_name='roomreadcursor',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='room_read_cursors', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddConstraint(
+            model_name='roomreadcursor',
+            constraint=models.UniqueConstraint(fields=('user', 'room'), name='unique_room_read_cursor'),
+        ),
+    ]
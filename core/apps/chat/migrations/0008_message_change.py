@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-17 01:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0007_room_read_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_id', models.BigIntegerField(verbose_name='ID сообщения')),
+                ('type', models.CharField(choices=[('E', 'Edited'), ('D', 'Deleted')], max_length=1, verbose_name='Тип')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='message_changes', to='chat.room', verbose_name='Комната')),
+            ],
+            options={
+                'verbose_name': 'Message Change',
+                'verbose_name_plural': 'Message Changes',
+                'indexes': [models.Index(fields=['room', 'id'], name='message_change_room_id_idx'), models.Index(fields=['created_at'], name='message_change_created_idx')],
+            },
+        ),
+    ]
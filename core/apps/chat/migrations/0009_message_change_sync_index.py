@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0008_message_change'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='messagechange',
+            name='message_change_room_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='messagechange',
+            index=models.Index(fields=['room', 'created_at', 'id'], name='msg_change_room_created_id_idx'),
+        ),
+    ]
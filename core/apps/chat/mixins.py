@@ -2,15 +2,33 @@ from collections.abc import Iterable
 from typing import Set, Any, Optional
 
 from channels.db import database_sync_to_async
+from django.conf import settings
+from django.contrib.postgres.expressions import ArraySubquery
 from django.contrib.auth import get_user_model
 from django.core.paginator import Paginator, InvalidPage
 from django.db import transaction, DatabaseError
-from django.db.models import Model, QuerySet, Prefetch, OuterRef, Subquery
-from djangochannelsrestframework.observer import model_observer
+from django.db.models import Model, QuerySet, Prefetch, Max, Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
 
 from core.common.exceptions import ServerError, BadRequest
-from core.apps.chat.models import Message, Room, MessageAttachment
-from core.apps.chat.utils import _reply_to_groups
+from core.apps.brand.models import Brand
+from core.apps.brand.utils import get_brand_exclusions
+from core.apps.chat.models import Message, Room, MessageChange
+from core.apps.chat.serializers import RoomUpdatedSerializer
+from core.apps.chat.utils import (
+    ADMINS_GROUP_NAME,
+    _reply_to_groups,
+    get_payload,
+    send_to_groups,
+    get_last_message_prefetch,
+    get_retained_size,
+    link_message_attachments,
+    log_message_changes,
+    mark_room_read,
+    set_rooms_unread_count,
+    update_rooms_last_message
+)
 
 User = get_user_model()
 
@@ -34,11 +52,36 @@ class ConsumerUtilitiesMixin:
     A mixin that provides utility functions to the consumer.
     """
 
-    async def edit_message_in_db(self, msg_id: int, edited_text: str) -> int:
+    @database_sync_to_async
+    def create_message_in_db(self, text: str, attachments_ids: Optional[list[int]] = None) -> Message:
+        """
+        Create a message authored by the current user in the current room and link attachments to it.
+        The consumer must have a "room" attribute.
+
+        Takes two queries. The message is returned with linked attachments in 'attachments_objs' attribute,
+        ready for serialization.
+
+        Args:
+            text: text of the message
+            attachments_ids: ids of attachments uploaded by the current user to link to the message
+
+        Returns:
+            Created message
+        """
+        with transaction.atomic():
+            message = Message.objects.create(room=self.room, user=self.scope['user'], text=text)
+            message.attachments_objs = link_message_attachments(message, attachments_ids)
+
+        return message
+
+    @database_sync_to_async
+    def edit_message_in_db(self, msg_id: int, edited_text: str) -> int:
         """
         Edit message text in db. Allows editing only messages authored by the current user.
         The consumer must have a "room" attribute.
 
+        The edit is recorded for chat sync in the same transaction.
+
         Args:
             msg_id: primary key of the message being edited
             edited_text: new text to be set
@@ -50,26 +93,75 @@ class ConsumerUtilitiesMixin:
         """
         # filter uses user = self.scope['user'] to allow editing current user's messages only
         # if the message with id <msg_id> don't belong to the user, then nothing happens
-        return await Message.objects.filter(
-            pk=msg_id, user=self.scope['user'], room=self.room
-        ).aupdate(text=edited_text)
+        with transaction.atomic():
+            updated = Message.objects.filter(
+                pk=msg_id, user=self.scope['user'], room=self.room
+            ).update(text=edited_text)
 
-    async def delete_messages_in_db(self, messages_ids: list[int]) -> int:
+            if updated:
+                log_message_changes(self.room.pk, [msg_id], MessageChange.EDITED)
+
+        return updated
+
+    @database_sync_to_async
+    def delete_messages_in_db(self, messages_ids: list[int]) -> int:
         """
         Delete messages from db. Allows deleting only messages authored by the current user.
         The consumer must have a "room" attribute.
 
+        The last message of the room is recalculated and the deletion is recorded for chat sync
+        in the same transaction.
+
         Args:
             messages_ids: list of ids of message to delete
 
         Returns:
             The number of messages deleted
         """
-        deleted: tuple[int, dict] = await Message.objects.filter(
-            pk__in=messages_ids, user=self.scope['user'], room=self.room
-        ).adelete()
+        with transaction.atomic():
+            messages = Message.objects.filter(pk__in=messages_ids, user=self.scope['user'], room=self.room)
+            deleted_ids = list(messages.values_list('pk', flat=True))
+
+            deleted: tuple[int, dict] = messages.delete()
+
+            if deleted[0]:
+                update_rooms_last_message([self.room.pk])
+                log_message_changes(self.room.pk, deleted_ids, MessageChange.DELETED)
+
         return deleted[0]
 
+    @database_sync_to_async
+    def mark_room_read_in_db(self, message_id: Optional[int] = None) -> dict[str, int]:
+        """
+        Mark messages of the current room as read by the current user up to the message.
+        The consumer must have a "room" attribute.
+
+        Args:
+            message_id: id of the last read message, if not passed, then the last message of the room is used
+
+        Returns:
+            Dictionary with id of the room, id of the last read message and the number of unread messages left
+        """
+        room = Room.objects.filter(pk=self.room.pk).first()
+
+        if room is None:
+            raise NotFound(f'Room with id {self.room.pk} does not exist!')
+
+        if message_id is None:
+            message_id = room.last_message_id or 0
+        elif not room.messages.filter(pk=message_id).exists():
+            raise NotFound(f'Message with id {message_id} does not exist in the room!')
+
+        last_read_message_id = mark_room_read(room, self.scope['user'], message_id)
+
+        set_rooms_unread_count([room], self.scope['user'])
+
+        return {
+            'room_id': room.pk,
+            'last_read_message_id': last_read_message_id,
+            'unread_count': room.unread_count,
+        }
+
     @database_sync_to_async
     def get_or_create_support_room(self) -> tuple[Room, bool]:
         """
@@ -80,16 +172,6 @@ class ConsumerUtilitiesMixin:
         """
         created = False  # whether a new room was created
 
-        last_message_in_room = Message.objects.filter(
-            pk=Subquery(Message.objects.filter(room=OuterRef('room')).order_by('-created_at').values('pk')[:1])
-        ).prefetch_related(
-            Prefetch(
-                'attachments',
-                queryset=MessageAttachment.objects.all(),
-                to_attr='attachments_objs'
-            )
-        )
-
         # expects a queryset with a single support room or an empty one
         support_room_queryset = self.scope['user'].rooms.filter(type=Room.SUPPORT).prefetch_related(
             Prefetch(
@@ -97,11 +179,7 @@ class ConsumerUtilitiesMixin:
                 queryset=User.objects.exclude(pk=self.scope['user'].id).select_related('brand__category'),
                 to_attr='interlocutor_users'
             ),
-            Prefetch(
-                'messages',
-                queryset=last_message_in_room,
-                to_attr='last_message'
-            )
+            get_last_message_prefetch()
         )
 
         # if for some reason there are multiple support rooms, then get the first one
@@ -118,18 +196,72 @@ class ConsumerUtilitiesMixin:
             except DatabaseError:
                 raise ServerError("Room creation failed! Please try again.")
 
+        set_rooms_unread_count([room], self.scope['user'])
+
         return room, created
 
+    @database_sync_to_async
+    def refresh_room_last_message(self, room: Room) -> None:
+        """
+        Reload the last message of the room instance (with attachments in 'attachments_objs' attribute) from db.
+
+        Args:
+            room: instance of the room to refresh
+        """
+        fresh_room = Room.objects.filter(pk=room.pk).prefetch_related(get_last_message_prefetch()).first()
+
+        room.last_message = fresh_room.last_message if fresh_room is not None else None
+        room.last_message_at = fresh_room.last_message_at if fresh_room is not None else None
+
+    @database_sync_to_async
+    def get_user_groups_for_room(self, room: Room) -> Set[str]:
+        """
+        Get a list of user group names to notify about an event in the room.
+        Room instance must have prefetched participants in attribute 'room_participants'.
+
+        Args:
+            room: instance of the room to get groups for
+
+        Returns:
+            List of group names as strings
+        """
+        if room.type != Room.SUPPORT:
+            return {f'user_{user.pk}' for user in room.room_participants}
+
+        # admins receive events of support rooms once through the admins group,
+        # so the number of sends doesn't grow with the number of admins
+        return {f'user_{user.pk}' for user in room.room_participants if not user.is_staff} | {ADMINS_GROUP_NAME}
+
+    @database_sync_to_async
+    def get_room_with_participants(self, room_id):
+        try:
+            room = Room.objects.filter(pk=room_id).prefetch_related(
+                Prefetch(
+                    'participants',
+                    queryset=User.objects.all(),
+                    to_attr='room_participants'
+                )
+            ).get()
+        except Room.DoesNotExist:
+            return None
+
+        return room
+
 
 class ConsumerPaginationMixin:
     """
     A mixin that provides pagination functions to the consumer.
+
+    Only the number of objects is remembered between actions (in 'action_counts' attribute),
+    paginators and querysets are not kept, so that loaded objects are freed after each action.
+    The consumer must set 'action_counts' attribute to an empty dict on connect.
     """
 
     @database_sync_to_async
     def paginate_queryset(self, queryset: QuerySet, per_page: int, action: str, orphans: int = 0) -> Paginator:
         """
-        Paginate a queryset. Remembers resulting paginator for the action to avoid recreating it if one already exists.
+        Paginate a queryset. Objects are counted once for the action and the count is reused by the next pages,
+        so that the number of pages doesn't change while the client scrolls.
 
         Args:
             queryset: the queryset to paginate
@@ -141,11 +273,13 @@ class ConsumerPaginationMixin:
         Returns:
             Paginator instance.
         """
-        paginator = self._get_paginator(action)
+        paginator = Paginator(queryset, per_page, orphans)
+        count = self.action_counts.get(action)
 
-        if paginator is None:
-            paginator = Paginator(queryset, per_page, orphans)
-            self.action_paginators[action] = paginator
+        if count is None:
+            self.action_counts[action] = paginator.count
+        else:
+            paginator.count = count  # count is a cached property, so it is not queried again
 
         return paginator
 
@@ -180,26 +314,74 @@ class ConsumerPaginationMixin:
             'next': next_
         }
 
+    @database_sync_to_async
+    def get_keyset_page(
+            self,
+            queryset: QuerySet,
+            per_page: int,
+            before_id: Optional[int] = None,
+            after_id: Optional[int] = None,
+            around_id: Optional[int] = None
+    ) -> tuple[list, dict[str, bool]]:
+        """
+        Get a page of objects ordered by (created_at, id) descending, positioned by the id of an object.
+
+        Unlike Paginator, doesn't count objects and doesn't use OFFSET,
+        so every page costs the same no matter how deep it is.
+        Expects at most one of before_id, after_id and around_id. If none is passed, returns the latest objects.
+
+        Args:
+            queryset: the queryset to paginate, must have created_at field
+            per_page: the number of objects per page
+            before_id: id of the object to get objects before (older than) it
+            after_id: id of the object to get objects after (newer than) it
+            around_id: id of the object to get it with the objects around it
+
+        Returns:
+            The list of objects on the page (newest first) and pagination info:
+            {'has_more': bool} or, in "around" mode, {'has_more_before': bool, 'has_more_after': bool}
+        """
+        if around_id is not None:
+            cursor = self._get_keyset_cursor(queryset, around_id)
+
+            after_num = per_page // 2
+            before_num = per_page - after_num  # including the object itself
+
+            before = list(self._filter_by_keyset_cursor(queryset, cursor, True, True)[:before_num + 1])
+            after = list(self._filter_by_keyset_cursor(queryset, cursor, False)[:after_num + 1])
+
+            objects = after[:after_num][::-1] + before[:before_num]
+
+            return objects, {'has_more_before': len(before) > before_num, 'has_more_after': len(after) > after_num}
+
+        if after_id is not None:
+            cursor = self._get_keyset_cursor(queryset, after_id)
+            objects = list(self._filter_by_keyset_cursor(queryset, cursor, False)[:per_page + 1])
+
+            return objects[:per_page][::-1], {'has_more': len(objects) > per_page}
+
+        if before_id is not None:
+            cursor = self._get_keyset_cursor(queryset, before_id)
+            queryset = self._filter_by_keyset_cursor(queryset, cursor, True)
+        else:
+            queryset = queryset.order_by('-created_at', '-id')
+
+        objects = list(queryset[:per_page + 1])
+
+        return objects[:per_page], {'has_more': len(objects) > per_page}
+
     def delete_paginator_for_action(self, action: str) -> None:
         """
-        Delete paginator for the specified action.
+        Forget the count of objects for the specified action, the next page will count them again.
         """
-        try:
-            self.action_paginators.pop(action)
-        except KeyError:
-            pass
+        self.action_counts.pop(action, None)
 
     def delete_all_paginators(self) -> None:
         """
-        Delete paginators for all actions of the consumer.
+        Forget the counts of objects for all actions of the consumer.
         """
 
-        self.action_paginators = {}
-
-    def _get_paginator(self, action: str):
-        paginator = self.action_paginators.get(action)
-
-        return paginator
+        self.action_counts = {}
 
     def _get_page(self, paginator: Paginator, page_number: int):
         self._check_page_number(paginator, page_number)
@@ -218,91 +400,39 @@ class ConsumerPaginationMixin:
 
         return next_
 
-    def _check_page_number(self, paginator: Paginator, page_number: int) -> None:
-        if type(page_number) is not int:
-            raise BadRequest('Page number must be an integer!')
-
-        if page_number not in paginator.page_range:
-            raise BadRequest(f'Page {page_number} does not exist!')
-
-
-class ConsumerObserveAdminActivityMixin:
-    """
-    Mixin that observes user activity and maintains the set of all admins' pks.
-
-    Consumer must have "admins_pks_set" attribute. In most cases should be populated during connect method.
-    """
-
-    def __init__(self):
-        self.admins_pks_set = set()
-
-    # WARNING
-    # When using this to decorate a method to avoid the method firing multiple times you should ensure that
-    # if there are multiple @model_observer wrapped methods for the same model type within a single file
-    # that each method HAS A DIFFERENT NAME.
-    # (https://github.com/NilCoalescing/djangochannelsrestframework?tab=readme-ov-file#subscribing-to-all-instances-of-a-model)
-    @model_observer(User)
-    async def user_activity(
-            self,
-            data,
-            action,
-            **kwargs
-    ):
-        if not data:
-            return
+    @staticmethod
+    def _get_keyset_cursor(queryset: QuerySet, pk: Any) -> tuple[Any, int]:
+        if type(pk) is not int:
+            raise BadRequest('Message id must be an integer!')
 
-        if data['is_staff']:
-            if action == 'create':
-                self.admins_pks_set.add(data['pk'])
-            elif action == 'delete':
-                self.admins_pks_set.remove(data['pk'])
+        cursor = queryset.order_by().filter(pk=pk).values_list('created_at', 'pk').first()
 
-    @user_activity.serializer
-    def user_activity(self, instance: User, action, **kwargs):
-        if action == 'update':
-            return
+        if cursor is None:
+            raise NotFound(f'Message with id {pk} does not exist in the room!')
 
-        return {'pk': instance.pk, 'is_staff': instance.is_staff}
+        return cursor
 
-    def get_user_groups_for_room(self, room: Room) -> Set[str]:
+    @staticmethod
+    def _filter_by_keyset_cursor(
+            queryset: QuerySet, cursor: tuple[Any, int], descending: bool, inclusive: bool = False
+    ) -> QuerySet:
         """
-        Get a list of group names for a given room.
-        Room instance must have prefetched participants in attribute 'room_participants'.
-
-        Args:
-            room: instance of the room to get groups for
-
-        Returns:
-            List of group names as strings
+        Get objects that come after the cursor in the (created_at, id) ordering of the given direction.
         """
-        groups = {f'user_{user.pk}' for user in room.room_participants}
-
-        if room.type == Room.SUPPORT:
-            for pk in self.admins_pks_set:
-                groups.add(f'user_{pk}')
+        created_at, pk = cursor
+        lookup = 'lt' if descending else 'gt'
+        pk_lookup = f'{lookup}e' if inclusive else lookup
 
-        return groups
+        return queryset.filter(
+            Q(**{f'created_at__{lookup}': created_at}) | Q(created_at=created_at, **{f'pk__{pk_lookup}': pk})
+        ).order_by(*(('-created_at', '-id') if descending else ('created_at', 'id')))
 
-    @database_sync_to_async
-    def get_room_with_participants(self, room_id):
-        try:
-            room = Room.objects.filter(pk=room_id).prefetch_related(
-                Prefetch(
-                    'participants',
-                    queryset=User.objects.all(),
-                    to_attr='room_participants'
-                )
-            ).get()
-        except Room.DoesNotExist:
-            return None
-
-        return room
-
-    @database_sync_to_async
-    def get_admins_pks_set(self):
-        admin_pks = User.objects.filter(is_staff=True, is_active=True).values_list('pk', flat=True)
+    def _check_page_number(self, paginator: Paginator, page_number: int) -> None:
+        if type(page_number) is not int:
+            raise BadRequest('Page number must be an integer!')
 
-        return set(admin_pks)
+        if page_number not in paginator.page_range:
+            raise BadRequest(f'Page {page_number} does not exist!')
 
 
 class ConsumerReplyToGroupsMixin:
@@ -321,7 +451,7 @@ class ConsumerReplyToGroupsMixin:
             errors: Optional[list[str]] = None,
             status: int = 200,
             request_id: int = None
-    ):
+    ) -> dict[str, BaseException]:
         """
         Sends data to groups in DCRF format.
 
@@ -341,9 +471,12 @@ class ConsumerReplyToGroupsMixin:
             errors: list of errors occurred while handling action
             status: HTTP response status code
             request_id: helps clients link messages they have sent to responses
+
+        Returns:
+            Groups that data failed to be sent to, mapped to the raised exceptions (see send_to_groups)
         """
 
-        await _reply_to_groups(
+        return await _reply_to_groups(
             groups=groups,
             handler_name=self.data_to_groups.__name__,
             channel_layer=self.channel_layer,
@@ -354,5 +487,245 @@ class ConsumerReplyToGroupsMixin:
             request_id=request_id
         )
 
+    async def reply_to_room(
+            self,
+            room: Room,
+            action: str,
+            data: dict[str, Any] = None,
+            errors: Optional[list[str]] = None,
+            status: int = 200,
+            request_id: int = None
+    ) -> dict[str, BaseException]:
+        """
+        Sends data about an event in the room in DCRF format to connections that joined the room.
+
+        Participants of the room that aren't viewing it must be notified with "room_updated" event
+        (see reply_room_updated), connections viewing the room don't receive it.
+
+        Args:
+            room: the room where the event happened
+            action: requested action from the client
+            data: actual data to be sent
+            errors: list of errors occurred while handling action
+            status: HTTP response status code
+            request_id: helps clients link messages they have sent to responses
+
+        Returns:
+            Groups that data failed to be sent to, mapped to the raised exceptions (see send_to_groups)
+        """
+        payload = await get_payload(
+            action=action,
+            data=data,
+            errors=errors,
+            status=status,
+            request_id=request_id,
+        )
+
+        return await send_to_groups(
+            groups=[f'room_{room.pk}'],
+            payload=payload,
+            handler_name=self.data_to_groups.__name__,
+            channel_layer=self.channel_layer
+        )
+
+    async def reply_room_updated(self, room: Room) -> dict[str, BaseException]:
+        """
+        Sends "room_updated" event to participants of the room (and admins, if it is a support room),
+        so that they can update their lists of rooms without requesting them again.
+        For sync code use core.apps.chat.utils.notify_rooms_updated.
+
+        Event is sent once to the group of each user, connections viewing the room skip it,
+        because they receive events of the room itself (see room_updated_to_groups).
+
+        Room instance must have prefetched participants in attribute 'room_participants'
+        and the last message with attachments in 'attachments_objs' attribute.
+
+        Args:
+            room: the room which last message was changed
+
+        Returns:
+            Groups that data failed to be sent to, mapped to the raised exceptions (see send_to_groups)
+        """
+        payload = await get_payload(action='room_updated', data=RoomUpdatedSerializer(room).data)
+
+        return await send_to_groups(
+            groups=await self.get_user_groups_for_room(room),
+            payload=payload,
+            handler_name=self.room_updated_to_groups.__name__,
+            channel_layer=self.channel_layer,
+            room_id=room.pk
+        )
+
     async def data_to_groups(self, event):
         await self.send_json(event['payload'])
+
+    async def room_updated_to_groups(self, event):
+        room = getattr(self, 'room', None)
+
+        # connection viewing the room has received the event of the room itself
+        if room is not None and room.pk == event['room_id']:
+            return
+
+        await self.send_json(event['payload'])
+
+
+class ConsumerPermissionContextMixin:
+    """
+    Mixin that caches data used by permissions for the lifetime of the connection,
+    so that it is not queried again on every action.
+
+    Permission context holds the brand of the user and end date of its active subscription.
+    It is resolved once on connect, together with ids of rooms of the user (see load_connection_bootstrap).
+    Room permission context holds whether the interlocutor in the current room is blacklisted.
+    It is resolved once after joining the room.
+
+    Cached data is reset when it expires (see CHAT_PERMISSION_CONTEXT_TIMEOUT)
+    or when "permissions_changed" event is received from the channel layer
+    (see core.apps.chat.utils.notify_permissions_changed).
+
+    The consumer must be in the "user_{pk}" group to receive events.
+    """
+    permission_context: dict[str, Any] | None = None
+    room_permission_context: dict[str, Any] | None = None
+
+    async def get_permission_context(self) -> dict[str, Any]:
+        """
+        Get cached permission context of the connection or resolve it if it is missing or expired.
+
+        Returns:
+            Dict with the following keys:
+                brand: brand of the user or None if the user doesn't have a brand
+                active_sub_end_date: end date of the active subscription of the brand or None
+        """
+        if self.permission_context is None or self.permission_context['expires_at'] <= timezone.now():
+            self.permission_context = await self._resolve_permission_context()
+
+        return self.permission_context
+
+    async def get_room_permission_context(self) -> dict[str, Any]:
+        """
+        Get cached permission context of the current room or resolve it if it is missing or expired.
+        The consumer must have a "room" attribute.
+
+        Returns:
+            Dict with the following keys:
+                is_blacklisted: whether the current brand blocked the interlocutor or vice versa.
+                                If the interlocutor was deleted, then it is considered as blacklisted.
+        """
+        if self.room_permission_context is None or self.room_permission_context['expires_at'] <= timezone.now():
+            brand = (await self.get_permission_context())['brand']
+            self.room_permission_context = await self._resolve_room_permission_context(brand)
+
+        return self.room_permission_context
+
+    async def load_connection_bootstrap(self) -> set[int] | None:
+        """
+        Load data needed to connect with one query: permission context and ids of rooms of the user.
+        Permission context is cached, so that permissions checked on connect and the consumer don't query it again.
+
+        Returns:
+            Set of ids of rooms of the user or None if the user doesn't have a brand
+            or has more than CHAT_CONSUMER_MAX_CACHED_ROOMS rooms
+        """
+        self.permission_context, rooms_ids = await self._resolve_connection_bootstrap()
+        self.room_permission_context = None
+
+        return rooms_ids
+
+    def reset_permission_context(self) -> None:
+        self.permission_context = None
+        self.room_permission_context = None
+
+    async def permissions_changed(self, event):
+        """
+        Reset cached permissions data when a subscription, blacklist or room participants of the user were changed.
+        """
+        self.reset_permission_context()
+
+        if hasattr(self, 'user_rooms'):
+            # reloaded on demand
+            self.user_rooms = None
+
+    @database_sync_to_async
+    def _resolve_permission_context(self) -> dict[str, Any]:
+        brand = self._get_permission_context_queryset().first()
+
+        return self._make_permission_context(brand)
+
+    @database_sync_to_async
+    def _resolve_connection_bootstrap(self) -> tuple[dict[str, Any], set[int] | None]:
+        max_rooms = settings.CHAT_CONSUMER_MAX_CACHED_ROOMS
+
+        brand = self._get_permission_context_queryset().annotate(
+            rooms_ids=ArraySubquery(
+                Room.participants.through.objects.filter(
+                    user=self.scope['user']
+                ).values('room_id')[:max_rooms + 1]
+            )
+        ).first()
+
+        rooms_ids = set(brand.rooms_ids) if brand is not None else None
+
+        if rooms_ids is not None and len(rooms_ids) > max_rooms:
+            rooms_ids = None
+
+        return self._make_permission_context(brand), rooms_ids
+
+    def _get_permission_context_queryset(self) -> QuerySet[Brand]:
+        return Brand.objects.filter(user=self.scope['user']).annotate(
+            active_sub_end_date=Max(
+                'subscriptions__end_date',
+                filter=Q(subscriptions__is_active=True, subscriptions__end_date__gt=timezone.now())
+            )
+        )
+
+    @staticmethod
+    def _make_permission_context(brand: Brand | None) -> dict[str, Any]:
+        return {
+            'brand': brand,
+            'active_sub_end_date': brand.active_sub_end_date if brand is not None else None,
+            'expires_at': timezone.now() + settings.CHAT_PERMISSION_CONTEXT_TIMEOUT,
+        }
+
+    @database_sync_to_async
+    def _resolve_room_permission_context(self, brand: Brand | None) -> dict[str, Any]:
+        interlocutor_brand_id = Brand.objects.filter(
+            user__rooms=self.room
+        ).exclude(
+            user=self.scope['user']
+        ).values_list('pk', flat=True).first()
+
+        if brand is None or interlocutor_brand_id is None:
+            # If user was deleted, then it cannot be restored, that's why interlocutor is considered as blacklisted
+            is_blacklisted = True
+        else:
+            exclusions = get_brand_exclusions(brand.id)
+            is_blacklisted = interlocutor_brand_id in exclusions['blocked'] + exclusions['blocked_by']
+
+        return {
+            'is_blacklisted': is_blacklisted,
+            'expires_at': timezone.now() + settings.CHAT_PERMISSION_CONTEXT_TIMEOUT,
+        }
+
+
+class ConsumerStateSizeMixin:
+    """
+    Mixin that reports the approximate size of the state kept by the consumer between actions.
+
+    State of a connection must not grow with the number of actions: only the current room,
+    permission contexts, counts of paginated objects and at most CHAT_CONSUMER_MAX_CACHED_ROOMS ids
+    of rooms of the user are kept. Querysets and loaded rooms and messages are not kept.
+    """
+    state_attributes = ('room', 'user_rooms', 'action_counts', 'brand', 'permission_context', 'room_permission_context')
+
+    def measure_state_size(self) -> dict[str, int]:
+        """
+        Get the approximate number of bytes retained by each attribute of the consumer state.
+
+        Returns:
+            Dictionary with the sizes of state attributes and their 'total' size
+        """
+        sizes = {name: get_retained_size(getattr(self, name, None)) for name in self.state_attributes}
+        sizes['total'] = sum(sizes.values())
+
+        return sizes
@@ -25,9 +25,32 @@ class Room(models.Model):
     participants = models.ManyToManyField(to=settings.AUTH_USER_MODEL, related_name='rooms', verbose_name='Участники')
     type = models.CharField(max_length=1, choices=TYPE_CHOICES, default=MATCH, verbose_name='Тип')
 
+    # denormalized last message of the room, maintained by the code that creates and deletes messages
+    # (see core.apps.chat.utils.set_room_last_message and update_rooms_last_message)
+    last_message = models.ForeignKey(
+        to='Message',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        default=None,
+        related_name='+',
+        verbose_name='Последнее сообщение'
+    )
+    last_message_at = models.DateTimeField(
+        blank=True, null=True, default=None, verbose_name='Время последнего сообщения'
+    )
+
     class Meta:
         verbose_name = 'Room'
         verbose_name_plural = 'Rooms'
+        indexes = [
+            # room lists are ordered by the time of the last message
+            models.Index(
+                models.F('last_message_at').desc(nulls_last=True),
+                models.F('id').desc(),
+                name='room_last_message_at_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'Room {self.pk}: {self.get_type_display()}'
@@ -46,6 +69,12 @@ class Message(models.Model):
     class Meta:
         verbose_name = 'Message'
         verbose_name_plural = 'Messages'
+        indexes = [
+            # history of the room is paginated by (created_at, id) keys
+            models.Index(fields=['room', 'created_at', 'id'], name='message_room_created_id_idx'),
+            # unread messages of the room are counted by id after the read cursor
+            models.Index(fields=['room', 'id'], name='message_room_id_idx'),
+        ]
 
     def __str__(self):
         display_text = self.text
@@ -70,12 +99,29 @@ class MessageAttachment(models.Model):
         verbose_name='Сообщение'
     )
 
+    # attachment can be linked only to the messages of the user who uploaded it
+    user = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        default=None,
+        related_name='message_attachments',
+        verbose_name='Пользователь'
+    )
+
     file = models.FileField(upload_to=room_directory_path, verbose_name='Прикрепленный файл')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
 
     class Meta:
         verbose_name = 'Message Attachment'
         verbose_name_plural = 'Message Attachments'
+        indexes = [
+            # dangling attachments (not linked to any message) are looked up by cleanup task
+            models.Index(
+                fields=['created_at'], condition=models.Q(message__isnull=True), name='attachment_dangling_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'Attachment {self.pk} for message {self.message_id}'
@@ -106,3 +152,76 @@ class RoomFavorites(models.Model):
 
     def __repr__(self):
         return f'{self.__class__.__name__}(user_id={self.user_id}, room_id={self.room_id})'
+
+
+class RoomReadCursor(models.Model):
+    """
+    Read state of the room for the user.
+
+    Messages with id greater than the last read one, that were not written by the user, are unread.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='room_read_cursors', verbose_name='Пользователь'
+    )
+
+    room = models.ForeignKey(
+        Room, on_delete=models.CASCADE, related_name='read_cursors', verbose_name='Комната'
+    )
+
+    # not a foreign key, so that the cursor is kept when the last read message is deleted
+    last_read_message_id = models.BigIntegerField(default=0, verbose_name='ID последнего прочитанного сообщения')
+
+    class Meta:
+        verbose_name = 'Room Read Cursor'
+        verbose_name_plural = 'Room Read Cursors'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'room'], name='unique_room_read_cursor'),
+        ]
+
+    def __str__(self):
+        return f'Read cursor of room {self.room_id} for user {self.user_id}'
+
+    def __repr__(self):
+        return (
+            f'{self.__class__.__name__}(user_id={self.user_id}, room_id={self.room_id}, '
+            f'last_read_message_id={self.last_read_message_id})'
+        )
+
+
+class MessageChange(models.Model):
+    """
+    Record about an edited or deleted message, used by clients to sync changes they missed (see chat sync).
+
+    Created messages are not recorded, they are found by ids greater than the ones the client has already seen.
+    Records are removed by a periodic task after CHAT_SYNC_TOKEN_LIFE_TIME.
+    """
+    EDITED = 'E'
+    DELETED = 'D'
+    TYPE_CHOICES = {
+        EDITED: 'Edited',
+        DELETED: 'Deleted',
+    }
+    room = models.ForeignKey(
+        Room, on_delete=models.CASCADE, related_name='message_changes', verbose_name='Комната'
+    )
+
+    # not a foreign key, so that the record is kept when the message is deleted
+    message_id = models.BigIntegerField(verbose_name='ID сообщения')
+    type = models.CharField(max_length=1, choices=TYPE_CHOICES, verbose_name='Тип')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+
+    class Meta:
+        verbose_name = 'Message Change'
+        verbose_name_plural = 'Message Changes'
+        indexes = [
+            # changes of the rooms are synced by (created_at, id) after the ones the client has already seen
+            models.Index(fields=['room', 'created_at', 'id'], name='msg_change_room_created_id_idx'),
+            # old changes are looked up by cleanup task
+            models.Index(fields=['created_at'], name='message_change_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'Message {self.message_id} {self.get_type_display().lower()}'
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(room_id={self.room_id}, message_id={self.message_id}, type="{self.type}")'
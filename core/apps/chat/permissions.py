@@ -1,17 +1,14 @@
 from typing import Dict, Any
 
 from channels.consumer import AsyncConsumer
-from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Q
 from django.utils import timezone
 from djangochannelsrestframework.permissions import IsAuthenticated, BasePermission
 from rest_framework import permissions
 
-from core.apps.blacklist.models import BlackList
-from core.apps.brand.models import Brand, Match
+from core.apps.brand.models import Match
 from core.apps.chat.models import Room
-from core.apps.payments.models import Subscription
 
 User = get_user_model()
 
@@ -27,6 +24,12 @@ class IsAuthenticatedConnect(IsAuthenticated):
 
 
 class IsBrand(BasePermission):
+    """
+    Allow access only to users that have a brand.
+
+    Brand is taken from the permission context of the connection (see ConsumerPermissionContextMixin).
+    """
+
     async def has_permission(
             self, scope: Dict[str, Any], consumer: AsyncConsumer, action: str, **kwargs
     ) -> bool:
@@ -34,7 +37,7 @@ class IsBrand(BasePermission):
         if not type(user) is User:
             return False
 
-        return await Brand.objects.filter(user=user).aexists()
+        return (await consumer.get_permission_context())['brand'] is not None
 
     async def can_connect(
             self, scope: Dict[str, Any], consumer: AsyncConsumer, message=None
@@ -43,27 +46,32 @@ class IsBrand(BasePermission):
         if not type(user) is User:
             return False
 
-        return await Brand.objects.filter(user=user).aexists()
+        return (await consumer.get_permission_context())['brand'] is not None
 
 
 class HasActiveSub(BasePermission):
     """
     Allow access only to users that have an active subscription.
+
+    End date of the subscription is taken from the permission context of the connection
+    (see ConsumerPermissionContextMixin), so access is denied as soon as the subscription expires.
     """
 
     async def has_permission(
             self, scope: Dict[str, Any], consumer: AsyncConsumer, action: str, **kwargs
     ) -> bool:
-        return await Subscription.objects.filter(
-            is_active=True, end_date__gt=timezone.now(), brand__user=scope['user']
-        ).aexists()
+        return await self.is_sub_active(consumer)
 
     async def can_connect(
             self, scope: Dict[str, Any], consumer: AsyncConsumer, message=None
     ) -> bool:
-        return await Subscription.objects.filter(
-            is_active=True, end_date__gt=timezone.now(), brand__user=scope['user']
-        ).aexists()
+        return await self.is_sub_active(consumer)
+
+    @staticmethod
+    async def is_sub_active(consumer: AsyncConsumer) -> bool:
+        end_date = (await consumer.get_permission_context())['active_sub_end_date']
+
+        return end_date is not None and end_date > timezone.now()
 
 
 class IsAdminUser(BasePermission):
@@ -104,9 +112,15 @@ class CanUserJoinRoom(BasePermission):
         room_id = kwargs.get('room_id')
         user_rooms = consumer.user_rooms
 
-        if room_id not in user_rooms:
+        # user rooms are reset when participants of user's rooms are changed
+        if user_rooms is None or room_id not in user_rooms:
             # update user rooms
-            user_rooms = await database_sync_to_async(set)(scope['user'].rooms.values_list('pk', flat=True))
+            user_rooms = await consumer.get_user_rooms_pk_set()
+            consumer.user_rooms = user_rooms
+
+            if user_rooms is None:
+                # user has too many rooms to keep them in the connection
+                return await scope['user'].rooms.filter(pk=room_id).aexists()
 
             # check again
             if room_id not in user_rooms:
@@ -172,6 +186,9 @@ class NotInBlacklist(BasePermission):
 
     If room type is Support, then access will be granted,
     because admins don't have brands and blacklist is inaccessible for them.
+
+    Blacklist status is taken from the room permission context of the connection
+    (see ConsumerPermissionContextMixin).
     """
 
     async def has_permission(
@@ -182,34 +199,13 @@ class NotInBlacklist(BasePermission):
 
         room = consumer.room
 
-        if not hasattr(consumer, 'brand'):
-            return False
-
-        brand = consumer.brand
-
         # support room doesn't have interlocutor, so allow access to it
         if room.type == Room.SUPPORT:
             return True
 
-        try:
-            interlocutor_user = await room.participants.exclude(id=scope['user'].id).aget()
-        except User.DoesNotExist:
-            interlocutor_user = None
-
-        if not interlocutor_user:
-            # If user was deleted, then deny access.
-            # If user already deleted, then it cannot be restored,
-            # that's why access will be denied
-            return False
-
-        interlocutor_brand = await Brand.objects.aget(user=interlocutor_user)
-
         # If current brand blocked interlocutor OR interlocutor blocked current brand,
         # then deny access
-        return not await BlackList.objects.filter(
-            Q(initiator=brand, blocked=interlocutor_brand)
-            | Q(initiator=interlocutor_brand, blocked=brand)
-        ).aexists()
+        return not (await consumer.get_room_permission_context())['is_blacklisted']
 
 
 class CanAdminJoinRoom(BasePermission):
@@ -259,3 +255,14 @@ class IsOwnerOfRoomFavorite(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return obj.user == request.user
+
+
+class IsDebug(BasePermission):
+    """
+    Allow access only if the project runs in debug mode. Used by debug actions.
+    """
+
+    async def has_permission(
+            self, scope: Dict[str, Any], consumer: AsyncConsumer, action: str, **kwargs
+    ) -> bool:
+        return settings.DEBUG
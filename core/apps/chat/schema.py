@@ -2,7 +2,7 @@ from drf_spectacular.extensions import OpenApiViewExtension
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
-from core.apps.brand.utils import get_schema_standard_pagination_parameters
+from core.apps.brand.utils import get_schema_keyset_pagination_parameters
 from core.apps.chat.serializers import RoomFavoritesListSerializer
 
 
@@ -15,7 +15,7 @@ class Fix1(OpenApiViewExtension):
             @extend_schema(
                 description='Get a list of favorite rooms.\n\n'
                             'Authenticated only.',
-                parameters=[] + get_schema_standard_pagination_parameters()
+                parameters=[] + get_schema_keyset_pagination_parameters()
             )
             def list(self, request, *args, **kwargs):
                 return super().list(request, *args, **kwargs)
@@ -69,3 +69,40 @@ class Fix2(OpenApiViewExtension):
             pass
 
         return Fixed
+
+
+class Fix3(OpenApiViewExtension):
+    target_class = 'core.apps.chat.api.ChatSyncView'
+
+    def view_replacement(self):
+        @extend_schema(tags=['Chat'])
+        class Fixed(self.target_class):
+            @extend_schema(
+                description='Get changes in rooms of the user since the sync token was issued. '
+                            'Use to update rooms and messages when the client reconnects.\n\n'
+                            'Without sync_token only a new token is returned. '
+                            'Get it before loading rooms and messages.\n\n'
+                            '\trooms: rooms the user was added to and rooms with new, edited or deleted messages\n\n'
+                            '\tmessages: new and edited messages\n\n'
+                            '\tdeleted_messages_ids: ids of deleted messages\n\n'
+                            '\tsync_token: token to pass with the next sync\n\n'
+                            '\thas_more: if true, sync again with the returned token to get the rest of changes\n\n'
+                            'Messages and deleted ids received by the previous sync may be returned again, '
+                            'replace or skip them by id.\n\n'
+                            'If the token is invalid or expired, 400 is returned. '
+                            'Then rooms and messages must be loaded again.\n\n'
+                            'Authenticated brand with active subscription.',
+                parameters=[
+                    OpenApiParameter(
+                        'sync_token',
+                        OpenApiTypes.STR,
+                        OpenApiParameter.QUERY,
+                        required=False,
+                        description='Token returned by the previous sync'
+                    )
+                ]
+            )
+            def get(self, request, *args, **kwargs):
+                return super().get(request, *args, **kwargs)
+
+        return Fixed
@@ -1,6 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.db import transaction, DatabaseError
-from django.db.models import Prefetch, Subquery, OuterRef, Q, Max, F
+from django.db.models import Prefetch, Q
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
@@ -8,7 +8,12 @@ from core.apps.accounts.serializers import UserSerializer
 from core.apps.brand.serializers import GetShortBrandSerializer
 from core.common.exceptions import ServerError
 from core.apps.chat.models import Room, Message, RoomFavorites, MessageAttachment
-from core.apps.chat.utils import is_attachment_file_size_valid, is_attachment_file_type_valid
+from core.apps.chat.utils import (
+    is_attachment_file_size_valid,
+    is_attachment_file_type_valid,
+    get_last_message_prefetch,
+    set_rooms_unread_count
+)
 
 User = get_user_model()
 
@@ -20,7 +25,7 @@ class UserWithShortBrandSerializer(UserSerializer):
 class MessageAttachmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = MessageAttachment
-        exclude = ['message', 'created_at']
+        exclude = ['message', 'user', 'created_at']
 
 
 class MessageSerializer(serializers.ModelSerializer):
@@ -38,7 +43,7 @@ class MessageSerializer(serializers.ModelSerializer):
 class RoomSerializer(serializers.ModelSerializer):
     class Meta:
         model = Room
-        exclude = ['participants']
+        exclude = ['participants', 'last_message', 'last_message_at']
 
 
 class RoomInterlocutorsMixin(serializers.Serializer):
@@ -60,7 +65,7 @@ class RoomLastMessageMixin(serializers.Serializer):
     @extend_schema_field(MessageSerializer)
     def get_last_message(self, room):
         if room.last_message:
-            return MessageSerializer(room.last_message[0]).data
+            return MessageSerializer(room.last_message).data
 
         return None
 
@@ -70,7 +75,29 @@ class RoomListSerializer(
     RoomInterlocutorsMixin,
     RoomLastMessageMixin
 ):
-    pass
+    # set by core.apps.chat.utils.set_rooms_unread_count
+    unread_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Room
+        exclude = ['participants']
+
+
+class RoomUpdatedSerializer(RoomLastMessageMixin, serializers.ModelSerializer):
+    room_id = serializers.IntegerField(source='pk')
+
+    class Meta:
+        model = Room
+        fields = ['room_id', 'type', 'last_message', 'last_message_at']
+
+
+class ChatSyncSerializer(serializers.Serializer):
+    # see core.apps.chat.utils.get_chat_changes
+    rooms = RoomListSerializer(many=True)
+    messages = MessageSerializer(many=True)
+    deleted_messages_ids = serializers.ListField(child=serializers.IntegerField())
+    sync_token = serializers.CharField()
+    has_more = serializers.BooleanField()
 
 
 class RoomFavoritesListSerializer(serializers.ModelSerializer):
@@ -114,16 +141,6 @@ class RoomFavoritesCreateSerializer(serializers.ModelSerializer):
                 # create RoomFavorites instance
                 instance = RoomFavorites.objects.create(user=user, room=room)
 
-                last_message_in_room = Message.objects.filter(
-                    pk=Subquery(Message.objects.filter(room=OuterRef('room')).order_by('-created_at').values('pk')[:1])
-                ).prefetch_related(
-                    Prefetch(
-                        'attachments',
-                        queryset=MessageAttachment.objects.all(),
-                        to_attr='attachments_objs'
-                    )
-                )
-
                 # get instance's room with prefetched interlocutor and last message for to_representation method
                 room_with_prefetched = Room.objects.filter(pk=room.pk).prefetch_related(
                     Prefetch(
@@ -131,16 +148,9 @@ class RoomFavoritesCreateSerializer(serializers.ModelSerializer):
                         queryset=User.objects.filter(~Q(pk=user.id)).select_related('brand__category'),
                         to_attr='interlocutor_users'
                     ),
-                    Prefetch(
-                        'messages',
-                        queryset=last_message_in_room,
-                        to_attr='last_message'
-                    )
-                ).annotate(
-                    last_message_created_at=Max('messages__created_at')
-                ).order_by(
-                    F('last_message_created_at').desc(nulls_last=True)
+                    get_last_message_prefetch()
                 ).get()
+                set_rooms_unread_count([room_with_prefetched], user)
 
                 # pass room with extra data to to_representation method using context
                 self.context['room_with_prefetched'] = room_with_prefetched
@@ -153,7 +163,7 @@ class RoomFavoritesCreateSerializer(serializers.ModelSerializer):
 class MessageAttachmentCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = MessageAttachment
-        exclude = ['message', 'created_at']
+        exclude = ['message', 'user', 'created_at']
 
     def validate_file(self, file):
         is_valid, max_size_mb = is_attachment_file_size_valid(file)
@@ -169,6 +179,7 @@ class MessageAttachmentCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         file = validated_data.get('file')
 
-        instance = MessageAttachment.objects.create(file=file)
+        # only the user who uploaded the attachment can link it to a message
+        instance = MessageAttachment.objects.create(file=file, user=self.context['request'].user)
 
         return instance
@@ -0,0 +1,39 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.apps.blacklist.models import BlackList
+from core.apps.brand.models import Brand
+from core.apps.chat.models import Room
+from core.apps.chat.utils import notify_permissions_changed
+from core.apps.payments.models import Subscription
+
+
+@receiver(post_save, sender=Subscription, dispatch_uid='notify_permissions_changed_on_subscription_save')
+@receiver(post_delete, sender=Subscription, dispatch_uid='notify_permissions_changed_on_subscription_delete')
+def notify_permissions_changed_on_subscription_change(instance, **kwargs):
+    notify_permissions_changed(Brand.objects.filter(pk=instance.brand_id).values_list('user_id', flat=True))
+
+
+@receiver(post_save, sender=BlackList, dispatch_uid='notify_permissions_changed_on_blacklist_save')
+@receiver(post_delete, sender=BlackList, dispatch_uid='notify_permissions_changed_on_blacklist_delete')
+def notify_permissions_changed_on_blacklist_change(instance, **kwargs):
+    notify_permissions_changed(
+        Brand.objects.filter(pk__in=[instance.initiator_id, instance.blocked_id]).values_list('user_id', flat=True)
+    )
+
+
+@receiver(
+    m2m_changed, sender=Room.participants.through, dispatch_uid='notify_permissions_changed_on_participants_change'
+)
+def notify_permissions_changed_on_participants_change(instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        # instance is a user
+        notify_permissions_changed([instance.pk])
+    elif action == 'pre_clear':
+        # participants are unknown after clear
+        notify_permissions_changed(instance.participants.values_list('pk', flat=True))
+    elif pk_set:
+        notify_permissions_changed(pk_set)
@@ -2,7 +2,7 @@ from celery import shared_task
 from django.conf import settings
 from django.utils import timezone
 
-from core.apps.chat.models import MessageAttachment, Room
+from core.apps.chat.models import MessageAttachment, Room, MessageChange
 
 
 @shared_task
@@ -14,3 +14,10 @@ def message_attachments_cleanup():
 @shared_task
 def empty_rooms_cleanup():
     Room.objects.filter(participants__isnull=True).delete()
+
+
+@shared_task
+def message_changes_cleanup():
+    # changes older than the sync token life time can't be requested anymore
+    life_time_ago = timezone.now() - settings.CHAT_SYNC_TOKEN_LIFE_TIME
+    MessageChange.objects.filter(created_at__lte=life_time_ago).delete()
@@ -1,13 +1,14 @@
 from django.urls import path
 from rest_framework import routers
 
-from core.apps.chat.api import RoomFavoritesViewSet, MessageAttachmentCreateView
+from core.apps.chat.api import RoomFavoritesViewSet, MessageAttachmentCreateView, ChatSyncView
 
 router = routers.DefaultRouter()
 router.register('chat_favorites', RoomFavoritesViewSet, basename='chat_favorites')
 
 urlpatterns = [
-    path('message_attachments/', MessageAttachmentCreateView.as_view(), name='message_attachments')
+    path('message_attachments/', MessageAttachmentCreateView.as_view(), name='message_attachments'),
+    path('chat_sync/', ChatSyncView.as_view(), name='chat_sync'),
 ]
 
 urlpatterns += router.urls
@@ -1,12 +1,38 @@
+import asyncio
+import logging
+import sys
+from collections import defaultdict
 from collections.abc import Iterable
+from datetime import datetime
+from types import FunctionType, ModuleType
 from typing import Any, Optional
 
+from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import transaction
+from django.db.models import Q, Prefetch, OuterRef, Subquery, Count, F, Model
 from django.urls import reverse
+from django.utils import timezone
 
+from core.apps.chat.models import Room, Message, MessageAttachment, RoomReadCursor, MessageChange
+from core.common.exceptions import BadRequest
 from core.common.validators import is_valid_file_type
 
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+# group of connections of all admins, they are notified about events in support rooms
+ADMINS_GROUP_NAME = 'admins'
+
+CHAT_SYNC_TOKEN_SALT = 'chat_sync'
+
+# position of the object in the sync: created_at and id of the last received object
+SyncCursor = tuple[datetime, int]
+
 
 def channels_reverse(viewname, args=None, kwargs=None):
     return reverse(viewname, urlconf=settings.CHANNELS_URLCONF, args=args, kwargs=kwargs)
@@ -37,10 +63,41 @@ async def send_to_groups(
         groups: Iterable[str],
         payload: dict[str, Any],
         handler_name: str,
-        channel_layer
-) -> None:
-    for group in groups:
-        await channel_layer.group_send(group, {'type': handler_name, 'payload': payload})
+        channel_layer,
+        **event_fields
+) -> dict[str, BaseException]:
+    """
+    Send payload to groups concurrently, so that delivery time doesn't grow with the number of groups.
+
+    At most CHAT_GROUP_SEND_CONCURRENCY sends are in progress at the same time.
+    Failure to send to one group doesn't prevent sending to the others.
+
+    Args:
+        groups: list or tuple of group names
+        payload: data to be sent
+        handler_name: name of the consumer method that handles the message
+        channel_layer: channel layer to send with
+        event_fields: additional fields of the event for the handler (not sent to the client)
+
+    Returns:
+        Groups that payload failed to be sent to, mapped to the raised exceptions. Empty if all sends succeeded.
+    """
+    message = {'type': handler_name, 'payload': payload, **event_fields}
+    semaphore = asyncio.Semaphore(settings.CHAT_GROUP_SEND_CONCURRENCY)
+    groups = list(groups)
+
+    async def send(group):
+        async with semaphore:
+            await channel_layer.group_send(group, message)
+
+    results = await asyncio.gather(*(send(group) for group in groups), return_exceptions=True)
+
+    failed = {group: result for group, result in zip(groups, results) if isinstance(result, BaseException)}
+
+    for group, exc in failed.items():
+        logger.warning('Failed to send "%s" to group "%s": %r', handler_name, group, exc)
+
+    return failed
 
 
 async def _reply_to_groups(
@@ -52,7 +109,7 @@ async def _reply_to_groups(
         errors: Optional[list[str]] = None,
         status: int = 200,
         request_id: int = None,
-):
+) -> dict[str, BaseException]:
     if not isinstance(groups, Iterable):
         raise TypeError("'groups' must be an iterable")
 
@@ -67,7 +124,7 @@ async def _reply_to_groups(
         request_id=request_id,
     )
 
-    await send_to_groups(
+    return await send_to_groups(
         groups=groups,
         payload=payload,
         handler_name=handler_name,
@@ -83,7 +140,7 @@ async def reply_to_groups(
         errors: Optional[list[str]] = None,
         status: int = 200,
         request_id: int = None
-) -> None:
+) -> dict[str, BaseException]:
     """
     Sends data to groups in DCRF format. For use outside of consumers.
 
@@ -112,11 +169,14 @@ async def reply_to_groups(
         errors: list of errors occurred while handling action
         status: HTTP response status code
         request_id: helps clients link messages they have sent to responses
+
+    Returns:
+        Groups that data failed to be sent to, mapped to the raised exceptions (see send_to_groups)
     """
 
     channel_layer = get_channel_layer()
 
-    await _reply_to_groups(
+    return await _reply_to_groups(
         groups=groups,
         handler_name=handler_name,
         channel_layer=channel_layer,
@@ -128,6 +188,183 @@ async def reply_to_groups(
     )
 
 
+def notify_permissions_changed(users_ids: Iterable[int]) -> None:
+    """
+    Tell websocket connections of the users to reset cached permissions data
+    (see core.apps.chat.mixins.ConsumerPermissionContextMixin).
+
+    Notification is sent after the current transaction is committed. For use in sync code only.
+
+    Args:
+        users_ids: ids of users whose permissions may have changed
+    """
+    groups = [f'user_{pk}' for pk in users_ids if pk is not None]
+
+    if not groups:
+        return
+
+    def send():
+        channel_layer = get_channel_layer()
+
+        for group in groups:
+            async_to_sync(channel_layer.group_send)(group, {'type': 'permissions_changed'})
+
+    transaction.on_commit(send)
+
+
+def notify_rooms_updated(rooms_ids: Iterable[int]) -> None:
+    """
+    Send "room_updated" event to participants of the rooms (and admins, if it is a support room),
+    so that they can update their lists of rooms without requesting them again.
+    Use when rooms are created or their last messages are changed.
+
+    Notification is sent after the current transaction is committed. For use in sync code only.
+
+    Args:
+        rooms_ids: ids of created or updated rooms
+    """
+    rooms_ids = [pk for pk in rooms_ids if pk is not None]
+
+    if not rooms_ids:
+        return
+
+    def send():
+        from core.apps.chat.serializers import RoomUpdatedSerializer  # serializers depend on this module
+
+        rooms = Room.objects.filter(pk__in=rooms_ids).prefetch_related(get_last_message_prefetch())
+        participants = Room.participants.through.objects.filter(room_id__in=rooms_ids).values_list(
+            'room_id', 'user_id', 'user__is_staff'
+        )
+        rooms_types = {room.pk: room.type for room in rooms}
+
+        groups = defaultdict(set)
+
+        for room_id, user_id, is_staff in participants:
+            # admins receive events of support rooms once through the admins group
+            if not (is_staff and rooms_types.get(room_id) == Room.SUPPORT):
+                groups[room_id].add(f'user_{user_id}')
+
+        channel_layer = get_channel_layer()
+
+        for room in rooms:
+            if room.type == Room.SUPPORT:
+                groups[room.pk].add(ADMINS_GROUP_NAME)
+
+            payload = async_to_sync(get_payload)(action='room_updated', data=RoomUpdatedSerializer(room).data)
+
+            async_to_sync(send_to_groups)(
+                groups[room.pk], payload, 'room_updated_to_groups', channel_layer, room_id=room.pk
+            )
+
+    transaction.on_commit(send)
+
+
+def get_last_message_prefetch(lookup: str = 'last_message') -> Prefetch:
+    """
+    Get prefetch of the last message of rooms with attachments (in 'attachments_objs' attribute).
+
+    Last messages of all rooms are fetched with one query by primary keys stored in the rooms.
+
+    Args:
+        lookup: lookup of the last message field of the room, e.g. 'room__last_message' for RoomFavorites
+
+    Returns:
+        Prefetch object to pass to prefetch_related
+    """
+    return Prefetch(
+        lookup,
+        queryset=Message.objects.prefetch_related(
+            Prefetch(
+                'attachments',
+                queryset=MessageAttachment.objects.all(),
+                to_attr='attachments_objs'
+            )
+        )
+    )
+
+
+def set_room_last_message(message: Message) -> int:
+    """
+    Set newly created message as the last message of its room.
+
+    The room is not updated if it already has a later message
+    (e.g. concurrently created message was saved first).
+
+    Args:
+        message: created message
+
+    Returns:
+        The number of updated rooms (0 or 1)
+    """
+    return Room.objects.filter(
+        Q(last_message_at__isnull=True) | Q(last_message_at__lte=message.created_at),
+        pk=message.room_id
+    ).update(last_message=message, last_message_at=message.created_at)
+
+
+def link_message_attachments(message: Message, attachments_ids: list[int]) -> list[MessageAttachment]:
+    """
+    Link attachments to the newly created message and set the message as the last message of its room.
+
+    Both are done in one query. Only attachments uploaded by the author of the message
+    and not linked to other messages yet are linked, others are ignored.
+    Attachments without the owner (uploaded before owners were recorded) are linked as well,
+    unlinked ones are deleted by the cleanup task after MESSAGE_ATTACHMENT_DANGLING_LIFE_TIME.
+
+    Args:
+        message: created message
+        attachments_ids: ids of attachments to link
+
+    Returns:
+        Linked attachments ordered by id
+    """
+    if not attachments_ids:
+        set_room_last_message(message)
+        return []
+
+    attachments_table = MessageAttachment._meta.db_table
+    rooms_table = Room._meta.db_table
+
+    attachments = MessageAttachment.objects.raw(
+        f"""
+        WITH room AS (
+            UPDATE {rooms_table} SET last_message_id = %(message_id)s, last_message_at = %(created_at)s
+            WHERE id = %(room_id)s AND (last_message_at IS NULL OR last_message_at <= %(created_at)s)
+        )
+        UPDATE {attachments_table} SET message_id = %(message_id)s
+        WHERE id = ANY(%(attachments_ids)s) AND message_id IS NULL AND (user_id = %(user_id)s OR user_id IS NULL)
+        RETURNING *
+        """,
+        {
+            'message_id': message.pk,
+            'created_at': message.created_at,
+            'room_id': message.room_id,
+            'attachments_ids': list(attachments_ids),
+            'user_id': message.user_id,
+        }
+    )
+
+    return sorted(attachments, key=lambda attachment: attachment.pk)
+
+
+def update_rooms_last_message(rooms_ids: Iterable[int]) -> int:
+    """
+    Recalculate the last message of the rooms. Use after deleting messages.
+
+    Args:
+        rooms_ids: ids of rooms to update
+
+    Returns:
+        The number of updated rooms
+    """
+    last_message = Message.objects.filter(room=OuterRef('pk')).order_by('-created_at', '-id')
+
+    return Room.objects.filter(pk__in=rooms_ids).update(
+        last_message=Subquery(last_message.values('pk')[:1]),
+        last_message_at=Subquery(last_message.values('created_at')[:1])
+    )
+
+
 def is_attachment_file_size_valid(file):
     max_size = settings.MESSAGE_ATTACHMENT_MAX_SIZE
     max_size_mb = max_size // 1024 ** 2
@@ -137,3 +374,346 @@ def is_attachment_file_size_valid(file):
 
 def is_attachment_file_type_valid(file):
     return is_valid_file_type(settings.MESSAGE_ATTACHMENT_ALLOWED_MIME_TYPES, file)
+
+
+def set_rooms_unread_count(rooms: Iterable[Room], user: User) -> None:
+    """
+    Set the number of messages unread by the user to 'unread_count' attribute of the rooms.
+
+    Takes two queries no matter how many rooms were passed: read cursors of the user
+    and one indexed count of messages after the cursors. Rooms without new messages are not counted.
+
+    Args:
+        rooms: room instances, e.g. the page of the list of rooms
+        user: user whose unread messages are counted
+    """
+    rooms = list(rooms)
+
+    if not rooms:
+        return
+
+    last_read = dict(
+        RoomReadCursor.objects.filter(user=user, room__in=rooms).values_list('room_id', 'last_read_message_id')
+    )
+
+    condition = Q()
+
+    for room in rooms:
+        room.unread_count = 0
+        last_read_message_id = last_read.get(room.pk, 0)
+
+        if room.last_message_id is not None and room.last_message_id > last_read_message_id:
+            condition |= Q(room_id=room.pk, pk__gt=last_read_message_id)
+
+    if not condition:
+        return
+
+    counts = dict(
+        Message.objects.filter(condition).exclude(user=user).order_by().values('room_id').annotate(
+            count=Count('pk')
+        ).values_list('room_id', 'count')
+    )
+
+    for room in rooms:
+        room.unread_count = counts.get(room.pk, 0)
+
+
+def mark_room_read(room: Room, user: User, message_id: int) -> int:
+    """
+    Move the read cursor of the user in the room forward to the message. The cursor never moves back.
+
+    Args:
+        room: room instance
+        user: user who read the messages
+        message_id: id of the last read message
+
+    Returns:
+        Id of the last read message after the update
+    """
+    cursor, created = RoomReadCursor.objects.get_or_create(
+        user=user, room=room, defaults={'last_read_message_id': message_id}
+    )
+
+    if not created and cursor.last_read_message_id < message_id:
+        # condition protects from moving the cursor back by concurrent requests
+        RoomReadCursor.objects.filter(pk=cursor.pk, last_read_message_id__lt=message_id).update(
+            last_read_message_id=message_id
+        )
+        cursor.last_read_message_id = message_id
+
+    return cursor.last_read_message_id
+
+
+def log_message_changes(room_id: int, messages_ids: Iterable[int], change_type: str) -> list[MessageChange]:
+    """
+    Record that messages of the room were edited or deleted, so that clients can sync these changes later.
+
+    Args:
+        room_id: id of the room of the messages
+        messages_ids: ids of edited or deleted messages
+        change_type: MessageChange.EDITED or MessageChange.DELETED
+
+    Returns:
+        Created records
+    """
+    return MessageChange.objects.bulk_create(
+        MessageChange(room_id=room_id, message_id=message_id, type=change_type) for message_id in messages_ids
+    )
+
+
+def make_chat_sync_token(
+    user: User,
+    rooms_watermark: int,
+    messages_cursor: SyncCursor,
+    changes_cursor: SyncCursor
+) -> str:
+    """
+    Make a signed token that marks the state of the chat already received by the client.
+
+    Args:
+        user: user the token is issued to
+        rooms_watermark: id of the last received participation of the user in rooms
+        messages_cursor: created_at and id of the last received message
+        changes_cursor: created_at and id of the last received edit or deletion of messages (MessageChange)
+
+    Returns:
+        Sync token
+    """
+    return signing.dumps(
+        {
+            'user': user.pk,
+            'rooms': rooms_watermark,
+            'messages': [messages_cursor[0].isoformat(), messages_cursor[1]],
+            'changes': [changes_cursor[0].isoformat(), changes_cursor[1]],
+        },
+        salt=CHAT_SYNC_TOKEN_SALT
+    )
+
+
+def read_chat_sync_token(user: User, sync_token: str) -> dict[str, Any]:
+    """
+    Get watermark and cursors from the sync token (see make_chat_sync_token).
+
+    Args:
+        user: user the token must be issued to
+        sync_token: sync token
+
+    Raises:
+        BadRequest: if the token is invalid, expired or issued to another user
+
+    Returns:
+        Dictionary with 'rooms' watermark, 'messages' and 'changes' cursors
+    """
+    try:
+        payload = signing.loads(sync_token, salt=CHAT_SYNC_TOKEN_SALT, max_age=settings.CHAT_SYNC_TOKEN_LIFE_TIME)
+
+        if payload['user'] != user.pk:
+            raise ValueError
+
+        data = {'rooms': int(payload['rooms'])}
+
+        for key in ('messages', 'changes'):
+            created_at, pk = payload[key]
+            created_at = datetime.fromisoformat(created_at)
+
+            if timezone.is_naive(created_at):
+                raise ValueError
+
+            data[key] = (created_at, int(pk))
+
+        return data
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise BadRequest('Sync token is invalid or expired! Reload rooms and messages.')
+
+
+def _get_after_sync_cursor_condition(cursor: SyncCursor) -> Q:
+    created_at, pk = cursor
+
+    return Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+
+
+def _advance_sync_cursor(cursor: SyncCursor, objects: list[Model], has_more: bool) -> SyncCursor:
+    """
+    Get the cursor of the next sync after the objects ordered by created_at and id were returned.
+
+    Ids and created_at are assigned before the transaction is committed, so an object with a lower created_at
+    may become visible after the returned ones. If all objects were returned, the cursor is moved back
+    by CHAT_SYNC_OVERLAP, so that the next sync returns such objects again with the late ones
+    and the client skips already received ids. Otherwise or if the overlap is disabled, the cursor is moved
+    to the last returned object, so that the next sync returns the rest.
+    """
+    if not objects:
+        return cursor
+
+    last = objects[-1]
+
+    if has_more or not settings.CHAT_SYNC_OVERLAP:
+        return last.created_at, last.pk
+
+    return max(cursor, (last.created_at - settings.CHAT_SYNC_OVERLAP, 0))
+
+
+def get_chat_changes(user: User, sync_token: Optional[str] = None) -> dict[str, Any]:
+    """
+    Get changes in rooms of the user since the sync token was issued. Use when the client reconnects.
+
+    Returns rooms the user was added to, rooms with new, edited or deleted messages
+    (with interlocutors, last message and unread count), new and edited messages (with attachments)
+    and ids of deleted messages. Takes a fixed number of indexed queries.
+
+    At most CHAT_SYNC_MAX_CHANGES new messages and CHAT_SYNC_MAX_CHANGES edits and deletions are returned.
+    If there are more, 'has_more' is True and the next sync with the returned token gets the rest.
+
+    Messages and edits are synced by created_at with an overlap of CHAT_SYNC_OVERLAP
+    (see _advance_sync_cursor), so the same messages and deleted ids may be returned by consecutive syncs,
+    the client must skip or replace already received ones by id.
+
+    Args:
+        user: user whose rooms are synced
+        sync_token: token returned by the previous sync. If not passed, then only the token is returned,
+            get it before loading rooms and messages to sync them later
+
+    Raises:
+        BadRequest: if the token is invalid or expired, then rooms and messages must be loaded again
+
+    Returns:
+        Dictionary with 'rooms', 'messages', 'deleted_messages_ids', 'sync_token' and 'has_more' keys
+    """
+    participations = list(
+        Room.participants.through.objects.filter(user=user).values_list('pk', 'room_id')
+    )
+    rooms_ids = [room_id for _, room_id in participations]
+
+    changes = {
+        'rooms': [],
+        'messages': [],
+        'deleted_messages_ids': [],
+        'has_more': False,
+    }
+
+    if not sync_token:
+        # messages and edits committed late are returned by the first sync as well
+        initial_cursor = (timezone.now() - settings.CHAT_SYNC_OVERLAP, 0)
+        changes['sync_token'] = make_chat_sync_token(
+            user,
+            rooms_watermark=max((pk for pk, _ in participations), default=0),
+            messages_cursor=initial_cursor,
+            changes_cursor=initial_cursor
+        )
+
+        return changes
+
+    token_data = read_chat_sync_token(user, sync_token)
+    max_changes = settings.CHAT_SYNC_MAX_CHANGES
+
+    message_changes = list(
+        MessageChange.objects.filter(
+            _get_after_sync_cursor_condition(token_data['changes']), room_id__in=rooms_ids
+        ).order_by('created_at', 'pk').only('pk', 'created_at', 'room_id', 'message_id', 'type')[:max_changes + 1]
+    )
+    has_more_changes = len(message_changes) > max_changes
+    message_changes = message_changes[:max_changes]
+
+    deleted_ids = {change.message_id for change in message_changes if change.type == MessageChange.DELETED}
+    edited_ids = {
+        change.message_id for change in message_changes if change.type == MessageChange.EDITED
+    } - deleted_ids
+
+    attachments_prefetch = Prefetch(
+        'attachments',
+        queryset=MessageAttachment.objects.all(),
+        to_attr='attachments_objs'
+    )
+
+    new_messages = list(
+        Message.objects.filter(
+            _get_after_sync_cursor_condition(token_data['messages']), room_id__in=rooms_ids
+        ).prefetch_related(attachments_prefetch).order_by('created_at', 'pk')[:max_changes + 1]
+    )
+    has_more_messages = len(new_messages) > max_changes
+    new_messages = new_messages[:max_changes]
+
+    # edited messages are loaded separately, so that the limit of new messages doesn't drop them,
+    # they go first, because they were created before the new ones
+    new_messages_ids = {message.pk for message in new_messages}
+    edited_messages = []
+
+    if edited_ids - new_messages_ids:
+        edited_messages = list(
+            Message.objects.filter(pk__in=edited_ids - new_messages_ids, room_id__in=rooms_ids).prefetch_related(
+                attachments_prefetch
+            ).order_by('created_at', 'pk')
+        )
+
+    messages = edited_messages + new_messages
+
+    rooms_watermark = max((pk for pk, _ in participations), default=token_data['rooms'])
+
+    changed_rooms_ids = {room_id for pk, room_id in participations if pk > token_data['rooms']}
+    changed_rooms_ids.update(message.room_id for message in messages)
+    changed_rooms_ids.update(change.room_id for change in message_changes)
+
+    rooms = []
+
+    if changed_rooms_ids:
+        rooms = list(
+            Room.objects.filter(pk__in=changed_rooms_ids).prefetch_related(
+                Prefetch(
+                    'participants',
+                    queryset=User.objects.exclude(pk=user.pk).select_related('brand__category'),
+                    to_attr='interlocutor_users'
+                ),
+                get_last_message_prefetch()
+            ).order_by(
+                F('last_message_at').desc(nulls_last=True), '-id'
+            )
+        )
+        set_rooms_unread_count(rooms, user)
+
+    changes.update({
+        'rooms': rooms,
+        'messages': messages,
+        'deleted_messages_ids': sorted(deleted_ids),
+        'has_more': has_more_changes or has_more_messages,
+        'sync_token': make_chat_sync_token(
+            user,
+            rooms_watermark=max(rooms_watermark, token_data['rooms']),
+            messages_cursor=_advance_sync_cursor(token_data['messages'], new_messages, has_more_messages),
+            changes_cursor=_advance_sync_cursor(token_data['changes'], message_changes, has_more_changes)
+        ),
+    })
+
+    return changes
+
+
+def get_retained_size(obj: Any, seen: Optional[set[int]] = None) -> int:
+    """
+    Get the approximate number of bytes retained by the object, including objects it refers to
+    (items of containers and attributes of instances, e.g. prefetched objects of model instances).
+
+    Each object is counted once. Classes, modules and functions are not counted.
+
+    Args:
+        obj: object to measure
+        seen: ids of already counted objects, used by recursive calls
+
+    Returns:
+        Size in bytes
+    """
+    if seen is None:
+        seen = set()
+
+    if obj is None or id(obj) in seen or isinstance(obj, (type, ModuleType, FunctionType)):
+        return 0
+
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        size += sum(get_retained_size(key, seen) + get_retained_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(get_retained_size(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += get_retained_size(vars(obj), seen)
+
+    return size
@@ -4,6 +4,8 @@ from django.utils import timezone
 
 from core.apps.payments.forms import GiftPromoCodeAdminForm, SubscriptionAdminForm
 from core.apps.payments.models import Tariff, PromoCode, GiftPromoCode, Subscription
+from core.apps.payments.utils import invalidate_brand_context
+from core.common.cache import invalidate_cache_tags, get_brand_cache_tag
 from core.common.admin import SearchByIdMixin
 
 
@@ -172,7 +174,12 @@ class SubscriptionAdmin(SearchByIdMixin, admin.ModelAdmin):
 
     @admin.action(description='Deactivate selected subscriptions')
     def deactivate(self, request, queryset):
+        brands = set(queryset.values_list('brand_id', 'brand__user_id'))
         count = queryset.update(is_active=False)
+
+        # update doesn't send signals
+        invalidate_brand_context(*[user_id for _, user_id in brands])
+        invalidate_cache_tags(*[get_brand_cache_tag(brand_id) for brand_id, _ in brands])
         self.message_user(
             request,
             f'Deactivated {count} subscriptions!',
@@ -16,6 +16,7 @@ from core.apps.payments.serializers import (
     GiftPromoCodeCreateSerializer,
     GiftPromoCodeActivateSerializer
 )
+from core.apps.payments.utils import get_brand_context
 
 
 class TariffViewSet(
@@ -53,7 +54,7 @@ class TariffViewSet(
 
     @action(detail=False, methods=['patch'], url_name='upgrade')
     def upgrade(self, request, *args, **kwargs):
-        current_sub = request.user.brand.get_active_subscription()
+        current_sub = get_brand_context(request).active_subscription
 
         serializer = self.get_serializer(current_sub, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -71,7 +72,7 @@ class PromocodeRetrieveApiView(generics.RetrieveAPIView):
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
 
-        if instance.is_used_by_brand(request.user.brand):
+        if instance.is_used_by_brand(get_brand_context(request).brand):
             raise serializers.ValidationError('You have already used this promocode!')
 
         serializer = self.get_serializer(instance)
@@ -92,7 +93,7 @@ class GiftPromoCodeViewSet(
     def get_queryset(self):
         if self.action == 'list':
             # return unused and unexpired gift promo codes purchased by the current brand
-            return self.request.user.brand.gifts_as_giver.filter(is_used=False, expires_at__gt=timezone.now())
+            return get_brand_context(self.request).brand.gifts_as_giver.filter(is_used=False, expires_at__gt=timezone.now())
         return super().get_queryset()
 
     def get_permissions(self):
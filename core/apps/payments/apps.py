@@ -7,3 +7,4 @@ class PaymentsConfig(AppConfig):
 
     def ready(self):
         import core.apps.payments.schema
+        import core.apps.payments.signals
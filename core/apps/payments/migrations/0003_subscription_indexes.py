@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brand', '0008_match_indexes'),
+        ('payments', '0002_tariffs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['brand', 'is_active', 'end_date'], name='subscription_brand_active_idx'),
+        ),
+    ]
@@ -65,6 +65,9 @@ class Subscription(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        indexes = [
+            models.Index(fields=['brand', 'is_active', 'end_date'], name='subscription_brand_active_idx'),
+        ]
 
     def __str__(self):
         return f'Subscription: [{self.tariff} expires at {self.end_date.date()}]'
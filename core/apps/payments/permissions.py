@@ -1,13 +1,14 @@
 from django.contrib.auth import get_user_model
-from django.utils import timezone
 from rest_framework import permissions
 
+from core.apps.payments.utils import get_brand_context
+
 User = get_user_model()
 
 
 class CanUpgradeTariff(permissions.BasePermission):
     def has_permission(self, request, view):
-        current_sub = request.user.brand.get_active_subscription(True)
+        current_sub = get_brand_context(request).active_subscription
 
         if current_sub is None:
             return False
@@ -22,7 +23,7 @@ class HasActiveSub(permissions.BasePermission):
     Allow access only to brands that have an active subscription.
     """
     def has_permission(self, request, view):
-        return request.user.brand.get_active_subscription() is not None
+        return get_brand_context(request).has_active_subscription
 
 
 class IsBusinessSub(permissions.BasePermission):
@@ -30,6 +31,6 @@ class IsBusinessSub(permissions.BasePermission):
     Allow access only to brands with business subscription.
     """
     def has_permission(self, request, view):
-        return request.user.brand.subscriptions.filter(
-            is_active=True, end_date__gt=timezone.now(), tariff__name='Business Match'
-        ).exists()
+        current_sub = get_brand_context(request).active_subscription
+
+        return current_sub is not None and current_sub.tariff.name == 'Business Match'
@@ -4,6 +4,7 @@ from django.utils import timezone
 from rest_framework import serializers
 
 from core.apps.payments.models import Tariff, PromoCode, Subscription, GiftPromoCode
+from core.apps.payments.utils import get_brand_context
 from core.common.exceptions import ServerError
 
 
@@ -33,15 +34,13 @@ class TariffSubscribeSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         # check that user doesn't have active subscription
-        if self.context['request'].user.brand.subscriptions.filter(
-                is_active=True, end_date__gt=timezone.now()
-        ).exists():
+        if get_brand_context(self.context['request']).has_active_subscription:
             raise serializers.ValidationError('You already have active subscription!')
 
         return attrs
 
     def create(self, validated_data):
-        brand = self.context['request'].user.brand
+        brand = get_brand_context(self.context['request']).brand
         tariff = validated_data.get('tariff')
         promocode = validated_data.get('promocode')
 
@@ -152,7 +151,7 @@ class GiftPromoCodeCreateSerializer(serializers.ModelSerializer):
         }
 
     def validate(self, attrs):
-        brand = self.context['request'].user.brand
+        brand = get_brand_context(self.context['request']).brand
         tariff = attrs.get('tariff')
         promocode = attrs.get('promocode')
 
@@ -168,7 +167,7 @@ class GiftPromoCodeCreateSerializer(serializers.ModelSerializer):
         tariff = validated_data.get('tariff')
         promocode = validated_data.get('promocode')
 
-        brand = self.context['request'].user.brand
+        brand = get_brand_context(self.context['request']).brand
         expires_at = timezone.now() + relativedelta(months=6)
 
         gift_code = GiftPromoCode.objects.create(
@@ -195,11 +194,11 @@ class GiftPromoCodeActivateSerializer(serializers.ModelSerializer):
         }
 
     def validate(self, attrs):
-        cur_brand = self.context['request'].user.brand
+        brand_context = get_brand_context(self.context['request'])
         gift_promocode = attrs.get('gift_promocode')
 
         # check that cannot use own gift
-        if gift_promocode.giver_id == cur_brand.id:
+        if gift_promocode.giver_id == brand_context.brand_id:
             raise serializers.ValidationError('You cannot use your own gift!')
 
         # check that gift hasn't expired yet
@@ -211,9 +210,7 @@ class GiftPromoCodeActivateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Gift has already been used!')
 
         # check that cannot activate if already has active subscription
-        if cur_brand.subscriptions.filter(
-                is_active=True, end_date__gt=timezone.now()
-        ).exists():
+        if brand_context.has_active_subscription:
             raise serializers.ValidationError('You already have active subscription!')
 
         return attrs
@@ -224,7 +221,7 @@ class GiftPromoCodeActivateSerializer(serializers.ModelSerializer):
 
         try:
             with transaction.atomic():
-                brand = self.context['request'].user.brand
+                brand = get_brand_context(self.context['request']).brand
                 tariff = gift_promocode.tariff
                 tariff_relativedelta = tariff.get_duration_as_relativedelta()
 
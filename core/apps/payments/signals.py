@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.apps.brand.models import Brand
+from core.apps.payments.models import Subscription
+from core.apps.payments.utils import invalidate_brand_context
+from core.common.cache import invalidate_cache_tags, get_brand_cache_tag
+
+
+@receiver(post_save, sender=Subscription, dispatch_uid='invalidate_brand_context_on_subscription_save')
+@receiver(post_delete, sender=Subscription, dispatch_uid='invalidate_brand_context_on_subscription_delete')
+def invalidate_brand_context_on_subscription_change(instance, **kwargs):
+    invalidate_brand_context(*Brand.objects.filter(pk=instance.brand_id).values_list('user_id', flat=True))
+    invalidate_cache_tags(get_brand_cache_tag(instance.brand_id))
+
+
+@receiver(post_save, sender=Brand, dispatch_uid='invalidate_brand_context_on_brand_save')
+@receiver(post_delete, sender=Brand, dispatch_uid='invalidate_brand_context_on_brand_delete')
+def invalidate_brand_context_on_brand_change(instance, **kwargs):
+    # user may get or lose the brand
+    invalidate_brand_context(instance.user_id)
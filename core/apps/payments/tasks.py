@@ -1,9 +1,20 @@
 from celery import shared_task
+from django.db import transaction
 from django.utils import timezone
 
 from core.apps.payments.models import Subscription
+from core.apps.payments.utils import invalidate_brand_context
+from core.common.cache import invalidate_cache_tags, get_brand_cache_tag
 
 
 @shared_task
 def deactivate_expired_subscriptions():
-    Subscription.objects.filter(is_active=True, end_date__lte=timezone.now()).update(is_active=False)
+    expired = Subscription.objects.filter(is_active=True, end_date__lte=timezone.now())
+
+    with transaction.atomic():
+        # update doesn't send signals, so cached brand contexts and tags of brands are invalidated here
+        brands = set(expired.values_list('brand_id', 'brand__user_id'))
+        expired.update(is_active=False)
+
+        invalidate_brand_context(*[user_id for _, user_id in brands])
+        invalidate_cache_tags(*[get_brand_cache_tag(brand_id) for brand_id, _ in brands])
@@ -0,0 +1,140 @@
+from datetime import datetime
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import FilteredRelation, Q, F
+from django.utils import timezone
+
+from core.apps.brand.models import Brand
+from core.apps.payments.models import Subscription
+
+User = get_user_model()
+
+# marks attributes of the brand context that haven't been loaded yet, None is a valid loaded value
+_NOT_LOADED = object()
+
+
+def get_brand_context_cache_key(user_id: Any) -> str:
+    return f'brand_context_{user_id}'
+
+
+class BrandContext:
+    """
+    Brand of the user of the request and its active subscription.
+
+    Loaded once per request (see get_brand_context) and shared by permissions, views and serializers.
+    Id of the brand and end date of its active subscription are cached between requests for
+    BRAND_CONTEXT_CACHE_TIMEOUT seconds (see invalidate_brand_context), so checks that need only them
+    don't query the database. Brand is loaded on demand in one query with its active subscription and tariff.
+    """
+
+    def __init__(self, user: User):
+        self.user = user
+        self._brand = _NOT_LOADED
+        self._active_subscription = _NOT_LOADED
+        self._state = None
+
+    @property
+    def brand(self) -> Brand | None:
+        if self._brand is _NOT_LOADED:
+            self._load()
+
+        return self._brand
+
+    @property
+    def brand_id(self) -> int | None:
+        return self._get_state()['brand_id']
+
+    @property
+    def active_sub_end_date(self) -> datetime | None:
+        return self._get_state()['active_sub_end_date']
+
+    @property
+    def has_active_subscription(self) -> bool:
+        end_date = self.active_sub_end_date
+
+        return end_date is not None and end_date > timezone.now()
+
+    @property
+    def active_subscription(self) -> Subscription | None:
+        """
+        Active subscription of the brand with prefetched tariff or None.
+        """
+        if self._active_subscription is _NOT_LOADED:
+            if not self.has_active_subscription:
+                return None
+
+            self._load()
+
+        return self._active_subscription
+
+    def _get_state(self) -> dict[str, Any]:
+        if self._state is None and self.user.is_authenticated:
+            self._state = cache.get(get_brand_context_cache_key(self.user.pk))
+
+        if self._state is None:
+            self._load()
+
+        return self._state
+
+    def _load(self) -> None:
+        brand = None
+
+        if self.user.is_authenticated:
+            brand = Brand.objects.filter(user=self.user).annotate(
+                active_sub=FilteredRelation(
+                    'subscriptions',
+                    condition=Q(subscriptions__is_active=True, subscriptions__end_date__gt=timezone.now())
+                )
+            ).select_related('active_sub__tariff').order_by(F('active_sub__id').desc(nulls_last=True)).first()
+
+            # user.brand won't query the brand again, absent brand is cached as well, so hasattr(user, 'brand') is False
+            Brand._meta.get_field('user').remote_field.set_cached_value(self.user, brand)
+
+        # annotation isn't set if brand doesn't have an active subscription
+        active_subscription = getattr(brand, 'active_sub', None)
+
+        self._brand = brand
+        self._active_subscription = active_subscription
+        self._state = {
+            'brand_id': brand.id if brand is not None else None,
+            'active_sub_end_date': active_subscription.end_date if active_subscription is not None else None,
+        }
+
+        if self.user.is_authenticated:
+            cache.set(get_brand_context_cache_key(self.user.pk), self._state, settings.BRAND_CONTEXT_CACHE_TIMEOUT)
+
+
+def get_brand_context(request) -> BrandContext:
+    """
+    Get brand context of the request. Context is created on the first call and reused by the following ones.
+
+    Args:
+        request: request, user of which is the owner of the brand
+    """
+    brand_context = getattr(request, 'brand_context', None)
+
+    if brand_context is None or brand_context.user is not request.user:
+        brand_context = BrandContext(request.user)
+        request.brand_context = brand_context
+
+    return brand_context
+
+
+def invalidate_brand_context(*users_ids: Any) -> None:
+    """
+    Delete cached brand contexts of the users (see BrandContext).
+
+    Cache is deleted immediately and once again after the transaction is committed,
+    so that contexts cached by concurrent requests before the commit are not left stale.
+    """
+    cache_keys = [get_brand_context_cache_key(user_id) for user_id in users_ids if user_id is not None]
+
+    if not cache_keys:
+        return
+
+    cache.delete_many(cache_keys)
+    transaction.on_commit(lambda: cache.delete_many(cache_keys))
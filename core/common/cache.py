@@ -0,0 +1,148 @@
+import uuid
+from typing import Any, Callable
+
+from django.core.cache import cache
+from django.db import transaction
+
+# tag of the cached answer choices of the questionnaire (categories, tags, formats, goals)
+QUESTIONNAIRE_CACHE_TAG = 'questionnaire'
+# tag of the cached published articles
+ARTICLES_CACHE_TAG = 'articles'
+
+
+def get_brand_cache_tag(brand_id: int) -> str:
+    """
+    Get tag of the values cached for the brand. Tag is invalidated when the brand, its matches,
+    blacklist entities or subscriptions are changed.
+    """
+    return f'brand:{brand_id}'
+
+
+def get_cache_tag_key(tag: str) -> str:
+    return f'cache_tag_{tag}'
+
+
+def get_tagged_cache(key: str, tags: list[str]) -> Any:
+    """
+    Get the value cached with set_tagged_cache.
+
+    Args:
+        key: cache key of the value
+        tags: tags the value was cached with
+
+    Returns:
+        Cached value or None if it isn't cached or one of its tags was invalidated since it was cached.
+        None values are not distinguished from missing ones, so they shouldn't be cached.
+    """
+    tags_keys = [get_cache_tag_key(tag) for tag in tags]
+    cached = cache.get_many([key, *tags_keys])
+
+    return _get_valid_value(cached.get(key), cached)
+
+
+def set_tagged_cache(key: str, value: Any, tags: list[str], timeout: int | None = None) -> None:
+    """
+    Cache the value under the tags, so that it is dropped when any of the tags is invalidated
+    (see invalidate_cache_tags).
+
+    Args:
+        key: cache key of the value
+        value: value to cache
+        tags: tags of the value
+        timeout: number of seconds the value is cached for, None to cache forever
+    """
+    versions = _get_tags_versions(tags)
+
+    if versions is not None:
+        cache.set(key, (versions, value), timeout)
+
+
+def get_or_set_tagged_cache(key: str, tags: list[str], default: Callable[[], Any], timeout: int | None = None):
+    """
+    Get the cached value or compute and cache it under the tags (see set_tagged_cache).
+
+    Versions of the tags are read before the value is computed, so if a tag is invalidated
+    while the value is being computed, the value cached with the old version is not returned afterward.
+
+    Args:
+        key: cache key of the value
+        tags: tags of the value
+        default: function that computes the value
+        timeout: number of seconds the value is cached for, None to cache forever
+
+    Returns:
+        Cached or computed value.
+    """
+    tags_keys = [get_cache_tag_key(tag) for tag in tags]
+    cached = cache.get_many([key, *tags_keys])
+
+    value = _get_valid_value(cached.get(key), cached)
+
+    if value is not None:
+        return value
+
+    versions = _get_tags_versions(tags, cached)
+    value = default()
+
+    if versions is not None:
+        cache.set(key, (versions, value), timeout)
+
+    return value
+
+
+def invalidate_cache_tags(*tags: str) -> None:
+    """
+    Invalidate values cached under the tags.
+
+    Versions of the tags are deleted immediately and once again after the transaction is committed,
+    so that values cached by concurrent requests before the commit are not left stale.
+    """
+    tags_keys = [get_cache_tag_key(tag) for tag in set(tags)]
+
+    if not tags_keys:
+        return
+
+    cache.delete_many(tags_keys)
+    transaction.on_commit(lambda: cache.delete_many(tags_keys))
+
+
+def _get_valid_value(entry: tuple[dict[str, str], Any] | None, cached_versions: dict[str, str]) -> Any:
+    if entry is None:
+        return None
+
+    versions, value = entry
+
+    for tag_key, version in versions.items():
+        if cached_versions.get(tag_key) != version:
+            return None
+
+    return value
+
+
+def _get_tags_versions(tags: list[str], cached_versions: dict[str, str] | None = None) -> dict[str, str] | None:
+    """
+    Get versions of the tags by keys of the tags, create missing versions.
+
+    Returns None if versions cannot be stored (e.g. cache is disabled), values must not be cached then,
+    otherwise they won't be invalidated with the tags.
+    """
+    tags_keys = [get_cache_tag_key(tag) for tag in tags]
+
+    if cached_versions is None:
+        cached_versions = cache.get_many(tags_keys)
+
+    versions = {tag_key: cached_versions[tag_key] for tag_key in tags_keys if tag_key in cached_versions}
+    missing_tags_keys = [tag_key for tag_key in tags_keys if tag_key not in versions]
+
+    if missing_tags_keys:
+        # version is unique, so values cached with an invalidated version never become valid again,
+        # add keeps the version created by a concurrent request
+        for tag_key in missing_tags_keys:
+            cache.add(tag_key, uuid.uuid4().hex, None)
+
+        versions.update(cache.get_many(missing_tags_keys))
+
+    if len(versions) != len(tags_keys):
+        return None
+
+    return versions
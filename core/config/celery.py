@@ -34,5 +34,13 @@ app.conf.beat_schedule = {
     'empty_rooms_cleanup': {
         'task': 'core.apps.chat.tasks.empty_rooms_cleanup',
         'schedule': timedelta(days=1)
+    },
+    'message_changes_cleanup': {
+        'task': 'core.apps.chat.tasks.message_changes_cleanup',
+        'schedule': timedelta(days=1)
+    },
+    'update_brand_daily_stats': {
+        'task': 'core.apps.brand.tasks.update_brand_daily_stats',
+        'schedule': timedelta(hours=1)
     }
 }
@@ -145,7 +145,7 @@ AUTHENTICATION_BACKENDS = (
 # DRF
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.apps.accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -224,6 +224,30 @@ else:
         },
     }
 
+# cache
+# cached values are not rolled back with test transactions, so caching is disabled in tests
+if 'test' in sys.argv:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": f"redis://{os.getenv('REDIS_HOST')}:{os.getenv('REDIS_PORT')}/1",
+        }
+    }
+
+# how long users resolved by JWT authentication are cached (in seconds),
+# cache is invalidated on change, but users cached by other processes are kept until the timeout
+AUTH_USER_CACHE_TIMEOUT = 10
+# max number of users cached by each process, 0 disables the process cache (like CACHES, it is disabled in tests)
+AUTH_USER_CACHE_LOCAL_MAX_SIZE = 0 if 'test' in sys.argv else 1024
+# whether users are cached in the shared cache (CACHES) as well
+AUTH_USER_CACHE_SHARED = True
+
 # Use console backend in development,
 # otherwise use SMTP backend (default)
 if DEBUG:
@@ -249,6 +273,9 @@ RABBITMQ_PORT = os.getenv('RABBITMQ_PORT')
 
 # celery
 CELERY_BROKER_URL = f'amqp://{RABBITMQ_USER}:{RABBITMQ_PASS}@{RABBITMQ_HOST}:{RABBITMQ_PORT}'
+# there is no broker in tests, tasks scheduled by signals are executed in the calling process
+if 'test' in sys.argv:
+    CELERY_TASK_ALWAYS_EAGER = True
 
 # TinyMCE
 TINYMCE_EXTRA_MEDIA = {
@@ -328,8 +355,52 @@ ALLOWED_AUDIO_MIME_TYPES = [
     'audio/x-ogg', 'audio/opus'
 ]
 
+# brand app
+# "sql" - read precomputed recommendations from the database
+# "vectorized" - score brands in memory (see core/apps/brand/recommendations.py)
+BRAND_RECOMMENDATIONS_ENGINE = os.getenv('BRAND_RECOMMENDATIONS_ENGINE', 'sql')
+# how long a scheduled recalculation of stored brand recommendations prevents scheduling another one
+# for the same brand (in seconds), limits the delay if the task is lost
+BRAND_RECOMMENDATIONS_REFRESH_TIMEOUT = 60 * 10
+# how often the vectorized engine reloads all brands from the database
+BRAND_RECOMMENDATIONS_VECTORIZED_RELOAD_INTERVAL = timedelta(minutes=5)
+# how long a snapshot of recommended brands is kept for paging through it (in seconds)
+BRAND_RECOMMENDATIONS_SNAPSHOT_TTL = 60 * 30
+# number of last complete days recalculated by the statistics rollup task
+BRAND_DAILY_STATS_RECALCULATED_DAYS = 2
+# max number of brands that can be liked with one request
+BRAND_BATCH_LIKE_MAX_TARGETS = 100
+# number of attempts to like brands if a concurrent like of the same brands was created
+BRAND_LIKE_ATTEMPTS = 3
+# how long ids of liked, matched and blocked brands are cached (in seconds), cache is invalidated on change anyway
+BRAND_EXCLUSIONS_CACHE_TIMEOUT = 60 * 60 * 24
+# how long id of the brand of a user and end date of its active subscription are cached (in seconds),
+# cache is invalidated on change anyway
+BRAND_CONTEXT_CACHE_TIMEOUT = 60 * 5
+# how long answer choices of the questionnaire are cached (in seconds), cache is invalidated on change anyway
+QUESTIONNAIRE_CHOICES_CACHE_TIMEOUT = 60 * 60 * 24
+
 # chat app
 # how much time an unlinked (message=None) attachment should stay on the server
 MESSAGE_ATTACHMENT_DANGLING_LIFE_TIME = timedelta(minutes=10)
 MESSAGE_ATTACHMENT_MAX_SIZE = 5242880  # 5Mb
 MESSAGE_ATTACHMENT_ALLOWED_MIME_TYPES = ALLOWED_IMAGE_MIME_TYPES + ALLOWED_VIDEO_MIME_TYPES + ALLOWED_AUDIO_MIME_TYPES
+# how long data used by permissions is cached by a websocket connection,
+# it is reset on change anyway, this is a safety net in case a change event was lost
+CHAT_PERMISSION_CONTEXT_TIMEOUT = timedelta(minutes=5)
+# max number of concurrent group sends when broadcasting a chat message
+CHAT_GROUP_SEND_CONCURRENCY = 50
+# max number of ids of user's rooms kept by a websocket connection,
+# access to rooms of users with more rooms is checked by a query
+CHAT_CONSUMER_MAX_CACHED_ROOMS = 1000
+# how long a sync token of the chat is valid and edits and deletions of messages are kept for sync
+CHAT_SYNC_TOKEN_LIFE_TIME = timedelta(days=7)
+# max number of messages and max number of edits and deletions returned by one chat sync
+CHAT_SYNC_MAX_CHANGES = 500
+# how far back a chat sync returns messages, edits and deletions again, so that the ones committed later
+# than newer ones are not missed, must be longer than the longest transaction that writes messages
+CHAT_SYNC_OVERLAP = timedelta(minutes=1)
+
+# articles app
+# how long responses with published articles are cached (in seconds), cache is invalidated on change anyway
+ARTICLES_CACHE_TIMEOUT = 60 * 60
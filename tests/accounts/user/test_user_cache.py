@@ -0,0 +1,143 @@
+from django.core.cache import cache
+from django.test import override_settings, Client
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.apps.accounts.factories import UserFactory
+from core.apps.accounts.utils import get_cached_user, invalidate_cached_user
+from tests.mixins import AssertNumQueriesLessThanMixin
+from tests.utils import LOCMEM_CACHES
+
+
+@override_settings(AUTH_USER_CACHE_LOCAL_MAX_SIZE=2, CACHES=LOCMEM_CACHES)
+class UserCacheTestCase(APITestCase, AssertNumQueriesLessThanMixin):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.url = reverse('users-me')
+
+    def setUp(self):
+        cache.clear()
+        invalidate_cached_user(self.user.pk)
+
+    def get_auth_client(self, user):
+        client = self.client_class()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+        return client
+
+    def test_get_cached_user(self):
+        user = get_cached_user(self.user.pk)
+
+        with self.assertNumQueries(0):
+            cached_user = get_cached_user(self.user.pk)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(cached_user, self.user)
+
+        # every call returns a copy, so that changes are not shared
+        self.assertIsNot(user, cached_user)
+
+    def test_get_cached_user_does_not_exist(self):
+        self.assertIsNone(get_cached_user(0))
+
+    def test_get_cached_user_invalidated_on_save(self):
+        get_cached_user(self.user.pk)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertFalse(get_cached_user(self.user.pk).is_active)
+
+    def test_get_cached_user_invalidated_on_delete(self):
+        user = UserFactory()
+        user_id = user.pk
+
+        get_cached_user(user_id)
+        user.delete()
+
+        self.assertIsNone(get_cached_user(user_id))
+
+    def test_get_cached_user_least_recently_used_evicted(self):
+        user2, user3 = UserFactory.create_batch(2)
+
+        with override_settings(AUTH_USER_CACHE_SHARED=False):
+            for user in (self.user, user2, self.user, user3):
+                get_cached_user(user.pk)
+
+            # user2 was evicted, because the process cache holds only two users
+            with self.assertNumQueries(0):
+                get_cached_user(self.user.pk)
+                get_cached_user(user3.pk)
+
+            with self.assertNumQueries(1):
+                get_cached_user(user2.pk)
+
+    @override_settings(AUTH_USER_CACHE_LOCAL_MAX_SIZE=0)
+    def test_get_cached_user_from_shared_cache(self):
+        get_cached_user(self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_user(self.user.pk), self.user)
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=0, AUTH_USER_CACHE_SHARED=False)
+    def test_get_cached_user_expired(self):
+        get_cached_user(self.user.pk)
+
+        with self.assertNumQueries(1):
+            get_cached_user(self.user.pk)
+
+    def test_authentication_uses_cached_user(self):
+        client = self.get_auth_client(self.user)
+
+        client.get(self.url)
+
+        # only the brand of the user is queried by the view
+        with self.assertNumQueries(1):
+            response = client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.user.pk)
+
+    def test_authentication_inactive_user(self):
+        client = self.get_auth_client(self.user)
+
+        client.get(self.url)
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_authentication_user_deactivated_by_admin(self):
+        user = UserFactory()
+        client = self.get_auth_client(user)
+
+        client.get(self.url)
+
+        # admin actions update users without signals
+        admin_client = Client()
+        admin_client.force_login(UserFactory(admin=True))
+        admin_client.post(
+            reverse('admin:accounts_user_changelist'),
+            {'action': 'deactivate_users', '_selected_action': [user.pk]}
+        )
+
+        response = client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_authentication_deleted_user(self):
+        user = UserFactory()
+        client = self.get_auth_client(user)
+
+        client.get(self.url)
+        user.delete()
+
+        response = client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,4 +1,6 @@
 import factory
+from django.core.cache import cache
+from django.test import override_settings, Client
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -7,6 +9,7 @@ from core.apps.accounts.factories import UserFactory
 from core.apps.articles.factories import NewsArticleFactory
 from core.apps.brand.factories import BrandShortFactory
 from tests.factories import APIClientFactory
+from tests.utils import LOCMEM_CACHES
 
 
 class NewsArticleListTestCase(APITestCase):
@@ -50,3 +53,75 @@ class NewsArticleListTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['id'], self.published_news_article.id)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NewsArticleListCacheTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory(has_sub=True)
+        cls.auth_client = APIClientFactory(user=cls.user)
+
+        cls.news_article = NewsArticleFactory(is_published=True)
+
+        cls.url = reverse('news_articles-list')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_news_article_list_cached(self):
+        response = self.auth_client.get(self.url)
+
+        # both the brand context and the articles are cached
+        with self.assertNumQueries(0):
+            cached_response = self.auth_client.get(self.url)
+
+        self.assertEqual(cached_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_response.data, response.data)
+
+    def test_news_article_list_cache_invalidated_on_change(self):
+        self.auth_client.get(self.url)
+
+        new_article = NewsArticleFactory(is_published=True)
+
+        response = self.auth_client.get(self.url)
+
+        self.assertEqual(len(response.data), 2)
+
+        new_article.is_published = False
+        new_article.save()
+
+        response = self.auth_client.get(self.url)
+
+        self.assertEqual([article['id'] for article in response.data], [self.news_article.id])
+
+    def test_news_article_list_cache_invalidated_on_admin_action(self):
+        self.auth_client.get(self.url)
+
+        # admin actions update articles without signals
+        admin_client = Client()
+        admin_client.force_login(UserFactory(admin=True))
+        admin_client.post(
+            reverse('admin:articles_newsarticle_changelist'),
+            {'action': 'unpublish', '_selected_action': [self.news_article.id]}
+        )
+
+        response = self.auth_client.get(self.url)
+
+        self.assertEqual(response.data, [])
+
+        admin_client.post(
+            reverse('admin:articles_newsarticle_changelist'),
+            {'action': 'publish', '_selected_action': [self.news_article.id]}
+        )
+
+        response = self.auth_client.get(self.url)
+
+        self.assertEqual([article['id'] for article in response.data], [self.news_article.id])
+
+    def test_news_article_list_cached_permissions_checked(self):
+        self.auth_client.get(self.url)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,161 @@
+import factory
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.apps.accounts.factories import UserFactory
+from core.apps.blacklist.factories import BlackListFactory
+from core.apps.brand.factories import BrandShortFactory, MatchFactory
+from core.apps.brand.models import Match
+from core.apps.chat.models import Room
+from tests.factories import APIClientFactory
+from tests.mixins import AssertNumQueriesLessThanMixin
+
+
+class BrandBatchLikeTestCase(
+    APITestCase,
+    AssertNumQueriesLessThanMixin
+):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1, cls.user2 = UserFactory.create_batch(2)
+        cls.auth_client1, cls.auth_client2 = APIClientFactory.create_batch(
+            2, user=factory.Iterator([cls.user1, cls.user2])
+        )
+        cls.brand1, cls.brand2 = BrandShortFactory.create_batch(
+            2, user=factory.Iterator([cls.user1, cls.user2]), has_sub=True
+        )
+
+        cls.url = reverse('brand-batch_like')
+
+    def get_results(self, response) -> dict[int, dict]:
+        return {result['target']: result for result in response.data['results']}
+
+    def test_batch_like_unauthenticated_not_allowed(self):
+        response = self.client.post(self.url, {'targets': [self.brand2.id]})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_batch_like_wo_brand_not_allowed(self):
+        user_wo_brand = UserFactory()
+        auth_client_wo_brand = APIClientFactory(user=user_wo_brand)
+
+        response = auth_client_wo_brand.post(self.url, {'targets': [self.brand2.id]})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_batch_like_wo_active_sub_not_allowed(self):
+        user_wo_active_sub = UserFactory()
+        client_wo_active_sub = APIClientFactory(user=user_wo_active_sub)
+
+        BrandShortFactory(user=user_wo_active_sub)
+
+        response = client_wo_active_sub.post(self.url, {'targets': [self.brand1.id]})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_batch_like_empty_targets(self):
+        response = self.auth_client1.post(self.url, {'targets': []}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_like(self):
+        brands = BrandShortFactory.create_batch(3)
+
+        response = self.auth_client1.post(self.url, {'targets': [brand.id for brand in brands]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # results are in the order of targets
+        self.assertEqual([result['target'] for result in response.data['results']], [brand.id for brand in brands])
+
+        for result in response.data['results']:
+            self.assertEqual(result['status'], 'liked')
+            self.assertIsNone(result['detail'])
+            self.assertFalse(result['match']['is_match'])
+            self.assertTrue(Match.objects.filter(pk=result['match']['id'], initiator=self.brand1).exists())
+
+        self.assertEqual(Match.objects.filter(initiator=self.brand1, is_match=False).count(), 3)
+
+    def test_batch_like_duplicate_targets(self):
+        response = self.auth_client1.post(self.url, {'targets': [self.brand2.id, self.brand2.id]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(Match.objects.count(), 1)
+
+    def test_batch_like_each_other_leads_to_match(self):
+        brand3 = BrandShortFactory()
+
+        MatchFactory(like=True, initiator=self.brand2, target=self.brand1)  # brand2 likes brand1
+        instant_coop = MatchFactory(instant_coop=True, initiator=brand3, target=self.brand1)  # brand3 instant coop
+
+        response = self.auth_client1.post(self.url, {'targets': [self.brand2.id, brand3.id]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results = self.get_results(response)
+
+        for target_id in (self.brand2.id, brand3.id):
+            self.assertEqual(results[target_id]['status'], 'matched')
+            self.assertTrue(results[target_id]['match']['is_match'])
+            self.assertIsNotNone(results[target_id]['match']['match_at'])
+
+        # check that matches don't create other instances in db and only update the old ones
+        self.assertEqual(Match.objects.count(), 2)
+        self.assertEqual(Match.objects.filter(is_match=True).count(), 2)
+
+        # check that room was created for the like
+        room = Room.objects.prefetch_related('participants').get(pk=results[self.brand2.id]['match']['room'])
+
+        self.assertEqual(room.type, Room.MATCH)
+        self.assertEqual(set(room.participants.all()), {self.user1, self.user2})
+
+        # check that instant room became a match room
+        self.assertEqual(results[brand3.id]['match']['room'], instant_coop.room_id)
+        self.assertEqual(Room.objects.get(pk=instant_coop.room_id).type, Room.MATCH)
+
+    def test_batch_like_invalid_targets(self):
+        blocked_by, blocked, liked, matched = BrandShortFactory.create_batch(4)
+
+        BlackListFactory(initiator=blocked_by, blocked=self.brand1)
+        BlackListFactory(initiator=self.brand1, blocked=blocked)
+        MatchFactory(like=True, initiator=self.brand1, target=liked)
+        match = MatchFactory(initiator=matched, target=self.brand1)
+
+        targets = [self.brand1.id, 0, blocked_by.id, blocked.id, liked.id, matched.id, self.brand2.id]
+
+        response = self.auth_client1.post(self.url, {'targets': targets}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results = self.get_results(response)
+
+        # invalid targets don't prevent others from being liked
+        self.assertEqual(results[self.brand2.id]['status'], 'liked')
+
+        for target_id in targets[:-1]:
+            self.assertEqual(results[target_id]['status'], 'error')
+            self.assertIsNone(results[target_id]['match'])
+            self.assertIsNotNone(results[target_id]['detail'])
+
+        self.assertIn(str(match.room_id), results[matched.id]['detail'])
+
+        # only like of brand2 was created
+        self.assertEqual(Match.objects.count(), 3)
+
+    def test_batch_like_number_of_queries(self):
+        targets = BrandShortFactory.create_batch(10)
+        reciprocal = BrandShortFactory.create_batch(10)
+
+        MatchFactory.create_batch(10, like=True, initiator=factory.Iterator(reciprocal), target=self.brand1)
+
+        # number of queries doesn't depend on the number of targets
+        with self.assertNumQueriesLessThan(20):
+            response = self.auth_client1.post(
+                self.url, {'targets': [brand.id for brand in targets + reciprocal]}, format='json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Match.objects.filter(initiator=self.brand1).count(), 10)
+        self.assertEqual(Match.objects.filter(target=self.brand1, is_match=True).count(), 10)
@@ -1,7 +1,12 @@
+import threading
+from unittest.mock import patch
+
 import factory
+from django.db import connection
+from django.test import tag
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase, APIClient
 
 from core.apps.accounts.factories import UserFactory
 from core.apps.blacklist.factories import BlackListFactory
@@ -105,6 +110,18 @@ class BrandLikeTestCase(APITestCase):
         self.assertTrue(self.brand1.user in room.participants.all())
         self.assertTrue(self.brand2.user in room.participants.all())
 
+    @patch('core.apps.brand.utils.notify_permissions_changed')
+    def test_like_each_other_notifies_participants_about_new_room(self, mock_notify_permissions_changed):
+        MatchFactory(like=True, initiator=self.brand1, target=self.brand2)  # brand1 likes brand2
+        response = self.auth_client2.post(self.url, {'target': self.brand1.id})  # brand2 likes brand1 MATCH
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # participants are added to the room without m2m_changed signal,
+        # so open connections are told to reload the rooms they have access to explicitly
+        mock_notify_permissions_changed.assert_called_once()
+        self.assertEqual(set(mock_notify_permissions_changed.call_args.args[0]), {self.user1.pk, self.user2.pk})
+
     def test_cannot_like_after_match(self):
         MatchFactory(initiator=self.brand1, target=self.brand2)  # brand1 has match with brand2
 
@@ -132,3 +149,69 @@ class BrandLikeTestCase(APITestCase):
         # check that room type was changed to MATCH
         room = Room.objects.get(id=room_id)
         self.assertEqual(room.type, Room.MATCH)
+
+
+@tag('slow')
+class BrandLikeConcurrencyTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user1, self.user2 = UserFactory.create_batch(2)
+        self.auth_client1, self.auth_client2 = APIClientFactory.create_batch(
+            2, user=factory.Iterator([self.user1, self.user2])
+        )
+        self.brand1, self.brand2 = BrandShortFactory.create_batch(
+            2, user=factory.Iterator([self.user1, self.user2]), has_sub=True
+        )
+
+        self.url = reverse('brand-like')
+
+    def like_concurrently(self, requests: list[tuple[APIClient, int]]) -> list[int]:
+        """
+        Send like requests at the same time, each one in its own thread (and database connection).
+
+        Returns:
+            List of status codes of responses in the order of requests.
+        """
+        barrier = threading.Barrier(len(requests))
+        status_codes = [None] * len(requests)
+
+        def like(i, client, target_id):
+            try:
+                barrier.wait()
+                status_codes[i] = client.post(self.url, {'target': target_id}).status_code
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=like, args=(i, client, target_id))
+            for i, (client, target_id) in enumerate(requests)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        return status_codes
+
+    def test_like_each_other_concurrently_leads_to_match(self):
+        status_codes = self.like_concurrently([
+            (self.auth_client1, self.brand2.id), (self.auth_client2, self.brand1.id)
+        ])
+
+        self.assertEqual(status_codes, [status.HTTP_201_CREATED, status.HTTP_201_CREATED])
+
+        # check that there is exactly one match with a room
+        match = Match.objects.get()
+
+        self.assertTrue(match.is_match)
+        self.assertIsNotNone(match.room_id)
+        self.assertEqual(Room.objects.count(), 1)
+
+    def test_like_same_brand_concurrently(self):
+        status_codes = self.like_concurrently([
+            (self.auth_client1, self.brand2.id), (self.auth_client1, self.brand2.id)
+        ])
+
+        self.assertEqual(sorted(status_codes), [status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST])
+        self.assertEqual(Match.objects.filter(initiator=self.brand1, target=self.brand2, is_match=False).count(), 1)
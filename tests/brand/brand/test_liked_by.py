@@ -1,4 +1,6 @@
 import factory
+from django.core.cache import cache
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -8,6 +10,7 @@ from core.apps.blacklist.factories import BlackListFactory
 from core.apps.brand.factories import BrandShortFactory, MatchFactory
 from tests.factories import APIClientFactory
 from tests.mixins import AssertNumQueriesLessThanMixin
+from tests.utils import LOCMEM_CACHES
 
 
 class LikedByTestCase(
@@ -97,12 +100,16 @@ class LikedByTestCase(
         # results must exclude both blocked brands and brands that blocked the current one
         self.assertEqual(len(results), 0)
 
+    @override_settings(CACHES=LOCMEM_CACHES)
     def test_liked_by_number_of_queries(self):
         # brand2 likes brand1 and brand3 likes brand1
         MatchFactory.create_batch(
             2, like=True, initiator=factory.Iterator([self.brand2, self.brand3]), target=self.brand1
         )
 
+        cache.clear()
+        self.auth_client1.get(self.url)  # ids of liked, matched and blocked brands are cached on the first request
+
         with self.assertNumQueriesLessThan(3, verbose=True):
             response = self.auth_client1.get(self.url)
 
@@ -1,16 +1,21 @@
+from datetime import timedelta
+
 import factory
-from django.test import tag
+from django.core.cache import cache
+from django.test import tag, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from core.apps.accounts.factories import UserFactory
 from core.apps.blacklist.factories import BlackListFactory
 from core.apps.brand.factories import BrandShortFactory, MatchFactory
-from core.apps.brand.models import Brand
+from core.apps.brand.models import Brand, Match
 from core.apps.payments.factories import SubscriptionFactory
 from tests.factories import APIClientFactory
 from tests.mixins import AssertNumQueriesLessThanMixin
+from tests.utils import LOCMEM_CACHES
 
 
 class BrandMyLikesTestCase(
@@ -104,7 +109,7 @@ class BrandMyLikesTestCase(
 
     def test_my_likes_includes_only_likes_of_current_brand(self):
         MatchFactory(like=True, initiator=self.brand1, target=self.brand2)  # brand1 likes brand2
-        MatchFactory(like=True, initiator=self.brand2, target=self.brand1)  # brand2 likes brand1
+        MatchFactory(like=True, initiator=self.brand2, target=self.brand3)  # brand2 likes brand3
 
         response = self.auth_client1.get(self.url)
 
@@ -152,12 +157,16 @@ class BrandMyLikesTestCase(
         self.assertEqual(len(response.data['results']), 2)
 
     @tag('slow')
+    @override_settings(CACHES=LOCMEM_CACHES)
     def test_my_likes_number_of_queries(self):
         brand = self.create_n_likes(50)
         client = APIClientFactory(user=brand.user)
 
         SubscriptionFactory(brand=brand)
 
+        cache.clear()
+        client.get(self.url)  # ids of liked, matched and blocked brands are cached on the first request
+
         with self.assertNumQueriesLessThan(6, verbose=True):
             response = client.get(self.url)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -176,3 +185,82 @@ class BrandMyLikesTestCase(
 
         self.assertEqual(results[0]['id'], self.brand3.id)
         self.assertEqual(results[1]['id'], self.brand2.id)
+
+    def test_my_likes_cursor_pagination(self):
+        brand = self.create_n_likes(5)
+        client = APIClientFactory(user=brand.user)
+
+        SubscriptionFactory(brand=brand)
+
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        all_ids = [result['id'] for result in response.data['results']]
+        self.assertIsNone(response.data['next'])
+
+        # go through all pages using "next" links
+        pages_ids = []
+        next_ = f'{self.url}?page_size=2'
+
+        while next_ is not None:
+            response = client.get(next_)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            pages_ids.append([result['id'] for result in response.data['results']])
+            next_ = response.data['next']
+
+        self.assertEqual(pages_ids, [all_ids[:2], all_ids[2:4], all_ids[4:]])
+
+    def test_my_likes_cursor_pagination_within_one_millisecond(self):
+        brand = self.create_n_likes(4)
+        client = APIClientFactory(user=brand.user)
+
+        SubscriptionFactory(brand=brand)
+
+        # likes differ only in microseconds, page break is inside one millisecond
+        like_at = timezone.now().replace(microsecond=123000)
+
+        for i, match in enumerate(Match.objects.filter(initiator=brand).order_by('pk')):
+            Match.objects.filter(pk=match.pk).update(like_at=like_at + timedelta(microseconds=100 * i))
+
+        pages_ids = []
+        next_ = f'{self.url}?page_size=2'
+
+        while next_ is not None:
+            response = client.get(next_)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            pages_ids.append([result['id'] for result in response.data['results']])
+            next_ = response.data['next']
+
+        expected_ids = list(
+            Match.objects.filter(initiator=brand).order_by('-like_at', '-target_id').values_list('target_id', flat=True)
+        )
+
+        self.assertEqual(pages_ids, [expected_ids[:2], expected_ids[2:]])
+
+    def test_my_likes_with_count(self):
+        brand = self.create_n_likes(3)
+        client = APIClientFactory(user=brand.user)
+
+        SubscriptionFactory(brand=brand)
+
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+
+        response = client.get(self.url, {'page_size': 1, 'with_count': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertTrue(response.data['count_is_exact'])
+
+    def test_my_likes_page_number_not_supported(self):
+        response = self.auth_client1.get(self.url, {'page': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('page', response.data)
+
+    def test_my_likes_invalid_cursor(self):
+        response = self.auth_client1.get(self.url, {'cursor': 'invalid'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
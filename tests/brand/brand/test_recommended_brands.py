@@ -1,4 +1,9 @@
+from datetime import timedelta
+
 import factory
+from django.core.cache import cache
+from django.db.models import Q
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -13,9 +18,12 @@ from core.apps.brand.factories import (
     CategoryFactory,
     MatchFactory
 )
+from core.apps.brand.models import BrandRecommendation, Brand
+from core.apps.brand.recommendations import vectorized_engine, VectorizedRecommendationEngine
 from core.apps.cities.factories import CityFactory
 from tests.factories import APIClientFactory
 from tests.mixins import AssertNumQueriesLessThanMixin
+from tests.utils import LOCMEM_CACHES
 
 
 class BrandRecommendedBrandsTestCase(
@@ -40,90 +48,92 @@ class BrandRecommendedBrandsTestCase(
         cls.initial_goals = GoalFactory.create_batch(3)
         cls.initial_categories_of_interest = CategoryFactory.create_batch(3)
 
-        cls.initial_brand = BrandShortFactory(
-            user=cls.user1,
-            tags=cls.initial_tags,
-            formats=cls.initial_formats,
-            goals=cls.initial_goals,
-            categories_of_interest=cls.initial_categories_of_interest,
-            has_sub=True
-        )
+        # recommendations are stored after the transaction is committed
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.initial_brand = BrandShortFactory(
+                user=cls.user1,
+                tags=cls.initial_tags,
+                formats=cls.initial_formats,
+                goals=cls.initial_goals,
+                categories_of_interest=cls.initial_categories_of_interest,
+                has_sub=True
+            )
 
-        cls.initial_subs_count = cls.initial_brand.subs_count
-        cls.initial_avg_bill = cls.initial_brand.avg_bill
-
-        # priority1
-        # everything matches
-        cls.brand1 = BrandShortFactory(
-            user=cls.user2,
-            category=factory.Iterator(cls.initial_categories_of_interest),
-            tags=cls.initial_tags[:2],
-            formats=cls.initial_formats[:2],
-            goals=cls.initial_goals[:2],
-            subs_count=cls.initial_subs_count,
-            avg_bill=cls.initial_avg_bill,
-        )
+            cls.initial_subs_count = cls.initial_brand.subs_count
+            cls.initial_avg_bill = cls.initial_brand.avg_bill
+
+            # priority1
+            # everything matches
+            cls.brand1 = BrandShortFactory(
+                user=cls.user2,
+                category=factory.Iterator(cls.initial_categories_of_interest),
+                tags=cls.initial_tags[:2],
+                formats=cls.initial_formats[:2],
+                goals=cls.initial_goals[:2],
+                subs_count=cls.initial_subs_count,
+                avg_bill=cls.initial_avg_bill,
+            )
 
-        # priority2
-        # subs_count don't match
-        cls.brand2 = BrandShortFactory(
-            user=cls.user3,
-            category=factory.Iterator(cls.initial_categories_of_interest),
-            tags=[*cls.initial_tags, TagFactory()],
-            formats=[*cls.initial_formats, FormatFactory()],
-            goals=[*cls.initial_goals, GoalFactory()],
-            avg_bill=cls.initial_avg_bill,
-        )
+            # priority2
+            # subs_count don't match
+            cls.brand2 = BrandShortFactory(
+                user=cls.user3,
+                category=factory.Iterator(cls.initial_categories_of_interest),
+                tags=[*cls.initial_tags, TagFactory()],
+                formats=[*cls.initial_formats, FormatFactory()],
+                goals=[*cls.initial_goals, GoalFactory()],
+                avg_bill=cls.initial_avg_bill,
+            )
 
-        # priority3
-        # subs_count and avg_bill don't match
-        cls.brand3 = BrandShortFactory(
-            user=cls.user4,
-            category=factory.Iterator(cls.initial_categories_of_interest),
-            tags=cls.initial_tags[:2],
-            formats=cls.initial_formats[:2],
-            goals=cls.initial_goals[:2],
-        )
+            # priority3
+            # subs_count and avg_bill don't match
+            cls.brand3 = BrandShortFactory(
+                user=cls.user4,
+                category=factory.Iterator(cls.initial_categories_of_interest),
+                tags=cls.initial_tags[:2],
+                formats=cls.initial_formats[:2],
+                goals=cls.initial_goals[:2],
+            )
 
-        # priority4
-        # subs_count, avg_bill and goals don't match
-        cls.brand4 = BrandShortFactory(
-            user=cls.user5,
-            category=factory.Iterator(cls.initial_categories_of_interest),
-            tags=cls.initial_tags[:2],
-            formats=cls.initial_formats[:2],
-            goals=GoalFactory.create_batch(3),
-        )
+            # priority4
+            # subs_count, avg_bill and goals don't match
+            cls.brand4 = BrandShortFactory(
+                user=cls.user5,
+                category=factory.Iterator(cls.initial_categories_of_interest),
+                tags=cls.initial_tags[:2],
+                formats=cls.initial_formats[:2],
+                goals=GoalFactory.create_batch(3),
+            )
 
-        # priority5
-        # subs_count, avg_bill, goals and tags don't match
-        cls.brand5 = BrandShortFactory(
-            user=cls.user6,
-            category=factory.Iterator(cls.initial_categories_of_interest),
-            tags=TagFactory.create_batch(3),
-            formats=cls.initial_formats[:2],
-            goals=GoalFactory.create_batch(3),
-        )
+            # priority5
+            # subs_count, avg_bill, goals and tags don't match
+            cls.brand5 = BrandShortFactory(
+                user=cls.user6,
+                category=factory.Iterator(cls.initial_categories_of_interest),
+                tags=TagFactory.create_batch(3),
+                formats=cls.initial_formats[:2],
+                goals=GoalFactory.create_batch(3),
+            )
 
-        # priority6
-        # subs_count, avg_bill, goals, tags and category don't match
-        cls.brand6 = BrandShortFactory(
-            user=cls.user7,
-            category=CategoryFactory(),
-            tags=TagFactory.create_batch(3),
-            formats=cls.initial_formats[:2],
-            goals=GoalFactory.create_batch(3),
-        )
+            # priority6
+            # subs_count, avg_bill, goals, tags and category don't match
+            cls.brand6 = BrandShortFactory(
+                user=cls.user7,
+                category=CategoryFactory(),
+                tags=TagFactory.create_batch(3),
+                formats=cls.initial_formats[:2],
+                goals=GoalFactory.create_batch(3),
+            )
 
-        # priority7
-        # subs_count, avg_bill, goals, tags, category and formats don't match
-        cls.brand7 = BrandShortFactory(
-            user=cls.user8,
-            category=CategoryFactory(),
-            tags=TagFactory.create_batch(3),
-            formats=FormatFactory.create_batch(3),
-            goals=GoalFactory.create_batch(3),
-        )
+            # priority7
+            # subs_count, avg_bill, goals, tags, category and formats don't match
+            cls.brand7 = BrandShortFactory(
+                user=cls.user8,
+                category=CategoryFactory(),
+                tags=TagFactory.create_batch(3),
+                formats=FormatFactory.create_batch(3),
+                goals=GoalFactory.create_batch(3),
+            )
 
         cls.recommended_brands = [getattr(cls, f'brand{i}') for i in range(1, 8)]
         cls.recommended_brands_num = len(cls.recommended_brands)
@@ -288,6 +298,105 @@ class BrandRecommendedBrandsTestCase(
 
             self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_recommended_brands_cursor_pagination(self):
+        response = self.auth_client1.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        all_ids = [brand['id'] for brand in response.data['results']]
+
+        # go through all pages using "next" links
+        pages_ids = []
+        next_ = f'{self.url}?page_size=2'
+
+        while next_ is not None:
+            response = self.auth_client1.get(next_)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            pages_ids.extend(brand['id'] for brand in response.data['results'])
+            next_ = response.data['next']
+
+        self.assertEqual(pages_ids, all_ids)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_recommended_brands_snapshot(self):
+        cache.clear()
+
+        response = self.auth_client1.get(self.url, {'page_size': 3, 'snapshot': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        snapshot = response.data['snapshot']
+        self.assertIn(f'snapshot={snapshot}', response.data['next'])
+
+        first_page_ids = [brand['id'] for brand in response.data['results']]
+        self.assertEqual(first_page_ids, [self.brand1.id, self.brand2.id, self.brand3.id])
+
+        # brand7 moves to priority 4 right after brand4, but next pages are taken from the snapshot
+        self.brand7.category = self.initial_categories_of_interest[0]
+        self.brand7.save()
+        self.brand7.formats.set(self.initial_formats[:1])
+        self.brand7.tags.set(self.initial_tags[:1])
+
+        response = self.auth_client1.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['snapshot'], snapshot)
+
+        second_page_ids = [brand['id'] for brand in response.data['results']]
+        self.assertEqual(second_page_ids, [self.brand4.id, self.brand5.id, self.brand6.id])
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_recommended_brands_snapshot_with_other_filters(self):
+        cache.clear()
+
+        response = self.auth_client1.get(self.url, {'page_size': 3, 'snapshot': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        snapshot = response.data['snapshot']
+        category = self.initial_categories_of_interest[0]
+
+        # filters are changed, but the token of the snapshot built without filters is passed
+        response = self.auth_client1.get(self.url, {'snapshot': snapshot, 'category': category.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # a new snapshot is built for the new filters
+        self.assertIsNotNone(response.data['snapshot'])
+        self.assertNotEqual(response.data['snapshot'], snapshot)
+
+        ids = [brand['id'] for brand in response.data['results']]
+        self.assertTrue(ids)
+        self.assertFalse(Brand.objects.filter(pk__in=ids).exclude(category=category).exists())
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_recommended_brands_wo_snapshot_mode(self):
+        cache.clear()
+
+        response = self.auth_client1.get(self.url, {'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # snapshot is built only on request
+        self.assertIsNone(response.data['snapshot'])
+        self.assertNotIn('snapshot=', response.data['next'])
+
+        # next pages are taken from the current recommendations
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand7.category = self.initial_categories_of_interest[0]
+            self.brand7.save()
+            self.brand7.formats.set(self.initial_formats[:1])
+            self.brand7.tags.set(self.initial_tags[:1])
+
+        response = self.auth_client1.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['snapshot'])
+
+        second_page_ids = [brand['id'] for brand in response.data['results']]
+        self.assertEqual(second_page_ids, [self.brand4.id, self.brand7.id, self.brand5.id])
+
+    def test_recommended_brands_expired_snapshot(self):
+        response = self.auth_client1.get(self.url, {'snapshot': 'expired'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), self.recommended_brands_num)
+        self.assertNotEqual(response.data['snapshot'], 'expired')
+
     def test_recommended_brands_exclude_current_brand(self):
         response = self.auth_client1.get(self.url)
 
@@ -306,3 +415,138 @@ class BrandRecommendedBrandsTestCase(
 
         # results must exclude both blocked brands and brands that blocked the current one
         self.assertEqual(len(results), self.recommended_brands_num - 2)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_recommended_brands_cached_exclusions_are_updated(self):
+        cache.clear()
+        self.auth_client1.get(self.url)  # cache ids of liked, matched and blocked brands
+
+        MatchFactory(like=True, initiator=self.initial_brand, target=self.brand1)  # initial brand likes brand1
+        BlackListFactory(initiator=self.brand2, blocked=self.initial_brand)  # brand2 blocks initial brand
+
+        response = self.auth_client1.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results_ids = {brand['id'] for brand in response.data['results']}
+
+        self.assertNotIn(self.brand1.id, results_ids)
+        self.assertNotIn(self.brand2.id, results_ids)
+
+    def test_recommended_brands_questionnaire_update(self):
+        self.auth_client1.get(self.url)  # make sure changes are picked up after recommendations were calculated
+
+        # brand7 gets the same formats as the initial brand, so it moves from priority 7 to priority 6
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand7.formats.set(self.initial_formats)
+
+        response = self.auth_client1.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results_ids = [brand['id'] for brand in response.data['results']]
+
+        self.assertEqual(results_ids, [
+            self.brand1.id, self.brand2.id, self.brand3.id, self.brand4.id, self.brand5.id, self.brand7.id,
+            self.brand6.id
+        ])
+
+    def test_recommended_brands_current_brand_questionnaire_update(self):
+        self.auth_client1.get(self.url)  # make sure changes are picked up after recommendations were calculated
+
+        # nobody shares formats with the initial brand anymore, so all brands have the last priority
+        self.initial_brand.formats.clear()
+
+        response = self.auth_client1.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results_ids = [brand['id'] for brand in response.data['results']]
+
+        self.assertEqual(results_ids, sorted(brand.id for brand in self.recommended_brands))
+
+    def test_recommendations_are_stored_for_common_formats_only(self):
+        recommended_ids = set(
+            BrandRecommendation.objects.filter(brand=self.initial_brand).values_list('recommended_id', flat=True)
+        )
+
+        # brand7 doesn't have common formats with the initial brand
+        self.assertEqual(recommended_ids, {getattr(self, f'brand{i}').id for i in range(1, 7)})
+
+    def test_recommendations_removed_on_brand_deletion(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand1.user = None
+            self.brand1.save()
+
+        self.assertFalse(
+            BrandRecommendation.objects.filter(Q(brand=self.brand1) | Q(recommended=self.brand1)).exists()
+        )
+
+
+@override_settings(BRAND_RECOMMENDATIONS_ENGINE='vectorized')
+class BrandRecommendedBrandsVectorizedTestCase(BrandRecommendedBrandsTestCase):
+    def setUp(self):
+        vectorized_engine.reset()
+
+    def test_recommendations_are_stored_for_common_formats_only(self):
+        # the vectorized engine doesn't use stored recommendations
+        self.assertFalse(BrandRecommendation.objects.exists())
+
+    def test_recommendations_removed_on_brand_deletion(self):
+        self.auth_client1.get(self.url)  # load the engine
+
+        # the engine is notified after the commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand1.user = None
+            self.brand1.save()
+
+        response = self.auth_client1.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any(brand['id'] == self.brand1.id for brand in response.data['results']))
+
+    def test_recommended_brands_category_query_param_must_be_a_number(self):
+        response = self.auth_client1.get(self.url, {'category': 'abc'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_recommended_brands_changes_from_other_processes_are_loaded_after_reload_interval(self):
+        self.auth_client1.get(self.url)  # load the engine
+
+        # update bypasses signals, like changes made by another process without a shared cache
+        Brand.objects.filter(pk=self.brand1.pk).update(user=None)
+
+        response = self.auth_client1.get(self.url)
+        self.assertTrue(any(brand['id'] == self.brand1.id for brand in response.data['results']))
+
+        with override_settings(BRAND_RECOMMENDATIONS_VECTORIZED_RELOAD_INTERVAL=timedelta(0)):
+            response = self.auth_client1.get(self.url)
+
+        self.assertFalse(any(brand['id'] == self.brand1.id for brand in response.data['results']))
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_recommended_brands_changes_from_other_processes_are_loaded_immediately_with_shared_cache(self):
+        cache.clear()
+        self.auth_client1.get(self.url)  # load the engine
+
+        Brand.objects.filter(pk=self.brand1.pk).update(user=None)
+        # engine of another process changes the shared version
+        VectorizedRecommendationEngine().mark_brand_changed(self.brand1.pk)
+
+        response = self.auth_client1.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any(brand['id'] == self.brand1.id for brand in response.data['results']))
+
+    def test_recommended_brands_for_brand_created_after_load(self):
+        self.auth_client1.get(self.url)  # load the engine
+
+        # the engine is not notified, like about a brand created by another process
+        user = UserFactory()
+        brand = BrandShortFactory(user=user, formats=self.initial_formats, has_sub=True)
+
+        response = APIClientFactory(user=user).get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(any(brand['id'] == self.initial_brand.id for brand in response.data['results']))
+        self.assertFalse(any(result['id'] == brand.id for result in response.data['results']))
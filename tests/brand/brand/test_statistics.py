@@ -121,3 +121,28 @@ class StatisticsTestCase(
             self.assertEqual(stat_result['likes'], 1)
             self.assertEqual(stat_result['matches'], 1)
             self.assertEqual(stat_result['collabs'], 1)
+
+    def test_statistics_multiple_events_in_period(self):
+        period = 2
+        periods = get_periods(period)
+
+        brands = BrandShortFactory.create_batch(3)
+
+        # 3 matches in the second period and 1 like in the first period
+        MatchFactory.create_batch(
+            3,
+            initiator=self.brand,
+            target=factory.Iterator(brands),
+            like_at=periods[1][1] - timedelta(days=16),
+            match_at=periods[1][1] - timedelta(days=15)
+        )
+        MatchFactory(like=True, initiator=self.brand, like_at=periods[0][1] - timedelta(days=15))
+
+        response = self.auth_client.get(f'{self.url}?period={period}')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(
+            [(stat_result['likes'], stat_result['matches'], stat_result['collabs']) for stat_result in response.data],
+            [(1, 0, 0), (3, 3, 0)]
+        )
@@ -1,9 +1,11 @@
 import glob
 import json
 import os
+from unittest.mock import patch
 
 import factory
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.storage import default_storage
 from django.db.models import Q
 from django.test import override_settings, tag
@@ -30,7 +32,7 @@ from core.apps.brand.factories import (
 from core.apps.brand.models import Brand, Tag, ProductPhoto, Age, Gender, Category, Format, Goal
 from core.apps.cities.factories import CityFactory
 from tests.factories import APIClientFactory
-from tests.utils import refresh_api_settings
+from tests.utils import refresh_api_settings, LOCMEM_CACHES
 
 
 @override_settings(
@@ -416,6 +418,18 @@ class BrandUpdateTestCase(APITransactionTestCase):  # django-cleanup requires Tr
         self.assertEqual(updated_brand.target_audience.geos.count(), expected_geos)
         self.assertEqual(updated_brand.target_audience.geos.filter(self.geos_query).count(), expected_geos)
 
+    @override_settings(CACHES=LOCMEM_CACHES)
+    @patch('core.apps.brand.signals.refresh_brand_recommendations_task')
+    def test_brand_update_refreshes_recommendations_once(self, mock_refresh_brand_recommendations_task):
+        cache.clear()
+
+        response = self.auth_client.patch(self.url, self.update_data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # brand and its questionnaire are saved several times, recalculation is scheduled once after the commit
+        mock_refresh_brand_recommendations_task.delay.assert_called_once_with(self.brand.pk)
+
     def test_brand_update_cannot_remove_all_tags(self):
         response = self.auth_client.patch(self.url, {
             'tags': json.dumps([])
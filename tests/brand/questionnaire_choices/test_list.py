@@ -1,10 +1,14 @@
+from django.core.cache import cache
+from django.test import override_settings, Client
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from core.apps.accounts.factories import UserFactory
 from core.apps.brand.factories import CategoryFactory, TagFactory, FormatFactory, GoalFactory
 from core.apps.brand.models import Category, Tag, Format, Goal
 from tests.mixins import AssertNumQueriesLessThanMixin
+from tests.utils import LOCMEM_CACHES
 
 
 class QuestionnaireChoicesListTestCase(APITestCase, AssertNumQueriesLessThanMixin):
@@ -48,3 +52,56 @@ class QuestionnaireChoicesListTestCase(APITestCase, AssertNumQueriesLessThanMixi
         for key, count in self.returning_count.items():
             self.assertTrue(key in response.data)
             self.assertEqual(len(response.data[key]), count)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QuestionnaireChoicesCacheTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse('questionnaire_choices')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_questionnaire_choices_cached(self):
+        response = self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            cached_response = self.client.get(self.url)
+
+        self.assertEqual(cached_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_response.data, response.data)
+
+    def test_questionnaire_choices_cache_invalidated_on_change(self):
+        self.client.get(self.url)
+
+        category = CategoryFactory()
+
+        response = self.client.get(self.url)
+
+        self.assertIn(category.id, [category['id'] for category in response.data['categories']])
+
+        category.delete()
+
+        response = self.client.get(self.url)
+
+        self.assertNotIn(category.id, [category['id'] for category in response.data['categories']])
+
+    def test_questionnaire_choices_cache_invalidated_on_admin_action(self):
+        category = CategoryFactory()
+
+        response = self.client.get(self.url)
+
+        self.assertIn(category.id, [category['id'] for category in response.data['categories']])
+
+        # admin actions update objects without signals
+        admin_client = Client()
+        admin_client.force_login(UserFactory(admin=True))
+        admin_client.post(
+            reverse('admin:brand_category_changelist'),
+            {'action': 'set_as_other', '_selected_action': [category.id]}
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertNotIn(category.id, [category['id'] for category in response.data['categories']])
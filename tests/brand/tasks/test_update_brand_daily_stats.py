@@ -0,0 +1,131 @@
+from datetime import timedelta
+
+import factory
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.apps.accounts.factories import UserFactory
+from core.apps.brand.factories import BrandShortFactory, MatchFactory, CollaborationFactory
+from core.apps.brand.models import BrandDailyStats, Collaboration
+from core.apps.brand.tasks import update_brand_daily_stats
+from core.apps.brand.utils import get_periods, rollup_brand_daily_stats
+from tests.factories import APIClientFactory
+
+
+@override_settings(
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CELERY_TASK_EAGER_PROPOGATES=True,
+    BRAND_DAILY_STATS_RECALCULATED_DAYS=2
+)
+class UpdateBrandDailyStatsTaskTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.auth_client = APIClientFactory(user=cls.user)
+        cls.brand = BrandShortFactory(user=cls.user, has_sub=True)
+        cls.brand1, cls.brand2 = BrandShortFactory.create_batch(2)
+
+        cls.yesterday = timezone.now() - timedelta(days=1)
+        cls.today = timezone.localdate()
+
+        # yesterday: initial brand liked brand2, brand1 liked initial brand and they matched
+        MatchFactory(like=True, initiator=cls.brand, target=cls.brand2, like_at=cls.yesterday)
+        cls.match = MatchFactory(
+            initiator=cls.brand1, target=cls.brand, like_at=cls.yesterday, match_at=cls.yesterday
+        )
+
+        # both brands reported about the same collab yesterday => 1 collab for each brand
+        CollaborationFactory(reporter=cls.brand, collab_with=cls.brand1, match=cls.match)
+        CollaborationFactory(reporter=cls.brand1, collab_with=cls.brand, match=cls.match)
+        Collaboration.objects.update(created_at=cls.yesterday)
+
+        cls.task = update_brand_daily_stats
+        cls.url = reverse('brand-statistics')
+
+    def test_update_brand_daily_stats_task(self):
+        self.task.delay()
+
+        stats = {
+            stat.brand_id: (stat.date, stat.likes, stat.matches, stat.collabs)
+            for stat in BrandDailyStats.objects.all()
+        }
+        yesterday = timezone.localtime(self.yesterday).date()
+
+        self.assertEqual(stats, {
+            self.brand.id: (yesterday, 1, 1, 1),
+            self.brand1.id: (yesterday, 1, 1, 1),
+        })
+
+    def test_update_brand_daily_stats_task_recalculates_days(self):
+        self.task.delay()
+
+        # rolled up days are replaced, not added to
+        MatchFactory(like=True, initiator=self.brand, target=BrandShortFactory(), like_at=self.yesterday)
+        self.task.delay()
+
+        stat = BrandDailyStats.objects.get(brand=self.brand)
+
+        self.assertEqual(BrandDailyStats.objects.count(), 2)
+        self.assertEqual(stat.likes, 2)
+
+    def test_update_brand_daily_stats_task_does_not_roll_up_today(self):
+        MatchFactory(like=True, initiator=self.brand, target=BrandShortFactory())
+
+        self.task.delay()
+
+        self.assertFalse(BrandDailyStats.objects.filter(date=self.today).exists())
+
+    def test_statistics_read_from_rollups(self):
+        self.task.delay()
+
+        # change the rollup, statistics for rolled up days must be read from it
+        BrandDailyStats.objects.filter(brand=self.brand).update(likes=10)
+
+        # today's events are calculated live
+        MatchFactory(like=True, initiator=self.brand, target=BrandShortFactory())
+
+        response = self.auth_client.get(f'{self.url}?period=1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        totals = [
+            sum(stat[field] for stat in response.data)
+            for field in ('likes', 'matches', 'collabs')
+        ]
+
+        self.assertEqual(totals, [11, 1, 1])
+
+    def test_statistics_not_rolled_up_days_calculated_live(self):
+        # the task rolled up only the last days, older days weren't backfilled yet
+        MatchFactory(
+            like=True, initiator=self.brand, target=BrandShortFactory(), like_at=timezone.now() - timedelta(days=20)
+        )
+
+        self.task.delay()
+
+        response = self.auth_client.get(f'{self.url}?period=1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sum(stat['likes'] for stat in response.data), 2)
+
+    def test_statistics_partial_days_at_period_bounds_calculated_live(self):
+        period_start = get_periods(1)[0][0]
+
+        # events of the first day of the period before its start are rolled up, but must not be counted
+        MatchFactory.create_batch(
+            2,
+            like=True,
+            initiator=self.brand,
+            target=factory.Iterator(BrandShortFactory.create_batch(2)),
+            like_at=factory.Iterator([period_start - timedelta(minutes=1), period_start + timedelta(minutes=1)])
+        )
+
+        rollup_brand_daily_stats(timezone.localtime(period_start).date() - timedelta(days=1), self.today)
+
+        response = self.auth_client.get(f'{self.url}?period=1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sum(stat['likes'] for stat in response.data), 2)
@@ -0,0 +1,162 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.apps.accounts.factories import UserFactory
+from core.apps.brand.factories import BrandShortFactory
+from core.apps.chat.factories import RoomFactory, MessageFactory
+from core.apps.chat.models import Room, Message, MessageChange
+from core.apps.chat.utils import log_message_changes
+from tests.factories import APIClientFactory
+from tests.mixins import AssertNumQueriesLessThanMixin
+
+
+@override_settings(CHAT_SYNC_OVERLAP=timedelta(0))
+class ChatSyncTestCase(APITestCase, AssertNumQueriesLessThanMixin):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.interlocutor = UserFactory.create_batch(2)
+        cls.auth_client = APIClientFactory(user=cls.user)
+        cls.brand = BrandShortFactory(user=cls.user, has_sub=True)
+
+        cls.room = RoomFactory(type=Room.MATCH, participants=[cls.user, cls.interlocutor])
+        cls.messages = MessageFactory.create_batch(3, user=cls.interlocutor, room=cls.room)
+
+        cls.url = reverse('chat_sync')
+
+    def get_sync_token(self):
+        response = self.auth_client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response.data['sync_token']
+
+    def test_sync_unauthenticated_not_allowed(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_sync_wo_active_sub_not_allowed(self):
+        user_wo_active_sub = UserFactory()
+        BrandShortFactory(user=user_wo_active_sub)
+
+        response = APIClientFactory(user=user_wo_active_sub).get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_sync_wo_token(self):
+        response = self.auth_client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rooms'], [])
+        self.assertEqual(response.data['messages'], [])
+        self.assertEqual(response.data['deleted_messages_ids'], [])
+        self.assertFalse(response.data['has_more'])
+        self.assertTrue(response.data['sync_token'])
+
+    def test_sync(self):
+        sync_token = self.get_sync_token()
+
+        edited, deleted = self.messages[:2]
+
+        Message.objects.filter(pk=edited.pk).update(text='edited')
+        log_message_changes(self.room.pk, [edited.pk], MessageChange.EDITED)
+
+        deleted_id = deleted.pk
+        deleted.delete()
+        log_message_changes(self.room.pk, [deleted_id], MessageChange.DELETED)
+
+        created = MessageFactory(user=self.interlocutor, room=self.room)
+
+        response = self.auth_client.get(self.url, {'sync_token': sync_token})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([message['id'] for message in response.data['messages']], [edited.pk, created.pk])
+        self.assertEqual(response.data['messages'][0]['text'], 'edited')
+        self.assertEqual(response.data['deleted_messages_ids'], [deleted_id])
+        self.assertEqual([room['id'] for room in response.data['rooms']], [self.room.pk])
+        self.assertFalse(response.data['has_more'])
+
+    def test_sync_deleted_after_edit(self):
+        sync_token = self.get_sync_token()
+
+        message = self.messages[0]
+        log_message_changes(self.room.pk, [message.pk], MessageChange.EDITED)
+        log_message_changes(self.room.pk, [message.pk], MessageChange.DELETED)
+
+        response = self.auth_client.get(self.url, {'sync_token': sync_token})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['messages'], [])
+        self.assertEqual(response.data['deleted_messages_ids'], [message.pk])
+
+    @override_settings(CHAT_SYNC_OVERLAP=timedelta(minutes=1))
+    def test_sync_message_committed_late(self):
+        sync_token = self.get_sync_token()
+
+        # messages created right before the token are returned as well
+        response = self.auth_client.get(self.url, {'sync_token': sync_token})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([message['id'] for message in response.data['messages']], [m.pk for m in self.messages])
+
+        # created_at and id of the late message are assigned before the new one,
+        # but it isn't visible to the user until its transaction is committed
+        another_room = RoomFactory(type=Room.MATCH, participants=[self.interlocutor])
+        late = MessageFactory(user=self.interlocutor, room=another_room)
+        created = MessageFactory(user=self.interlocutor, room=self.room)
+
+        response = self.auth_client.get(self.url, {'sync_token': response.data['sync_token']})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(created.pk, [message['id'] for message in response.data['messages']])
+        self.assertNotIn(late.pk, [message['id'] for message in response.data['messages']])
+
+        Message.objects.filter(pk=late.pk).update(room=self.room)
+
+        response = self.auth_client.get(self.url, {'sync_token': response.data['sync_token']})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # already received messages are returned again, the client replaces them by id
+        self.assertEqual(
+            [message['id'] for message in response.data['messages']],
+            [m.pk for m in self.messages] + [late.pk, created.pk]
+        )
+
+    def test_sync_invalid_token(self):
+        another_user = UserFactory()
+        BrandShortFactory(user=another_user, has_sub=True)
+        another_user_token = APIClientFactory(user=another_user).get(self.url).data['sync_token']
+
+        for sync_token in ['invalid', another_user_token]:
+            response = self.auth_client.get(self.url, {'sync_token': sync_token})
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sync_expired_token(self):
+        sync_token = self.get_sync_token()
+
+        with override_settings(CHAT_SYNC_TOKEN_LIFE_TIME=timedelta(seconds=-1)):
+            response = self.auth_client.get(self.url, {'sync_token': sync_token})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sync_number_of_queries(self):
+        sync_token = self.get_sync_token()
+
+        rooms = RoomFactory.create_batch(5, type=Room.MATCH, participants=[self.user, self.interlocutor])
+
+        for room in rooms:
+            messages = MessageFactory.create_batch(3, user=self.interlocutor, room=room)
+            log_message_changes(room.pk, [messages[0].pk], MessageChange.EDITED)
+
+        # number of queries doesn't depend on the number of rooms and messages
+        with self.assertNumQueriesLessThan(15):
+            response = self.auth_client.get(self.url, {'sync_token': sync_token})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['rooms']), 5)
+        self.assertEqual(len(response.data['messages']), 15)
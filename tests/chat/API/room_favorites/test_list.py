@@ -5,7 +5,7 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 
 from core.apps.accounts.factories import UserFactory
-from core.apps.chat.factories import RoomFactory, RoomFavoritesFactory, MessageFactory
+from core.apps.chat.factories import RoomFactory, RoomFavoritesFactory, MessageFactory, RoomReadCursorFactory
 from core.apps.chat.models import Room
 from tests.factories import APIClientFactory
 
@@ -76,6 +76,22 @@ class RoomFavoritesListTestCase(APITestCase):
         # check that another user's favs don't appear in current user results
         self.assertFalse([i for i in results if i['id'] in set(another_favs)])
 
+    def test_room_favorites_list_unread_count(self):
+        another_user = UserFactory()
+        messages = MessageFactory.create_batch(3, user=another_user, room=self.match_room)
+        MessageFactory(user=self.user, room=self.match_room)  # own messages are not unread
+        MessageFactory(user=another_user, room=self.instant_room)
+
+        RoomReadCursorFactory(user=self.user, room=self.match_room, last_read_message_id=messages[0].pk)
+
+        response = self.auth_client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        unread_counts = {result['room']['id']: result['room']['unread_count'] for result in response.data['results']}
+
+        self.assertEqual(unread_counts, {self.match_room.pk: 2, self.instant_room.pk: 1, self.support_room.pk: 0})
+
     def test_room_favorites_list_includes_last_message_attachments(self):
         message = MessageFactory(user=self.user, room=self.match_room, has_attachments=True)
         attachments_ids = [a.pk for a in message.attachments.all()]
@@ -96,3 +112,25 @@ class RoomFavoritesListTestCase(APITestCase):
 
         response_attachments_ids = [a['id'] for a in last_message['attachments']]
         self.assertEqual(response_attachments_ids, attachments_ids)
+
+    def test_room_favorites_list_cursor_pagination(self):
+        # rooms without messages go last
+        MessageFactory(user=self.user, room=self.instant_room)
+
+        response = self.auth_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        all_ids = [result['id'] for result in response.data['results']]
+        self.assertEqual(all_ids[0], self.instant_room_fav.id)
+
+        pages_ids = []
+        next_ = f'{self.url}?page_size=1'
+
+        while next_ is not None:
+            response = self.auth_client.get(next_)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            pages_ids.extend(result['id'] for result in response.data['results'])
+            next_ = response.data['next']
+
+        self.assertEqual(pages_ids, all_ids)
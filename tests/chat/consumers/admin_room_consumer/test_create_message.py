@@ -88,15 +88,20 @@ class AdminRoomConsumerCreateMessageTestCase(TransactionTestCase, AdminRoomConsu
                     msg_text = 'test'
                     admin_response = await self.create_message(admin_communicator, msg_text)
                     user_response = await user_communicator.receive_json_from()  # check that user receives message
-                    another_admin_response = await another_admin_communicator.receive_json_from()
+
+                    # admins that didn't join the room are notified only about the change of their lists of rooms
+                    room_updated = await self.receive_room_updated(another_admin_communicator)
+
+                    self.assertEqual(room_updated['data']['room_id'], support_room.pk)
+                    self.assertEqual(room_updated['data']['last_message'], admin_response['data'])
 
                     # check that only one notification is sent
                     self.assertTrue(await admin_communicator.receive_nothing())
                     self.assertTrue(await user_communicator.receive_nothing())
                     self.assertTrue(await another_admin_communicator.receive_nothing())
 
-                    # check that user and both admins got the message
-                    for response in [admin_response, user_response, another_admin_response]:
+                    # check that user and admin in the room got the message
+                    for response in [admin_response, user_response]:
                         self.assertEqual(response['response_status'], status.HTTP_201_CREATED)
                         self.assertEqual(response['data']['text'], msg_text)
 
@@ -112,16 +117,17 @@ class AdminRoomConsumerCreateMessageTestCase(TransactionTestCase, AdminRoomConsu
                 async with join_room(admin_communicator, own_support_room.pk):
                     msg_text = 'test'
                     admin_response = await self.create_message(admin_communicator, msg_text)
-                    another_admin_response = await another_admin_communicator.receive_json_from()
+
+                    room_updated = await self.receive_room_updated(another_admin_communicator)
+
+                    self.assertEqual(room_updated['data']['last_message'], admin_response['data'])
 
                     # check that only one notification is sent
                     self.assertTrue(await admin_communicator.receive_nothing())
                     self.assertTrue(await another_admin_communicator.receive_nothing())
 
-                    # check that both admins got the message
-                    for response in [admin_response, another_admin_response]:
-                        self.assertEqual(response['response_status'], status.HTTP_201_CREATED)
-                        self.assertEqual(response['data']['text'], msg_text)
+                    self.assertEqual(admin_response['response_status'], status.HTTP_201_CREATED)
+                    self.assertEqual(admin_response['data']['text'], msg_text)
 
                     msg_id = admin_response['data']['id']
                     try:
@@ -134,7 +140,7 @@ class AdminRoomConsumerCreateMessageTestCase(TransactionTestCase, AdminRoomConsu
 
     async def test_create_message_with_attachments(self):
         room = await RoomAsyncFactory(type=Room.SUPPORT)
-        attachments = await MessageAttachmentAsyncFactory(2)
+        attachments = await MessageAttachmentAsyncFactory(2, user=self.admin_user)
         attachments_ids = [a.pk for a in attachments]
 
         communicator = get_admin_communicator(self.admin_user)
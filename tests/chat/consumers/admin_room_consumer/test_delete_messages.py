@@ -73,17 +73,20 @@ class AdminRoomConsumerDeleteMessagesTestCase(TransactionTestCase, AdminRoomCons
             another_admin_communicator = get_admin_communicator(another_admin)
 
             async with websocket_connect(another_admin_communicator):
-                async with join_room_communal([admin_communicator, user_communicator], support_room.pk):
+                async with join_room_communal(
+                        [admin_communicator, user_communicator, another_admin_communicator], support_room.pk
+                ):
                     admin_response = await self.delete_messages(admin_communicator, [support_room_msg.pk])
                     user_response = await user_communicator.receive_json_from()
                     another_admin_response = await another_admin_communicator.receive_json_from()
 
+                    # connections viewing the room aren't notified with "room_updated"
                     # check that only one notification is sent
                     self.assertTrue(await admin_communicator.receive_nothing())
                     self.assertTrue(await user_communicator.receive_nothing())
                     self.assertTrue(await another_admin_communicator.receive_nothing())
 
-                    # check that user and both admins were notified
+                    # check that user and both admins (they joined the room) were notified
                     for response in [admin_response, user_response, another_admin_response]:
                         self.assertEqual(response['response_status'], status.HTTP_200_OK)
                         self.assertEqual(response['data']['messages_ids'], [support_room_msg.pk])
@@ -94,16 +97,20 @@ class AdminRoomConsumerDeleteMessagesTestCase(TransactionTestCase, AdminRoomCons
                 async with join_room(admin_communicator, own_support_room.pk):
                     own_support_room_msgs_ids = [msg.pk for msg in own_support_room_msgs]
                     admin_response = await self.delete_messages(admin_communicator, own_support_room_msgs_ids)
-                    another_admin_response = await another_admin_communicator.receive_json_from()
+
+                    # admins that didn't join the room are notified only about the change of the list of rooms
+                    room_updated = await self.receive_room_updated(another_admin_communicator)
+
+                    self.assertEqual(room_updated['data']['room_id'], own_support_room.pk)
 
                     # check that only one notification is sent
                     self.assertTrue(await admin_communicator.receive_nothing())
+
+                    # check that admins that didn't join the room aren't notified about deletions
                     self.assertTrue(await another_admin_communicator.receive_nothing())
 
-                    # check that both admins were notified
-                    for response in [admin_response, another_admin_response]:
-                        self.assertEqual(response['response_status'], status.HTTP_200_OK)
-                        self.assertEqual(response['data']['messages_ids'], own_support_room_msgs_ids)
+                    self.assertEqual(admin_response['response_status'], status.HTTP_200_OK)
+                    self.assertEqual(admin_response['data']['messages_ids'], own_support_room_msgs_ids)
 
                     # check that messages were deleted from db
                     self.assertFalse(await Message.objects.filter(id__in=own_support_room_msgs_ids).aexists())
@@ -63,18 +63,21 @@ class AdminRoomConsumerEditMessageTestCase(TransactionTestCase, AdminRoomConsume
             another_admin_communicator = get_admin_communicator(another_admin)
 
             async with websocket_connect(another_admin_communicator):
-                async with join_room_communal([admin_communicator, user_communicator], support_room.pk):
+                async with join_room_communal(
+                        [admin_communicator, user_communicator, another_admin_communicator], support_room.pk
+                ):
                     edited_text = 'edited'
                     admin_response = await self.edit_message(admin_communicator, support_room_msg.pk, edited_text)
                     user_response = await user_communicator.receive_json_from()
                     another_admin_response = await another_admin_communicator.receive_json_from()
 
+                    # connections viewing the room aren't notified with "room_updated"
                     # check that only one notification is sent
                     self.assertTrue(await admin_communicator.receive_nothing())
                     self.assertTrue(await user_communicator.receive_nothing())
                     self.assertTrue(await another_admin_communicator.receive_nothing())
 
-                    # check that user and both admins were notified
+                    # check that user and both admins (they joined the room) were notified
                     for response in [admin_response, user_response, another_admin_response]:
                         self.assertEqual(response['response_status'], status.HTTP_200_OK)
                         self.assertEqual(response['data']['id'], support_room_msg.pk)
@@ -91,17 +94,21 @@ class AdminRoomConsumerEditMessageTestCase(TransactionTestCase, AdminRoomConsume
                 async with join_room(admin_communicator, own_support_room.pk):
                     edited_text = 'edited'
                     admin_response = await self.edit_message(admin_communicator, own_support_room_msg.pk, edited_text)
-                    another_admin_response = await another_admin_communicator.receive_json_from()
+
+                    # admins that didn't join the room are notified only about the change of the list of rooms
+                    room_updated = await self.receive_room_updated(another_admin_communicator)
+
+                    self.assertEqual(room_updated['data']['room_id'], own_support_room.pk)
 
                     # check that only one notification is sent
                     self.assertTrue(await admin_communicator.receive_nothing())
+
+                    # check that admins that didn't join the room aren't notified about edits
                     self.assertTrue(await another_admin_communicator.receive_nothing())
 
-                    # check that both admins were notified
-                    for response in [admin_response, another_admin_response]:
-                        self.assertEqual(response['response_status'], status.HTTP_200_OK)
-                        self.assertEqual(response['data']['id'], own_support_room_msg.pk)
-                        self.assertEqual(response['data']['text'], edited_text)
+                    self.assertEqual(admin_response['response_status'], status.HTTP_200_OK)
+                    self.assertEqual(admin_response['data']['id'], own_support_room_msg.pk)
+                    self.assertEqual(admin_response['data']['text'], edited_text)
 
                     try:
                         msg = await Message.objects.aget(id=own_support_room_msg.pk)
@@ -165,6 +165,27 @@ class AdminRoomConsumerGetRoomMessagesTestCase(TransactionTestCase, AdminRoomCon
             self.assertIsNone(response['data'])
             self.assertTrue(response['errors'])
 
+    async def test_get_room_messages_keyset_pagination(self):
+        user = await UserAsyncFactory()
+        room = await RoomAsyncFactory(type=Room.SUPPORT, participants=[user])
+        messages = await MessageAsyncFactory(110, user=factory.Iterator([user, self.admin_user]), room=room)
+        messages_ids = [msg.pk for msg in reversed(messages)]  # newest first
+
+        communicator = get_admin_communicator(self.admin_user)
+
+        async with join_room(communicator, room.pk, connect=True):
+            response = await self.get_room_messages_by_cursor(communicator)
+
+            self.assertEqual(response['response_status'], status.HTTP_200_OK)
+            self.assertEqual([msg['id'] for msg in response['data']['results']], messages_ids[:100])
+            self.assertTrue(response['data']['has_more'])
+
+            response = await self.get_room_messages_by_cursor(communicator, before_id=messages_ids[99])
+
+            self.assertEqual(response['response_status'], status.HTTP_200_OK)
+            self.assertEqual([msg['id'] for msg in response['data']['results']], messages_ids[100:])
+            self.assertFalse(response['data']['has_more'])
+
     async def test_get_room_messages_include_attachments(self):
         room = await RoomAsyncFactory(type=Room.SUPPORT)
         message = await MessageAsyncFactory(user=self.admin_user, room=room, has_attachments=True)
@@ -0,0 +1,49 @@
+from django.test import override_settings, TransactionTestCase, tag
+from rest_framework import status
+
+from core.apps.accounts.factories import UserAsyncFactory, UserFactory
+from core.apps.chat.factories import RoomAsyncFactory, MessageAsyncFactory
+from core.apps.chat.models import Room
+from tests.mixins import AdminRoomConsumerActionsMixin
+from tests.utils import get_admin_communicator, websocket_connect, join_room
+
+
+@override_settings(
+    CHANNEL_LAYERS={
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    }
+)
+@tag('slow', 'chats')
+class AdminRoomConsumerMarkReadTestCase(TransactionTestCase, AdminRoomConsumerActionsMixin):
+
+    def setUp(self):
+        self.admin_user = UserFactory(admin=True)
+
+    async def test_mark_read_not_in_room(self):
+        communicator = get_admin_communicator(self.admin_user)
+
+        async with websocket_connect(communicator):
+            response = await self.mark_read(communicator)
+
+        self.assertEqual(response['response_status'], status.HTTP_403_FORBIDDEN)
+        self.assertIsNone(response['data'])
+        self.assertTrue(response['errors'])
+
+    async def test_mark_read(self):
+        user = await UserAsyncFactory(has_sub=True)
+        room = await RoomAsyncFactory(type=Room.SUPPORT, participants=[user])
+        first, last = await MessageAsyncFactory(2, user=user, room=room)
+
+        communicator = get_admin_communicator(self.admin_user)
+
+        async with join_room(communicator, room.pk, connect=True):
+            response = await self.mark_read(communicator, first.pk)
+
+        self.assertEqual(response['response_status'], status.HTTP_200_OK)
+        self.assertEqual(response['data'], {
+            'room_id': room.pk,
+            'last_read_message_id': first.pk,
+            'unread_count': 1
+        })
@@ -2,8 +2,10 @@ from django.test import TransactionTestCase, override_settings, tag
 
 from core.apps.accounts.factories import UserFactory, UserAsyncFactory
 from core.apps.brand.factories import BrandShortAsyncFactory
+from core.apps.chat.factories import RoomAsyncFactory
 from core.apps.chat.consumers import RoomConsumer
 from core.apps.chat.utils import channels_reverse
+from tests.mixins import AssertNumQueriesLessThanMixin, RoomConsumerActionsMixin
 from tests.utils import get_websocket_communicator, get_user_communicator, websocket_connect
 
 
@@ -17,7 +19,7 @@ from tests.utils import get_websocket_communicator, get_user_communicator, webso
     }
 )
 @tag('slow', 'chats')
-class RoomConsumerConnectTestCase(TransactionTestCase):
+class RoomConsumerConnectTestCase(TransactionTestCase, AssertNumQueriesLessThanMixin, RoomConsumerActionsMixin):
     # IMPORTANT
     # won't work if inherit from TestCase
     # having troubles with db connection maintenance (closed before middleware can authenticate user)
@@ -86,3 +88,22 @@ class RoomConsumerConnectTestCase(TransactionTestCase):
 
         async with websocket_connect(communicator) as (_, subprotocol):
             self.assertEqual(subprotocol, self.accepted_protocol)
+
+    async def test_connect_number_of_queries(self):
+        rooms = await RoomAsyncFactory(3, participants=[self.user])
+
+        communicator = get_user_communicator(self.user)
+
+        # user, then brand with active subscription and ids of rooms of the user
+        async with self.assertNumQueriesLessThanAsync(3):
+            async with websocket_connect(communicator):
+                pass
+
+        communicator = get_user_communicator(self.user)
+
+        async with websocket_connect(communicator):
+            # ids of rooms were loaded on connect, only the room with participants is queried
+            async with self.assertNumQueriesLessThanAsync(3):
+                response = await self.join_room(communicator, rooms[0].pk)
+
+        self.assertEqual(response['data']['id'], rooms[0].pk)
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 import factory
 from django.test import override_settings, TransactionTestCase, tag
 from rest_framework import status
@@ -13,9 +15,10 @@ from core.apps.chat.factories import (
     MessageAsyncFactory,
     MessageAttachmentAsyncFactory
 )
-from core.apps.chat.models import Room, MessageAttachment
+from core.apps.chat.models import Room, Message, MessageAttachment
+from core.apps.chat.utils import send_to_groups, ADMINS_GROUP_NAME
 from core.apps.payments.factories import SubscriptionAsyncFactory
-from tests.mixins import RoomConsumerActionsMixin
+from tests.mixins import RoomConsumerActionsMixin, AssertNumQueriesLessThanMixin
 from tests.utils import (
     join_room_communal,
     join_room,
@@ -42,7 +45,11 @@ from tests.utils import (
     },
 )
 @tag('slow', 'chats')
-class RoomConsumerCreateMessageTestCase(TransactionTestCase, RoomConsumerActionsMixin):
+class RoomConsumerCreateMessageTestCase(
+    TransactionTestCase,
+    RoomConsumerActionsMixin,
+    AssertNumQueriesLessThanMixin
+):
 
     def setUp(self):
         self.user1, self.user2 = UserFactory.create_batch(2)
@@ -105,6 +112,25 @@ class RoomConsumerCreateMessageTestCase(TransactionTestCase, RoomConsumerActions
         self.assertIsNone(response['data'])
         self.assertTrue(response['errors'])
 
+    async def test_create_message_if_blacklisted_after_join_not_allowed(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room.pk, connect=True):
+            response = await self.create_message(communicator, 'test')
+
+            self.assertEqual(response['response_status'], status.HTTP_201_CREATED)
+
+            # cached permission data of the connection must be reset
+            await BlackListAsyncFactory(initiator=self.brand2, blocked=self.brand1)  # brand2 blocks brand1
+
+            response = await self.create_message(communicator, 'test')
+
+        self.assertEqual(response['response_status'], status.HTTP_403_FORBIDDEN)
+        self.assertIsNone(response['data'])
+        self.assertTrue(response['errors'])
+
     async def test_create_message(self):
         both_users = [self.user1, self.user2]
         match_room, instant_room, support_room = await RoomAsyncFactory(
@@ -134,6 +160,10 @@ class RoomConsumerCreateMessageTestCase(TransactionTestCase, RoomConsumerActions
                     response1 = await self.create_message(communicator1, msg_text)
                     response2 = await communicator2.receive_json_from()
 
+                    # participants viewing the room aren't notified with "room_updated"
+                    self.assertTrue(await communicator1.receive_nothing())
+                    self.assertTrue(await communicator2.receive_nothing())
+
                     # check that admins aren't notified about non-support room actions
                     self.assertTrue(await admin_communicator1.receive_nothing())
                     self.assertTrue(await admin_communicator2.receive_nothing())
@@ -148,6 +178,10 @@ class RoomConsumerCreateMessageTestCase(TransactionTestCase, RoomConsumerActions
                     response1 = await self.create_message(communicator1, msg_text)
                     response2 = await communicator2.receive_json_from()
 
+                    # participants viewing the room aren't notified with "room_updated"
+                    self.assertTrue(await communicator1.receive_nothing())
+                    self.assertTrue(await communicator2.receive_nothing())
+
                     # check that admins aren't notified about non-support room actions
                     self.assertTrue(await admin_communicator1.receive_nothing())
                     self.assertTrue(await admin_communicator2.receive_nothing())
@@ -160,19 +194,92 @@ class RoomConsumerCreateMessageTestCase(TransactionTestCase, RoomConsumerActions
                 async with join_room(communicator1, support_room.pk):
                     msg_text = 'test'
                     response1 = await self.create_message(communicator1, msg_text)
-                    admin1_response = await admin_communicator1.receive_json_from()
-                    admin2_response = await admin_communicator2.receive_json_from()
+
+                    # admins that didn't join the room are notified only about the change of support rooms list
+                    for communicator in [admin_communicator1, admin_communicator2]:
+                        room_updated = await self.receive_room_updated(communicator)
+
+                        self.assertEqual(room_updated['data']['room_id'], support_room.pk)
+                        self.assertEqual(room_updated['data']['last_message'], response1['data'])
 
                     # check that only one notification is sent
                     self.assertTrue(await communicator1.receive_nothing())
                     self.assertTrue(await admin_communicator1.receive_nothing())
                     self.assertTrue(await admin_communicator2.receive_nothing())
 
-                    # check that both admins were notified
-                    for response in [response1, admin1_response, admin2_response]:
-                        self.assertEqual(response['response_status'], status.HTTP_201_CREATED)
-                        self.assertEqual(response['data']['text'], msg_text)
-                        self.assertEqual(response['data']['room'], support_room.pk)
+                    self.assertEqual(response1['response_status'], status.HTTP_201_CREATED)
+                    self.assertEqual(response1['data']['text'], msg_text)
+                    self.assertEqual(response1['data']['room'], support_room.pk)
+
+    async def test_create_message_in_support_room_sent_to_admins_once(self):
+        support_room = await RoomAsyncFactory(type=Room.SUPPORT, participants=[self.user1])
+        await UserAsyncFactory(3, admin=True)
+
+        communicator = get_user_communicator(self.user1)
+
+        with patch('core.apps.chat.mixins.send_to_groups', wraps=send_to_groups) as mock_send_to_groups:
+            async with join_room(communicator, support_room.pk, connect=True):
+                response = await self.create_message(communicator, 'test')
+
+        self.assertEqual(response['response_status'], status.HTTP_201_CREATED)
+
+        # "room_updated" is sent to the user and to all admins with one send, regardless of the number of admins
+        groups = [
+            set(call.kwargs['groups']) for call in mock_send_to_groups.call_args_list
+            if call.kwargs['payload']['action'] == 'room_updated'
+        ]
+        self.assertEqual(groups, [{f'user_{self.user1.pk}', ADMINS_GROUP_NAME}])
+
+    async def test_create_message_each_connection_receives_one_event(self):
+        room, another_room = await RoomAsyncFactory(2, type=Room.MATCH, participants=[self.user1, self.user2])
+
+        communicator1 = get_user_communicator(self.user1)
+        communicator2 = get_user_communicator(self.user2)
+        # other connections of the same user
+        communicator3, communicator4 = get_user_communicator(self.user2), get_user_communicator(self.user2)
+
+        async with websocket_connect_communal([communicator1, communicator2, communicator3, communicator4]):
+            # user2 is viewing the room in one connection, another room in one more and no room in the last one
+            async with join_room(communicator2, another_room.pk):
+                async with join_room_communal([communicator1, communicator4], room.pk):
+                    response = await self.create_message(communicator1, 'test')
+                    message = await communicator4.receive_json_from()
+
+                    # connections that aren't viewing the room receive only "room_updated" with the new message,
+                    # connections viewing the room receive only the message
+                    room_updates = [
+                        await self.receive_room_updated(communicator) for communicator in [communicator2, communicator3]
+                    ]
+
+                    # check that only one frame is sent to each connection
+                    for communicator in [communicator1, communicator2, communicator3, communicator4]:
+                        self.assertTrue(await communicator.receive_nothing())
+
+        self.assertEqual(message['data'], response['data'])
+
+        self.assertEqual(response['response_status'], status.HTTP_201_CREATED)
+        self.assertEqual(response['data']['room'], room.pk)
+
+        for room_updated in room_updates:
+            self.assertEqual(room_updated['data']['room_id'], room.pk)
+            self.assertEqual(room_updated['data']['last_message'], response['data'])
+
+    async def test_create_message_updates_room_last_message(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        await MessageAsyncFactory(user=self.user2, room=room)
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room.pk, connect=True):
+            response = await self.create_message(communicator, 'test')
+
+        self.assertEqual(response['response_status'], status.HTTP_201_CREATED)
+
+        message = await Message.objects.aget(pk=response['data']['id'])
+
+        await room.arefresh_from_db()
+        self.assertEqual(room.last_message_id, message.pk)
+        self.assertEqual(room.last_message_at, message.created_at)
 
     async def test_create_message_instant_room_not_allowed_if_message_by_user_already_created(self):
         room = await RoomAsyncFactory(type=Room.INSTANT, participants=[self.user1, self.user2])
@@ -203,7 +310,7 @@ class RoomConsumerCreateMessageTestCase(TransactionTestCase, RoomConsumerActions
 
     async def test_create_message_with_attachments(self):
         room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
-        attachments = await MessageAttachmentAsyncFactory(2)
+        attachments = await MessageAttachmentAsyncFactory(2, user=self.user1)
         attachments_ids = [a.pk for a in attachments]
 
         communicator1 = get_user_communicator(self.user1)
@@ -226,3 +333,66 @@ class RoomConsumerCreateMessageTestCase(TransactionTestCase, RoomConsumerActions
             await MessageAttachment.objects.filter(id__in=attachments_ids, message_id=msg_id).acount(),
             2
         )
+
+    async def test_create_message_with_attachments_of_other_user_or_linked(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        own_attachment = await MessageAttachmentAsyncFactory(user=self.user1)
+        other_user_attachment = await MessageAttachmentAsyncFactory(user=self.user2)
+        linked_attachment = await MessageAttachmentAsyncFactory(
+            user=self.user1, message=await MessageAsyncFactory(room=room, user=self.user1)
+        )
+        attachments_ids = [own_attachment.pk, other_user_attachment.pk, linked_attachment.pk]
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room.pk, connect=True):
+            response = await self.create_message(communicator, 'any text', attachments_ids)
+
+        self.assertEqual(response['response_status'], status.HTTP_201_CREATED)
+
+        # only own unlinked attachment was connected to the message
+        self.assertEqual([a['id'] for a in response['data']['attachments']], [own_attachment.pk])
+
+        msg_id = response['data']['id']
+
+        await other_user_attachment.arefresh_from_db()
+        await linked_attachment.arefresh_from_db()
+
+        self.assertIsNone(other_user_attachment.message_id)
+        self.assertNotEqual(linked_attachment.message_id, msg_id)
+
+    async def test_create_message_with_attachment_wo_owner(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        # uploaded before owners of attachments were recorded
+        attachment = await MessageAttachmentAsyncFactory(user=None)
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room.pk, connect=True):
+            response = await self.create_message(communicator, 'any text', [attachment.pk])
+
+        self.assertEqual(response['response_status'], status.HTTP_201_CREATED)
+        self.assertEqual([a['id'] for a in response['data']['attachments']], [attachment.pk])
+
+    async def test_create_message_number_of_queries(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        attachments = await MessageAttachmentAsyncFactory(2, user=self.user1)
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room.pk, connect=True):
+            # permission data is fetched once per connection with the first message
+            await self.create_message(communicator, 'any text')
+
+            # at most message insert and one update that links attachments and sets the last message of the room,
+            # BEGIN and COMMIT of the transaction are not counted
+            async with self.assertNumQueriesLessThanAsync(3, ignore_transaction_queries=True):
+                response1 = await self.create_message(communicator, 'any text')
+
+            async with self.assertNumQueriesLessThanAsync(3, ignore_transaction_queries=True):
+                response2 = await self.create_message(communicator, 'any text', [a.pk for a in attachments])
+
+        for response in [response1, response2]:
+            self.assertEqual(response['response_status'], status.HTTP_201_CREATED)
+
+        self.assertEqual(len(response2['data']['attachments']), 2)
@@ -153,6 +153,10 @@ class RoomConsumerDeleteMessagesTestCase(TransactionTestCase, RoomConsumerAction
                     response1 = await self.delete_messages(communicator1, match_room_messages_ids)
                     response2 = await communicator2.receive_json_from()
 
+                    # participants viewing the room aren't notified with "room_updated"
+                    self.assertTrue(await communicator1.receive_nothing())
+                    self.assertTrue(await communicator2.receive_nothing())
+
                     # check that admins aren't notified about non-support room actions
                     self.assertTrue(await admin_communicator1.receive_nothing())
                     self.assertTrue(await admin_communicator2.receive_nothing())
@@ -169,6 +173,10 @@ class RoomConsumerDeleteMessagesTestCase(TransactionTestCase, RoomConsumerAction
                     response1 = await self.delete_messages(communicator1, instant_room_messages_ids)
                     response2 = await communicator2.receive_json_from()
 
+                    # participants viewing the room aren't notified with "room_updated"
+                    self.assertTrue(await communicator1.receive_nothing())
+                    self.assertTrue(await communicator2.receive_nothing())
+
                     # check that admins aren't notified about non-support room actions
                     self.assertTrue(await admin_communicator1.receive_nothing())
                     self.assertTrue(await admin_communicator2.receive_nothing())
@@ -178,21 +186,58 @@ class RoomConsumerDeleteMessagesTestCase(TransactionTestCase, RoomConsumerAction
                         self.assertEqual(response['data']['messages_ids'], instant_room_messages_ids)
                         self.assertEqual(response['data']['room_id'], instant_room.pk)
 
-                async with join_room(communicator1, support_room.pk):
+                # admin1 joined the support room, admin2 didn't
+                async with join_room_communal([communicator1, admin_communicator1], support_room.pk):
                     response = await self.delete_messages(communicator1, support_room_messages_ids)
                     admin1_response = await admin_communicator1.receive_json_from()
-                    admin2_response = await admin_communicator2.receive_json_from()
+
+                    # admins that didn't join the room are notified about the change of support rooms list
+                    room_updated = await self.receive_room_updated(admin_communicator2)
+                    self.assertEqual(room_updated['data']['room_id'], support_room.pk)
 
                     # check that only one notification is sent
                     self.assertTrue(await communicator1.receive_nothing())
                     self.assertTrue(await admin_communicator1.receive_nothing())
+
+                    # check that admins that didn't join the room aren't notified about deletions
                     self.assertTrue(await admin_communicator2.receive_nothing())
 
-                    for response in [response, admin1_response, admin2_response]:
+                    for response in [response, admin1_response]:
                         self.assertEqual(response['response_status'], status.HTTP_200_OK)
                         self.assertEqual(response['data']['messages_ids'], support_room_messages_ids)
                         self.assertEqual(response['data']['room_id'], support_room.pk)
 
+    async def test_delete_messages_updates_room_last_message(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        first, second, last = await MessageAsyncFactory(3, user=self.user1, room=room)
+
+        communicator1 = get_user_communicator(self.user1)
+        communicator2 = get_user_communicator(self.user2)
+
+        async with websocket_connect(communicator2), join_room(communicator1, room.pk, connect=True):
+            # deleting the last message moves the room's last message to the previous one
+            response = await self.delete_messages(communicator1, [last.pk])
+            self.assertEqual(response['response_status'], status.HTTP_200_OK)
+
+            # the interlocutor isn't viewing the room
+            room_updated = await self.receive_room_updated(communicator2)
+            self.assertEqual(room_updated['data']['last_message']['id'], second.pk)
+
+            await room.arefresh_from_db()
+            self.assertEqual(room.last_message_id, second.pk)
+            self.assertEqual(room.last_message_at, second.created_at)
+
+            # deleting all messages clears the room's last message
+            response = await self.delete_messages(communicator1, [first.pk, second.pk])
+            self.assertEqual(response['response_status'], status.HTTP_200_OK)
+
+            room_updated = await self.receive_room_updated(communicator2)
+            self.assertIsNone(room_updated['data']['last_message'])
+
+            await room.arefresh_from_db()
+            self.assertIsNone(room.last_message_id)
+            self.assertIsNone(room.last_message_at)
+
     async def test_delete_messages_of_another_user_not_allowed(self):
         room = await RoomAsyncFactory(participants=[self.user1, self.user2])
         messages = await MessageAsyncFactory(2, user=self.user2, room=room)
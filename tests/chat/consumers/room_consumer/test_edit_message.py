@@ -148,6 +148,10 @@ class RoomConsumerEditMessageTestCase(TransactionTestCase, RoomConsumerActionsMi
                     response1 = await self.edit_message(communicator1, match_room_msg.pk, edited_msg_text)
                     response2 = await communicator2.receive_json_from()
 
+                    # participants viewing the room aren't notified with "room_updated"
+                    self.assertTrue(await communicator1.receive_nothing())
+                    self.assertTrue(await communicator2.receive_nothing())
+
                     # check that admins aren't notified about non-support room actions
                     self.assertTrue(await admin_communicator1.receive_nothing())
                     self.assertTrue(await admin_communicator2.receive_nothing())
@@ -165,6 +169,10 @@ class RoomConsumerEditMessageTestCase(TransactionTestCase, RoomConsumerActionsMi
                     response1 = await self.edit_message(communicator1, instant_room_msg.pk, edited_msg_text)
                     response2 = await communicator2.receive_json_from()
 
+                    # participants viewing the room aren't notified with "room_updated"
+                    self.assertTrue(await communicator1.receive_nothing())
+                    self.assertTrue(await communicator2.receive_nothing())
+
                     # check that admins aren't notified about non-support room actions
                     self.assertTrue(await admin_communicator1.receive_nothing())
                     self.assertTrue(await admin_communicator2.receive_nothing())
@@ -174,22 +182,42 @@ class RoomConsumerEditMessageTestCase(TransactionTestCase, RoomConsumerActionsMi
                         self.assertEqual(response['data']['id'], instant_room_msg.pk)
                         self.assertEqual(response1['data']['text'], edited_msg_text)
 
-                async with join_room(communicator1, support_room.pk):
+                # admin1 joined the support room, admin2 didn't
+                async with join_room_communal([communicator1, admin_communicator1], support_room.pk):
                     edited_msg_text = 'edited'
                     response = await self.edit_message(communicator1, support_room_msg.pk, edited_msg_text)
                     admin1_response = await admin_communicator1.receive_json_from()
-                    admin2_response = await admin_communicator2.receive_json_from()
+
+                    # admins that didn't join the room are notified about the change of support rooms list
+                    room_updated = await self.receive_room_updated(admin_communicator2)
+                    self.assertEqual(room_updated['data']['room_id'], support_room.pk)
 
                     # check that only one notification is sent
                     self.assertTrue(await communicator1.receive_nothing())
                     self.assertTrue(await admin_communicator1.receive_nothing())
+
+                    # check that admins that didn't join the room aren't notified about edits
                     self.assertTrue(await admin_communicator2.receive_nothing())
 
-                    for response in [response, admin1_response, admin2_response]:
+                    for response in [response, admin1_response]:
                         self.assertEqual(response['response_status'], status.HTTP_200_OK)
                         self.assertEqual(response['data']['id'], support_room_msg.pk)
                         self.assertEqual(response1['data']['text'], edited_msg_text)
 
+    async def test_edit_not_last_message_does_not_update_room(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        message, _ = await MessageAsyncFactory(2, user=self.user1, room=room)
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room.pk, connect=True):
+            response = await self.edit_message(communicator, message.pk, 'edited')
+
+            # the list of rooms doesn't change
+            self.assertTrue(await communicator.receive_nothing())
+
+        self.assertEqual(response['response_status'], status.HTTP_200_OK)
+
     async def test_edit_message_of_another_user_not_allowed(self):
         room = await RoomAsyncFactory(participants=[self.user1, self.user2])
         message = await MessageAsyncFactory(user=self.user2, room=room)
@@ -130,6 +130,95 @@ class RoomConsumerGetRoomMessagesTestCase(TransactionTestCase, RoomConsumerActio
             self.assertTrue(response['errors'])
             self.assertIsNone(response['data'])
 
+    async def test_get_room_messages_keyset_pagination(self):
+        room = await RoomAsyncFactory(participants=[self.user1, self.user2])
+        messages = await MessageAsyncFactory(120, user=factory.Iterator([self.user1, self.user2]), room=room)
+        messages_ids = [msg.pk for msg in reversed(messages)]  # newest first
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room.pk, connect=True):
+            # latest messages
+            response = await self.get_room_messages_by_cursor(communicator)
+
+            self.assertEqual(response['response_status'], status.HTTP_200_OK)
+            self.assertNotIn('count', response['data'])
+            self.assertEqual([msg['id'] for msg in response['data']['results']], messages_ids[:100])
+            self.assertTrue(response['data']['has_more'])
+
+            # older messages
+            response = await self.get_room_messages_by_cursor(communicator, before_id=messages_ids[99])
+
+            self.assertEqual(response['response_status'], status.HTTP_200_OK)
+            self.assertEqual([msg['id'] for msg in response['data']['results']], messages_ids[100:])
+            self.assertFalse(response['data']['has_more'])
+
+            # newer messages
+            response = await self.get_room_messages_by_cursor(communicator, after_id=messages_ids[110])
+
+            self.assertEqual(response['response_status'], status.HTTP_200_OK)
+            self.assertEqual([msg['id'] for msg in response['data']['results']], messages_ids[10:110])
+            self.assertTrue(response['data']['has_more'])
+
+            response = await self.get_room_messages_by_cursor(communicator, after_id=messages_ids[50])
+
+            self.assertEqual([msg['id'] for msg in response['data']['results']], messages_ids[:50])
+            self.assertFalse(response['data']['has_more'])
+
+    async def test_get_room_messages_keyset_pagination_around_message(self):
+        room = await RoomAsyncFactory(participants=[self.user1, self.user2])
+        messages = await MessageAsyncFactory(120, user=factory.Iterator([self.user1, self.user2]), room=room)
+        messages_ids = [msg.pk for msg in reversed(messages)]  # newest first
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room.pk, connect=True):
+            response = await self.get_room_messages_by_cursor(communicator, around_id=messages_ids[60])
+
+            self.assertEqual(response['response_status'], status.HTTP_200_OK)
+            # 50 newer messages, the message itself and 49 older messages
+            self.assertEqual([msg['id'] for msg in response['data']['results']], messages_ids[10:110])
+            self.assertTrue(response['data']['has_more_before'])
+            self.assertTrue(response['data']['has_more_after'])
+
+            response = await self.get_room_messages_by_cursor(communicator, around_id=messages_ids[0])
+
+            self.assertEqual([msg['id'] for msg in response['data']['results']], messages_ids[:50])
+            self.assertTrue(response['data']['has_more_before'])
+            self.assertFalse(response['data']['has_more_after'])
+
+    async def test_get_room_messages_keyset_pagination_invalid_cursor(self):
+        room1, room2 = await RoomAsyncFactory(2, participants=[self.user1, self.user2])
+        room1_message = await MessageAsyncFactory(user=self.user1, room=room1)
+        room2_message = await MessageAsyncFactory(user=self.user1, room=room2)
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room1.pk, connect=True):
+            # message of another room
+            response = await self.get_room_messages_by_cursor(communicator, before_id=room2_message.pk)
+
+            self.assertEqual(response['response_status'], status.HTTP_404_NOT_FOUND)
+            self.assertTrue(response['errors'])
+            self.assertIsNone(response['data'])
+
+            # id is not a number
+            response = await self.get_room_messages_by_cursor(communicator, after_id='asf')
+
+            self.assertEqual(response['response_status'], status.HTTP_400_BAD_REQUEST)
+
+            # several cursors
+            response = await self.get_room_messages_by_cursor(
+                communicator, before_id=room1_message.pk, after_id=room1_message.pk
+            )
+
+            self.assertEqual(response['response_status'], status.HTTP_400_BAD_REQUEST)
+
+            # page and cursor
+            response = await self.get_room_messages_by_cursor(communicator, page=1, before_id=room1_message.pk)
+
+            self.assertEqual(response['response_status'], status.HTTP_400_BAD_REQUEST)
+
     async def test_get_room_messages_include_attachments(self):
         room = await RoomAsyncFactory(participants=[self.user1, self.user2])
         message = await MessageAsyncFactory(user=self.user1, room=room, has_attachments=True)
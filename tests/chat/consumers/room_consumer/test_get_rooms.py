@@ -4,7 +4,7 @@ from rest_framework import status
 
 from core.apps.accounts.factories import UserFactory, UserAsyncFactory
 from core.apps.brand.factories import BrandShortFactory
-from core.apps.chat.factories import RoomAsyncFactory, MessageAsyncFactory
+from core.apps.chat.factories import RoomAsyncFactory, MessageAsyncFactory, RoomReadCursorAsyncFactory
 from core.apps.chat.models import Room
 from core.apps.payments.factories import SubscriptionAsyncFactory
 from tests.mixins import RoomConsumerActionsMixin
@@ -109,6 +109,29 @@ class RoomConsumerGetRoomsTestCase(TransactionTestCase, RoomConsumerActionsMixin
         # check instant room with deleted interlocutor
         self.assertEqual(len(instant_room_1_deleted_resp['interlocutors']), 0)
 
+    async def test_get_rooms_unread_count(self):
+        room, read_room, empty_room = await RoomAsyncFactory(
+            3, type=Room.MATCH, participants=[self.user1, self.user2]
+        )
+
+        messages = await MessageAsyncFactory(3, user=self.user2, room=room)
+        await MessageAsyncFactory(user=self.user1, room=room)  # own messages are not unread
+        read_room_message = await MessageAsyncFactory(user=self.user2, room=read_room)
+
+        await RoomReadCursorAsyncFactory(user=self.user1, room=room, last_read_message_id=messages[0].pk)
+        await RoomReadCursorAsyncFactory(user=self.user1, room=read_room, last_read_message_id=read_room_message.pk)
+
+        communicator = get_user_communicator(self.user1)
+
+        async with websocket_connect(communicator):
+            response = await self.get_rooms(communicator, 1)
+
+        self.assertEqual(response['response_status'], status.HTTP_200_OK)
+
+        unread_counts = {result['id']: result['unread_count'] for result in response['data']['results']}
+
+        self.assertEqual(unread_counts, {room.pk: 2, read_room.pk: 0, empty_room.pk: 0})
+
     async def test_get_rooms_does_not_return_rooms_of_other_brands(self):
         another_user = await UserAsyncFactory()
 
@@ -0,0 +1,88 @@
+import factory
+from django.test import override_settings, TransactionTestCase, tag
+from rest_framework import status
+
+from core.apps.accounts.factories import UserFactory
+from core.apps.brand.factories import BrandShortFactory
+from core.apps.chat.factories import RoomAsyncFactory, MessageAsyncFactory
+from core.apps.chat.models import Room
+from tests.mixins import RoomConsumerActionsMixin
+from tests.utils import join_room, get_user_communicator, websocket_connect
+
+
+@override_settings(
+    CHANNEL_LAYERS={
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    },
+    STORAGES={
+        "default": {
+            "BACKEND": "django.core.files.storage.InMemoryStorage",
+        },
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+        },
+    },
+)
+@tag('slow', 'chats')
+class RoomConsumerStateSizeTestCase(TransactionTestCase, RoomConsumerActionsMixin):
+
+    def setUp(self):
+        self.user1, self.user2 = UserFactory.create_batch(2)
+        self.brand1, self.brand2 = BrandShortFactory.create_batch(
+            2, user=factory.Iterator([self.user1, self.user2]), has_sub=True
+        )
+
+    async def test_get_state_size_not_in_debug_not_allowed(self):
+        communicator = get_user_communicator(self.user1)
+
+        async with websocket_connect(communicator):
+            response = await self.get_state_size(communicator)
+
+        self.assertEqual(response['response_status'], status.HTTP_403_FORBIDDEN)
+        self.assertIsNone(response['data'])
+
+    @override_settings(DEBUG=True)
+    async def test_get_state_size_does_not_grow_with_history(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        await MessageAsyncFactory(250, user=self.user2, room=room, has_attachments=True)
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room.pk, connect=True):
+            await self.get_rooms(communicator, 1)
+            await self.get_room_messages(communicator, 1)
+
+            response1 = await self.get_state_size(communicator)
+
+            # scroll through the whole history
+            for page in (2, 3):
+                await self.get_room_messages(communicator, page)
+
+            response2 = await self.get_state_size(communicator)
+
+        self.assertEqual(response1['response_status'], status.HTTP_200_OK)
+        self.assertEqual(
+            set(response1['data']),
+            {'room', 'user_rooms', 'action_counts', 'brand', 'permission_context', 'room_permission_context', 'total'}
+        )
+        self.assertEqual(response1['data']['total'], sum(v for k, v in response1['data'].items() if k != 'total'))
+
+        # loaded rooms and messages are not kept by the connection
+        self.assertEqual(response1['data'], response2['data'])
+
+    @override_settings(CHAT_CONSUMER_MAX_CACHED_ROOMS=1)
+    async def test_join_room_if_user_rooms_not_cached(self):
+        room1, room2 = await RoomAsyncFactory(2, type=Room.MATCH, participants=[self.user1, self.user2])
+        another_room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user2])
+
+        communicator = get_user_communicator(self.user1)
+
+        async with websocket_connect(communicator):
+            # user has more rooms than can be kept by the connection
+            response = await self.join_room(communicator, another_room.pk)
+            self.assertEqual(response['response_status'], status.HTTP_403_FORBIDDEN)
+
+            response = await self.join_room(communicator, room2.pk)
+            self.assertEqual(response['response_status'], status.HTTP_200_OK)
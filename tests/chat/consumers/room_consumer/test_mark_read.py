@@ -0,0 +1,113 @@
+from django.test import override_settings, TransactionTestCase, tag
+from rest_framework import status
+
+from core.apps.accounts.factories import UserFactory
+from core.apps.chat.factories import RoomAsyncFactory, MessageAsyncFactory, RoomReadCursorAsyncFactory
+from core.apps.chat.models import Room, RoomReadCursor
+from tests.mixins import RoomConsumerActionsMixin
+from tests.utils import join_room, get_user_communicator, websocket_connect, websocket_connect_communal
+
+
+@override_settings(
+    CHANNEL_LAYERS={
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    }
+)
+@tag('slow', 'chats')
+class RoomConsumerMarkReadTestCase(TransactionTestCase, RoomConsumerActionsMixin):
+
+    def setUp(self):
+        self.user1, self.user2 = UserFactory.create_batch(2, has_sub=True)
+
+    async def test_mark_read_if_not_in_room_not_allowed(self):
+        communicator = get_user_communicator(self.user1)
+
+        async with websocket_connect(communicator):
+            response = await self.mark_read(communicator)
+
+        self.assertEqual(response['response_status'], status.HTTP_403_FORBIDDEN)
+        self.assertIsNone(response['data'])
+        self.assertTrue(response['errors'])
+
+    async def test_mark_read(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        messages = await MessageAsyncFactory(3, user=self.user2, room=room)
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room.pk, connect=True):
+            # the last message of the room is read if message is not passed
+            response = await self.mark_read(communicator)
+
+        self.assertEqual(response['response_status'], status.HTTP_200_OK)
+        self.assertEqual(response['data'], {
+            'room_id': room.pk,
+            'last_read_message_id': messages[-1].pk,
+            'unread_count': 0
+        })
+
+        cursor = await RoomReadCursor.objects.aget(user=self.user1, room=room)
+        self.assertEqual(cursor.last_read_message_id, messages[-1].pk)
+
+    async def test_mark_read_up_to_message(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        messages = await MessageAsyncFactory(3, user=self.user2, room=room)
+        await MessageAsyncFactory(user=self.user1, room=room)  # own messages are not unread
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room.pk, connect=True):
+            response = await self.mark_read(communicator, messages[0].pk)
+
+        self.assertEqual(response['response_status'], status.HTTP_200_OK)
+        self.assertEqual(response['data']['last_read_message_id'], messages[0].pk)
+        self.assertEqual(response['data']['unread_count'], 2)
+
+    async def test_mark_read_does_not_move_cursor_back(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        first, last = await MessageAsyncFactory(2, user=self.user2, room=room)
+        await RoomReadCursorAsyncFactory(user=self.user1, room=room, last_read_message_id=last.pk)
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room.pk, connect=True):
+            response = await self.mark_read(communicator, first.pk)
+
+        self.assertEqual(response['response_status'], status.HTTP_200_OK)
+        self.assertEqual(response['data']['last_read_message_id'], last.pk)
+        self.assertEqual(response['data']['unread_count'], 0)
+
+    async def test_mark_read_message_of_another_room(self):
+        room, another_room = await RoomAsyncFactory(2, type=Room.MATCH, participants=[self.user1, self.user2])
+        message = await MessageAsyncFactory(user=self.user2, room=another_room)
+
+        communicator = get_user_communicator(self.user1)
+
+        async with join_room(communicator, room.pk, connect=True):
+            response = await self.mark_read(communicator, message.pk)
+
+        self.assertEqual(response['response_status'], status.HTTP_404_NOT_FOUND)
+        self.assertFalse(await RoomReadCursor.objects.filter(user=self.user1).aexists())
+
+    async def test_mark_read_notifies_other_connections_of_user(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        await MessageAsyncFactory(user=self.user2, room=room)
+
+        communicator1 = get_user_communicator(self.user1)
+        communicator2 = get_user_communicator(self.user1)  # the second connection of the same user
+        interlocutor_communicator = get_user_communicator(self.user2)
+
+        async with websocket_connect_communal([communicator2, interlocutor_communicator]):
+            async with join_room(communicator1, room.pk, connect=True):
+                response1 = await self.mark_read(communicator1)
+                response2 = await communicator2.receive_json_from()
+
+                # read state is private
+                self.assertTrue(await interlocutor_communicator.receive_nothing())
+
+        for response in [response1, response2]:
+            self.assertEqual(response['response_status'], status.HTTP_200_OK)
+            self.assertEqual(response['data']['room_id'], room.pk)
+            self.assertEqual(response['data']['unread_count'], 0)
@@ -0,0 +1,151 @@
+from datetime import timedelta
+
+import factory
+from django.test import override_settings, TransactionTestCase, tag
+from rest_framework import status
+
+from core.apps.accounts.factories import UserFactory
+from core.apps.brand.factories import BrandShortFactory
+from core.apps.chat.factories import RoomAsyncFactory, MessageAsyncFactory
+from core.apps.chat.models import Room, MessageChange
+from tests.mixins import RoomConsumerActionsMixin
+from tests.utils import join_room, get_user_communicator, websocket_connect
+
+
+@override_settings(
+    CHANNEL_LAYERS={
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    },
+    CHAT_SYNC_OVERLAP=timedelta(0)
+)
+@tag('slow', 'chats')
+class RoomConsumerSyncTestCase(TransactionTestCase, RoomConsumerActionsMixin):
+
+    def setUp(self):
+        self.user1, self.user2 = UserFactory.create_batch(2)
+        self.brand1, self.brand2 = BrandShortFactory.create_batch(
+            2, user=factory.Iterator([self.user1, self.user2]), has_sub=True
+        )
+
+    async def test_sync_wo_token(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        await MessageAsyncFactory(user=self.user2, room=room)
+
+        communicator = get_user_communicator(self.user1)
+
+        async with websocket_connect(communicator):
+            response = await self.sync(communicator)
+
+        self.assertEqual(response['response_status'], status.HTTP_200_OK)
+        self.assertTrue(response['data']['sync_token'])
+
+        # nothing is returned without the token, client loads rooms and messages as usual
+        self.assertEqual(response['data']['rooms'], [])
+        self.assertEqual(response['data']['messages'], [])
+        self.assertEqual(response['data']['deleted_messages_ids'], [])
+        self.assertFalse(response['data']['has_more'])
+
+    async def test_sync(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        edited, deleted, last = await MessageAsyncFactory(3, user=self.user2, room=room)
+
+        communicator1 = get_user_communicator(self.user1)
+
+        async with websocket_connect(communicator1):
+            sync_token = (await self.sync(communicator1))['data']['sync_token']
+
+        # interlocutor changes the room while the user is offline
+        communicator2 = get_user_communicator(self.user2)
+
+        async with join_room(communicator2, room.pk, connect=True):
+            await self.edit_message(communicator2, edited.pk, 'edited')
+
+            await self.delete_messages(communicator2, [deleted.pk])
+
+            created = (await self.create_message(communicator2, 'new'))['data']
+
+        new_room = await RoomAsyncFactory(type=Room.INSTANT, participants=[self.user1, self.user2])
+
+        communicator1 = get_user_communicator(self.user1)
+
+        async with websocket_connect(communicator1):
+            response = await self.sync(communicator1, sync_token)
+            next_response = await self.sync(communicator1, response['data']['sync_token'])
+
+        self.assertEqual(response['response_status'], status.HTTP_200_OK)
+
+        data = response['data']
+
+        self.assertEqual([message['id'] for message in data['messages']], [edited.pk, created['id']])
+        self.assertEqual(data['messages'][0]['text'], 'edited')
+        self.assertEqual(data['deleted_messages_ids'], [deleted.pk])
+        self.assertFalse(data['has_more'])
+
+        # rooms with changes and rooms the user was added to, ordered as in get_rooms
+        self.assertEqual([room_data['id'] for room_data in data['rooms']], [room.pk, new_room.pk])
+        self.assertEqual(data['rooms'][0]['last_message']['id'], created['id'])
+        self.assertEqual(data['rooms'][0]['unread_count'], 3)
+        self.assertEqual(data['rooms'][0]['interlocutors'][0]['id'], self.user2.pk)
+
+        # the new token doesn't return the same changes
+        self.assertEqual(next_response['response_status'], status.HTTP_200_OK)
+        self.assertEqual(next_response['data']['rooms'], [])
+        self.assertEqual(next_response['data']['messages'], [])
+        self.assertEqual(next_response['data']['deleted_messages_ids'], [])
+
+    async def test_sync_excludes_other_rooms(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+        another_room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user2])
+
+        communicator = get_user_communicator(self.user1)
+
+        async with websocket_connect(communicator):
+            sync_token = (await self.sync(communicator))['data']['sync_token']
+
+            message = await MessageAsyncFactory(user=self.user2, room=room)
+            another_message = await MessageAsyncFactory(user=self.user2, room=another_room)
+            await MessageChange.objects.acreate(room=another_room, message_id=another_message.pk,
+                                                type=MessageChange.DELETED)
+
+            response = await self.sync(communicator, sync_token)
+
+        self.assertEqual([message_data['id'] for message_data in response['data']['messages']], [message.pk])
+        self.assertEqual([room_data['id'] for room_data in response['data']['rooms']], [room.pk])
+        self.assertEqual(response['data']['deleted_messages_ids'], [])
+
+    async def test_sync_has_more(self):
+        room = await RoomAsyncFactory(type=Room.MATCH, participants=[self.user1, self.user2])
+
+        communicator = get_user_communicator(self.user1)
+
+        async with websocket_connect(communicator):
+            sync_token = (await self.sync(communicator))['data']['sync_token']
+
+            messages = await MessageAsyncFactory(3, user=self.user2, room=room)
+
+            with override_settings(CHAT_SYNC_MAX_CHANGES=2):
+                response1 = await self.sync(communicator, sync_token)
+                response2 = await self.sync(communicator, response1['data']['sync_token'])
+
+        self.assertTrue(response1['data']['has_more'])
+        self.assertEqual([message['id'] for message in response1['data']['messages']], [m.pk for m in messages[:2]])
+
+        self.assertFalse(response2['data']['has_more'])
+        self.assertEqual([message['id'] for message in response2['data']['messages']], [messages[2].pk])
+
+    async def test_sync_invalid_token(self):
+        communicator1 = get_user_communicator(self.user1)
+        communicator2 = get_user_communicator(self.user2)
+
+        async with websocket_connect(communicator2):
+            another_user_token = (await self.sync(communicator2))['data']['sync_token']
+
+        async with websocket_connect(communicator1):
+            for sync_token in ['invalid', another_user_token]:
+                response = await self.sync(communicator1, sync_token)
+
+                self.assertEqual(response['response_status'], status.HTTP_400_BAD_REQUEST)
+                self.assertIsNone(response['data'])
+                self.assertTrue(response['errors'])
@@ -140,3 +140,18 @@ class AuthMiddlewareTestCase(TransactionTestCase):
 
         async with websocket_connect(communicator):
             self.assertEqual(communicator.scope['user'].pk, self.user.pk)
+
+    @override_settings(AUTH_USER_CACHE_LOCAL_MAX_SIZE=10)
+    async def test_connect_deleted_user_not_allowed_if_user_was_cached(self):
+        communicator = get_user_communicator(self.user)
+
+        # user is cached on connect
+        async with websocket_connect(communicator):
+            pass
+
+        communicator = get_user_communicator(self.user)
+        await self.user.adelete()
+
+        async with websocket_connect(communicator, check_connected=False) as (is_connected, _):
+            self.assertFalse(is_connected)
+            self.assertTrue(communicator.scope['user'].is_anonymous)
@@ -0,0 +1,97 @@
+import factory
+from asgiref.sync import sync_to_async
+from django.test import override_settings, TransactionTestCase, tag
+from django.urls import reverse
+from rest_framework import status
+
+from core.apps.accounts.factories import UserFactory, UserAsyncFactory
+from core.apps.brand.factories import BrandShortFactory, MatchFactory
+from core.apps.chat.models import Room
+from core.apps.payments.factories import SubscriptionFactory, TariffFactory
+from tests.factories import APIClientFactory
+from tests.mixins import RoomConsumerActionsMixin
+from tests.utils import get_user_communicator, get_admin_communicator, websocket_connect_communal
+
+
+@override_settings(
+    CHANNEL_LAYERS={
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    },
+)
+@tag('slow', 'chats')
+class RoomUpdatedOnRoomCreationTestCase(TransactionTestCase, RoomConsumerActionsMixin):
+    """
+    Check that participants are notified about rooms created outside of the chat.
+    """
+
+    def setUp(self):
+        self.user1, self.user2 = UserFactory.create_batch(2)
+        self.brand1, self.brand2 = BrandShortFactory.create_batch(2, user=factory.Iterator([self.user1, self.user2]))
+
+        SubscriptionFactory.create_batch(
+            2, brand=factory.Iterator([self.brand1, self.brand2]), tariff=TariffFactory(business=True)
+        )
+
+        self.auth_client1 = APIClientFactory(user=self.user1)
+
+    async def test_match_room_created(self):
+        await sync_to_async(MatchFactory)(like=True, initiator=self.brand2, target=self.brand1)
+
+        communicator1 = get_user_communicator(self.user1)
+        communicator2 = get_user_communicator(self.user2)
+
+        async with websocket_connect_communal([communicator1, communicator2]):
+            response = await sync_to_async(self.auth_client1.post)(reverse('brand-like'), {'target': self.brand2.pk})
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+            for communicator in [communicator1, communicator2]:
+                room_updated = await self.receive_room_updated(communicator)
+
+                self.assertEqual(room_updated['data']['room_id'], response.data['room'])
+                self.assertEqual(room_updated['data']['type'], Room.MATCH)
+                self.assertIsNone(room_updated['data']['last_message'])
+                self.assertIsNone(room_updated['data']['last_message_at'])
+
+                self.assertTrue(await communicator.receive_nothing())
+
+    async def test_instant_room_created(self):
+        await sync_to_async(MatchFactory)(like=True, initiator=self.brand1, target=self.brand2)
+
+        communicator1 = get_user_communicator(self.user1)
+        communicator2 = get_user_communicator(self.user2)
+
+        async with websocket_connect_communal([communicator1, communicator2]):
+            response = await sync_to_async(self.auth_client1.post)(
+                reverse('brand-instant-coop'), {'target': self.brand2.pk}
+            )
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+            for communicator in [communicator1, communicator2]:
+                room_updated = await self.receive_room_updated(communicator)
+
+                self.assertEqual(room_updated['data']['room_id'], response.data['room']['id'])
+                self.assertEqual(room_updated['data']['type'], Room.INSTANT)
+
+                self.assertTrue(await communicator.receive_nothing())
+
+    async def test_support_room_created(self):
+        admin = await UserAsyncFactory(admin=True)
+
+        user_communicator = get_user_communicator(self.user1)
+        admin_communicator = get_admin_communicator(admin)
+
+        async with websocket_connect_communal([user_communicator, admin_communicator]):
+            response = await self.get_support_room(user_communicator)
+
+            self.assertEqual(response['response_status'], status.HTTP_201_CREATED)
+
+            # user and admins are notified
+            for communicator in [user_communicator, admin_communicator]:
+                room_updated = await self.receive_room_updated(communicator)
+
+                self.assertEqual(room_updated['data']['room_id'], response['data']['id'])
+                self.assertEqual(room_updated['data']['type'], Room.SUPPORT)
@@ -0,0 +1,84 @@
+import asyncio
+
+from channels.layers import InMemoryChannelLayer
+from django.test import SimpleTestCase, override_settings, tag
+
+from core.apps.chat.utils import send_to_groups
+
+
+class SlowChannelLayer(InMemoryChannelLayer):
+    """
+    Channel layer that tracks the number of concurrent group sends and fails to send to the "broken" group.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_progress = 0
+        self.max_in_progress = 0
+
+    async def group_send(self, group, message):
+        self.in_progress += 1
+        self.max_in_progress = max(self.max_in_progress, self.in_progress)
+
+        try:
+            await asyncio.sleep(0.01)
+
+            if group == 'broken':
+                raise ConnectionError('Connection lost')
+
+            await super().group_send(group, message)
+        finally:
+            self.in_progress -= 1
+
+
+@override_settings(CHAT_GROUP_SEND_CONCURRENCY=3)
+@tag('chats')
+class SendToGroupsTestCase(SimpleTestCase):
+    def setUp(self):
+        self.channel_layer = SlowChannelLayer()
+        self.groups = [f'user_{i}' for i in range(10)]
+
+    async def add_channels_to_groups(self, groups) -> dict[str, str]:
+        channels = {}
+
+        for group in groups:
+            channel = await self.channel_layer.new_channel()
+            await self.channel_layer.group_add(group, channel)
+            channels[group] = channel
+
+        return channels
+
+    async def test_send_to_groups(self):
+        channels = await self.add_channels_to_groups(self.groups)
+
+        failed = await send_to_groups(self.groups, {'text': 'test'}, 'data_to_groups', self.channel_layer)
+
+        self.assertEqual(failed, {})
+
+        for channel in channels.values():
+            message = await self.channel_layer.receive(channel)
+
+            self.assertEqual(message, {'type': 'data_to_groups', 'payload': {'text': 'test'}})
+
+    async def test_send_to_groups_concurrency_is_bounded(self):
+        await send_to_groups(self.groups, {}, 'data_to_groups', self.channel_layer)
+
+        # sends were concurrent, but not more than the limit
+        self.assertEqual(self.channel_layer.max_in_progress, 3)
+
+    async def test_send_to_groups_reports_failed_groups(self):
+        channels = await self.add_channels_to_groups(self.groups)
+
+        with self.assertLogs('core.apps.chat.utils', 'WARNING'):
+            failed = await send_to_groups(
+                ['broken', *self.groups], {'text': 'test'}, 'data_to_groups', self.channel_layer
+            )
+
+        self.assertEqual(list(failed), ['broken'])
+        self.assertIsInstance(failed['broken'], ConnectionError)
+
+        # failure doesn't prevent sending to other groups
+        for channel in channels.values():
+            message = await self.channel_layer.receive(channel)
+
+            self.assertEqual(message['payload'], {'text': 'test'})
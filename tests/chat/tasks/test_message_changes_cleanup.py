@@ -0,0 +1,22 @@
+from django.test import TestCase, override_settings
+
+from core.apps.chat.factories import MessageChangeFactory
+from core.apps.chat.models import MessageChange
+from core.apps.chat.tasks import message_changes_cleanup
+
+
+@override_settings(
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CELERY_TASK_EAGER_PROPOGATES=True,
+)
+class MessageChangesCleanupTaskTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.change = MessageChangeFactory()
+        cls.expired_change = MessageChangeFactory(expired=True)
+
+    def test_message_changes_cleanup_task(self):
+        message_changes_cleanup.delay()
+
+        self.assertTrue(MessageChange.objects.filter(pk=self.change.pk).exists())
+        self.assertFalse(MessageChange.objects.filter(pk=self.expired_change.pk).exists())
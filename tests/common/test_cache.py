@@ -0,0 +1,139 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.apps.blacklist.factories import BlackListFactory
+from core.apps.brand.factories import BrandShortFactory, MatchFactory
+from core.apps.brand.utils import get_brand_exclusions
+from core.apps.payments.factories import SubscriptionFactory
+from core.common.cache import (
+    get_tagged_cache,
+    set_tagged_cache,
+    get_or_set_tagged_cache,
+    invalidate_cache_tags,
+    get_brand_cache_tag
+)
+from tests.utils import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TaggedCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_tagged_cache(self):
+        set_tagged_cache('key', 'value', ['tag1', 'tag2'])
+
+        self.assertEqual(get_tagged_cache('key', ['tag1', 'tag2']), 'value')
+
+    def test_tagged_cache_missing(self):
+        self.assertIsNone(get_tagged_cache('key', ['tag1']))
+
+    def test_tagged_cache_invalidated(self):
+        set_tagged_cache('key1', 'value1', ['tag1', 'tag2'])
+        set_tagged_cache('key2', 'value2', ['tag2'])
+        set_tagged_cache('key3', 'value3', ['tag3'])
+
+        invalidate_cache_tags('tag2')
+
+        self.assertIsNone(get_tagged_cache('key1', ['tag1', 'tag2']))
+        self.assertIsNone(get_tagged_cache('key2', ['tag2']))
+
+        # values of other tags are kept
+        self.assertEqual(get_tagged_cache('key3', ['tag3']), 'value3')
+
+        # tag is valid again for the new values
+        set_tagged_cache('key2', 'new_value2', ['tag2'])
+        self.assertEqual(get_tagged_cache('key2', ['tag2']), 'new_value2')
+
+    def test_get_or_set_tagged_cache(self):
+        calls = []
+
+        def get_value():
+            calls.append(1)
+            return 'value'
+
+        for _ in range(2):
+            self.assertEqual(get_or_set_tagged_cache('key', ['tag'], get_value), 'value')
+
+        self.assertEqual(len(calls), 1)
+
+        invalidate_cache_tags('tag')
+
+        self.assertEqual(get_or_set_tagged_cache('key', ['tag'], get_value), 'value')
+        self.assertEqual(len(calls), 2)
+
+    def test_get_or_set_tagged_cache_invalidated_while_computed(self):
+        def get_value():
+            # e.g. concurrent request changed the data after it was read
+            invalidate_cache_tags('tag')
+            return 'stale_value'
+
+        get_or_set_tagged_cache('key', ['tag'], get_value)
+
+        self.assertIsNone(get_tagged_cache('key', ['tag']))
+        self.assertEqual(get_or_set_tagged_cache('key', ['tag'], lambda: 'value'), 'value')
+
+    def test_tagged_cache_disabled(self):
+        # tests use dummy cache by default
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            set_tagged_cache('key', 'value', ['tag'])
+
+            self.assertIsNone(get_tagged_cache('key', ['tag']))
+            self.assertEqual(get_or_set_tagged_cache('key', ['tag'], lambda: 'value'), 'value')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BrandCacheTagTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand1, cls.brand2 = BrandShortFactory.create_batch(2)
+
+    def setUp(self):
+        cache.clear()
+
+    def cache_values(self):
+        for brand in (self.brand1, self.brand2):
+            set_tagged_cache(f'value_{brand.id}', 'value', [get_brand_cache_tag(brand.id)])
+
+    def assertValuesInvalidated(self):
+        for brand in (self.brand1, self.brand2):
+            self.assertIsNone(get_tagged_cache(f'value_{brand.id}', [get_brand_cache_tag(brand.id)]))
+
+    def test_brand_cache_tag_invalidated_on_match_change(self):
+        self.cache_values()
+
+        MatchFactory(like=True, initiator=self.brand1, target=self.brand2)
+
+        self.assertValuesInvalidated()
+
+    def test_brand_cache_tag_invalidated_on_blacklist_change(self):
+        self.cache_values()
+
+        blacklist = BlackListFactory(initiator=self.brand1, blocked=self.brand2)
+
+        self.assertValuesInvalidated()
+
+        self.cache_values()
+
+        blacklist.delete()
+
+        self.assertValuesInvalidated()
+
+    def test_brand_cache_tag_invalidated_on_brand_and_subscription_change(self):
+        set_tagged_cache('value', 'value', [get_brand_cache_tag(self.brand1.id)])
+        self.brand1.save()
+        self.assertIsNone(get_tagged_cache('value', [get_brand_cache_tag(self.brand1.id)]))
+
+        set_tagged_cache('value', 'value', [get_brand_cache_tag(self.brand1.id)])
+        SubscriptionFactory(brand=self.brand1)
+        self.assertIsNone(get_tagged_cache('value', [get_brand_cache_tag(self.brand1.id)]))
+
+    def test_brand_exclusions_invalidated(self):
+        self.assertEqual(get_brand_exclusions(self.brand1.id)['liked'], [])
+
+        with self.assertNumQueries(0):
+            get_brand_exclusions(self.brand1.id)
+
+        MatchFactory(like=True, initiator=self.brand1, target=self.brand2)
+
+        self.assertEqual(get_brand_exclusions(self.brand1.id)['liked'], [self.brand2.id])
@@ -1,8 +1,9 @@
 import json
 import unittest
-from contextlib import contextmanager
-from typing import Optional, List
+from contextlib import contextmanager, asynccontextmanager
+from typing import Optional, List, Iterator
 
+from channels.db import database_sync_to_async
 from channels.testing import WebsocketCommunicator
 from django.contrib.auth import get_user_model
 from django.db import connections
@@ -12,15 +13,94 @@ User = get_user_model()
 
 
 class AssertNumQueriesLessThanMixin(unittest.TestCase):
+    # statements that only control transactions, they are not counted if ignore_transaction_queries is set
+    transaction_statements = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
     @contextmanager
-    def assertNumQueriesLessThan(self, value, using='default', verbose=False):
+    def assertNumQueriesLessThan(self, value, using='default', verbose=False, ignore_transaction_queries=False):
         with CaptureQueriesContext(connections[using]) as context:
             yield  # your test will be run here
+        queries = context.captured_queries
+        if ignore_transaction_queries:
+            queries = [query for query in queries if not query['sql'].startswith(self.transaction_statements)]
         if verbose:
-            msg = "\r\n%s" % json.dumps(context.captured_queries, indent=4)
+            msg = "\r\n%s" % json.dumps(queries, indent=4)
         else:
             msg = None
-        self.assertLess(len(context.captured_queries), value, msg=msg)
+        self.assertLess(len(queries), value, msg=msg)
+
+    @asynccontextmanager
+    async def assertNumQueriesLessThanAsync(self, value, using='default', verbose=False,
+                                            ignore_transaction_queries=False):
+        # queries of consumers are executed in the main thread, so the context must be entered there as well
+        context = self.assertNumQueriesLessThan(
+            value, using=using, verbose=verbose, ignore_transaction_queries=ignore_transaction_queries
+        )
+        await database_sync_to_async(context.__enter__)()
+        try:
+            yield
+        except BaseException as e:
+            await database_sync_to_async(context.__exit__)(type(e), e, e.__traceback__)
+            raise
+        await database_sync_to_async(context.__exit__)(None, None, None)
+
+
+class AssertNoSeqScansMixin(unittest.TestCase):
+    # only these statements are explained, EXPLAIN doesn't execute them
+    explained_statements = ('SELECT', 'UPDATE', 'DELETE')
+
+    @contextmanager
+    def assertNoSeqScans(self, *models, using='default'):
+        """
+        Check that queries executed in the block don't scan tables of the given models sequentially.
+
+        Sequential scans are disabled in the planner while explaining queries,
+        so a sequential scan in the plan means that there is no index that can be used by the query.
+        Tables of other models (e.g. small dictionaries) are not checked.
+        """
+        connection = connections[using]
+        tables = {model._meta.db_table for model in models}
+
+        with CaptureQueriesContext(connection) as context:
+            yield  # your test will be run here
+
+        for query in context.captured_queries:
+            sql = query['sql']
+
+            if not sql.startswith(self.explained_statements):
+                continue
+
+            plan = self.get_query_plan(sql, using=using)
+            seq_scanned_tables = sorted(tables.intersection(self._get_seq_scanned_tables(plan)))
+
+            self.assertFalse(
+                seq_scanned_tables,
+                msg=f'Sequential scan on {", ".join(seq_scanned_tables)}:\r\n{sql}\r\n{json.dumps(plan, indent=4)}'
+            )
+
+    @staticmethod
+    def get_query_plan(sql: str, using='default') -> dict:
+        with connections[using].cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+
+            try:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+            finally:
+                cursor.execute('RESET enable_seqscan')
+
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        return plan[0]['Plan']
+
+    @classmethod
+    def _get_seq_scanned_tables(cls, plan: dict) -> Iterator[str]:
+        if plan['Node Type'] == 'Seq Scan':
+            yield plan['Relation Name']
+
+        for subplan in plan.get('Plans', []):
+            yield from cls._get_seq_scanned_tables(subplan)
 
 
 class BaseConsumerActionsMixin:
@@ -71,6 +151,22 @@ class BaseConsumerActionsMixin:
 
         return response
 
+    async def get_room_messages_by_cursor(self, communicator: WebsocketCommunicator, **cursor):
+        """
+        Get room messages using keyset pagination.
+        Pass one of before_id, after_id, around_id as a cursor or nothing to get the latest messages.
+        """
+        response = await self._send_json_to_consumer(
+            communicator=communicator,
+            json_={
+                'action': 'get_room_messages',
+                **cursor,
+                'request_id': 1500000
+            }
+        )
+
+        return response
+
     async def create_message(
             self,
             communicator: WebsocketCommunicator,
@@ -92,6 +188,16 @@ class BaseConsumerActionsMixin:
 
         return response
 
+    async def receive_room_updated(self, communicator: WebsocketCommunicator):
+        """
+        Receive "room_updated" event, that is sent to participants after the last message of the room changes.
+        """
+        response = await communicator.receive_json_from()
+
+        assert response['action'] == 'room_updated', f'Expected "room_updated" event, got "{response["action"]}"'
+
+        return response
+
     async def edit_message(self, communicator: WebsocketCommunicator, msg_id: int, edited_text: str):
         response = await self._send_json_to_consumer(
             communicator=communicator,
@@ -117,6 +223,19 @@ class BaseConsumerActionsMixin:
 
         return response
 
+    async def mark_read(self, communicator: WebsocketCommunicator, message_id: Optional[int] = None):
+        json_ = {
+            'action': 'mark_read',
+            'request_id': 1500000
+        }
+
+        if message_id is not None:
+            json_['message_id'] = message_id
+
+        response = await self._send_json_to_consumer(communicator=communicator, json_=json_)
+
+        return response
+
     async def get_support_room(self, communicator: WebsocketCommunicator):
         response = await self._send_json_to_consumer(
             communicator=communicator,
@@ -128,6 +247,17 @@ class BaseConsumerActionsMixin:
 
         return response
 
+    async def get_state_size(self, communicator: WebsocketCommunicator):
+        response = await self._send_json_to_consumer(
+            communicator=communicator,
+            json_={
+                'action': 'get_state_size',
+                'request_id': 1500000
+            }
+        )
+
+        return response
+
     async def _send_json_to_consumer(self, communicator: WebsocketCommunicator, json_: dict):
         await communicator.send_json_to(json_)
 
@@ -137,7 +267,18 @@ class BaseConsumerActionsMixin:
 
 
 class RoomConsumerActionsMixin(BaseConsumerActionsMixin):
-    pass
+    async def sync(self, communicator: WebsocketCommunicator, sync_token: Optional[str] = None):
+        json_ = {
+            'action': 'sync',
+            'request_id': 1500000
+        }
+
+        if sync_token is not None:
+            json_['sync_token'] = sync_token
+
+        response = await self._send_json_to_consumer(communicator=communicator, json_=json_)
+
+        return response
 
 
 class AdminRoomConsumerActionsMixin(BaseConsumerActionsMixin):
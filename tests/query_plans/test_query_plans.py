@@ -0,0 +1,173 @@
+from datetime import timedelta
+
+import factory
+from django.db.models import F, Q
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.apps.accounts.factories import UserFactory
+from core.apps.blacklist.factories import BlackListFactory
+from core.apps.blacklist.models import BlackList
+from core.apps.brand.factories import BrandShortFactory, MatchFactory, CollaborationFactory
+from core.apps.brand.models import Match, Collaboration, BrandRecommendation, BrandDailyStats
+from core.apps.brand.utils import rollup_brand_daily_stats
+from core.apps.chat.factories import MessageFactory, MessageAttachmentFactory, RoomFavoritesFactory
+from core.apps.chat.models import Room, Message, MessageAttachment, RoomFavorites, RoomReadCursor, MessageChange
+from core.apps.chat.tasks import message_attachments_cleanup
+from core.apps.chat.utils import set_rooms_unread_count, log_message_changes
+from core.apps.payments.models import Subscription
+from core.apps.payments.tasks import deactivate_expired_subscriptions
+from tests.factories import APIClientFactory
+from tests.mixins import AssertNoSeqScansMixin
+
+CHECKED_MODELS = (
+    Match,
+    Collaboration,
+    BrandRecommendation,
+    BrandDailyStats,
+    BlackList,
+    Subscription,
+    Message,
+    MessageAttachment,
+    RoomFavorites,
+    RoomReadCursor,
+    MessageChange,
+)
+
+
+@override_settings(
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CELERY_TASK_EAGER_PROPOGATES=True
+)
+class QueryPlansTestCase(
+    APITestCase,
+    AssertNoSeqScansMixin
+):
+    """
+    Check that queries of the main endpoints and tasks use indexes of the hot tables.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.auth_client = APIClientFactory(user=cls.user)
+        cls.brand = BrandShortFactory(user=cls.user, has_sub=True)
+
+        cls.brands = BrandShortFactory.create_batch(20, has_sub=True)
+
+        # brands[0:5] liked initial brand, initial brand liked brands[5:10]
+        MatchFactory.create_batch(5, like=True, initiator=factory.Iterator(cls.brands[0:5]), target=cls.brand)
+        MatchFactory.create_batch(5, like=True, initiator=cls.brand, target=factory.Iterator(cls.brands[5:10]))
+
+        # initial brand has matches with brands[10:15]
+        cls.matches = MatchFactory.create_batch(5, initiator=cls.brand, target=factory.Iterator(cls.brands[10:15]))
+
+        # initial brand blocked brands[15:17], brands[17] blocked initial brand
+        BlackListFactory.create_batch(2, initiator=cls.brand, blocked=factory.Iterator(cls.brands[15:17]))
+        BlackListFactory(initiator=cls.brands[17], blocked=cls.brand)
+
+        CollaborationFactory(reporter=cls.brand, collab_with=cls.brands[10], match=cls.matches[0])
+        CollaborationFactory(reporter=cls.brands[11], collab_with=cls.brand, match=cls.matches[1])
+
+        for match in cls.matches:
+            messages = MessageFactory.create_batch(
+                5, room=match.room, user=factory.Iterator([cls.user, match.target.user])
+            )
+            log_message_changes(match.room_id, [messages[0].pk], MessageChange.EDITED)
+
+        RoomFavoritesFactory.create_batch(3, user=cls.user, room=factory.Iterator([m.room for m in cls.matches]))
+
+        MessageAttachmentFactory.create_batch(3)
+
+        yesterday = timezone.localdate() - timedelta(days=1)
+        rollup_brand_daily_stats(yesterday, yesterday)
+
+    def test_liked_by(self):
+        with self.assertNoSeqScans(*CHECKED_MODELS):
+            response = self.auth_client.get(reverse('brand-liked_by'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_my_likes(self):
+        with self.assertNoSeqScans(*CHECKED_MODELS):
+            response = self.auth_client.get(reverse('brand-my_likes'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_my_matches(self):
+        with self.assertNoSeqScans(*CHECKED_MODELS):
+            response = self.auth_client.get(reverse('brand-my_matches'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_recommended_brands(self):
+        with self.assertNoSeqScans(*CHECKED_MODELS):
+            response = self.auth_client.get(reverse('brand-recommended_brands'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_statistics(self):
+        with self.assertNoSeqScans(*CHECKED_MODELS):
+            response = self.auth_client.get(f'{reverse("brand-statistics")}?period=3')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_retrieve_brand(self):
+        with self.assertNoSeqScans(*CHECKED_MODELS):
+            response = self.auth_client.get(reverse('brand-detail', kwargs={'pk': self.brands[18].pk}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_like(self):
+        with self.assertNoSeqScans(*CHECKED_MODELS):
+            response = self.auth_client.post(reverse('brand-like'), {'target': self.brands[0].pk})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_blacklist_list(self):
+        with self.assertNoSeqScans(*CHECKED_MODELS):
+            response = self.auth_client.get(reverse('blacklist-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_room_favorites_list(self):
+        with self.assertNoSeqScans(*CHECKED_MODELS):
+            response = self.auth_client.get(reverse('chat_favorites-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_chat_sync(self):
+        sync_token = self.auth_client.get(reverse('chat_sync')).data['sync_token']
+
+        MessageFactory(room=self.matches[0].room, user=self.matches[0].target.user)
+        edited = Message.objects.filter(room=self.matches[1].room).first()
+        log_message_changes(edited.room_id, [edited.pk], MessageChange.EDITED)
+
+        with self.assertNoSeqScans(*CHECKED_MODELS):
+            response = self.auth_client.get(reverse('chat_sync'), {'sync_token': sync_token})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_room_messages(self):
+        # the same queries as in get_room_messages and get_rooms actions of consumers
+        rooms = list(Room.objects.filter(pk__in=[match.room_id for match in self.matches]))
+
+        with self.assertNoSeqScans(*CHECKED_MODELS, Room):
+            list(rooms[0].messages.order_by('-created_at', 'id')[:100])
+            list(rooms[0].messages.filter(
+                Q(created_at__lt=timezone.now()) | Q(created_at=timezone.now(), pk__lt=0)
+            ).order_by('-created_at', '-id')[:101])
+            list(Room.objects.order_by(F('last_message_at').desc(nulls_last=True), '-id')[:100])
+            list(Message.objects.filter(pk__in=[room.last_message_id for room in rooms]))
+            set_rooms_unread_count(rooms, self.user)
+
+    def test_message_attachments_cleanup_task(self):
+        with self.assertNoSeqScans(*CHECKED_MODELS):
+            message_attachments_cleanup.delay()
+
+    def test_deactivate_expired_subscriptions_task(self):
+        with self.assertNoSeqScans(*CHECKED_MODELS):
+            deactivate_expired_subscriptions.delay()
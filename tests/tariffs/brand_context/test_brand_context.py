@@ -0,0 +1,162 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.apps.accounts.factories import UserFactory
+from core.apps.brand.factories import BrandShortFactory
+from core.apps.payments.factories import SubscriptionFactory, TariffFactory
+from core.apps.payments.models import Subscription
+from core.apps.payments.tasks import deactivate_expired_subscriptions
+from core.apps.payments.utils import BrandContext, get_brand_context_cache_key
+from tests.factories import APIClientFactory
+from tests.utils import LOCMEM_CACHES
+
+
+class BrandContextTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.brand = BrandShortFactory(user=cls.user)
+        cls.subscription = SubscriptionFactory(brand=cls.brand, tariff=TariffFactory(business=True))
+
+    def test_brand_context_loaded_with_one_query(self):
+        brand_context = BrandContext(self.user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(brand_context.brand, self.brand)
+            self.assertEqual(brand_context.brand_id, self.brand.id)
+            self.assertTrue(brand_context.has_active_subscription)
+            self.assertEqual(brand_context.active_subscription, self.subscription)
+            self.assertEqual(brand_context.active_subscription.tariff.name, 'Business Match')
+
+            # brand of the user is primed
+            self.assertEqual(self.user.brand, self.brand)
+
+    def test_brand_context_wo_brand(self):
+        user = UserFactory()
+        brand_context = BrandContext(user)
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(brand_context.brand)
+            self.assertIsNone(brand_context.active_subscription)
+            self.assertFalse(brand_context.has_active_subscription)
+            self.assertFalse(hasattr(user, 'brand'))
+
+    def test_brand_context_ignores_expired_and_inactive_subscriptions(self):
+        brand = BrandShortFactory()
+        SubscriptionFactory(brand=brand, expired=True)
+        SubscriptionFactory(brand=brand, is_active=False)
+
+        brand_context = BrandContext(brand.user)
+
+        self.assertEqual(brand_context.brand, brand)
+        self.assertIsNone(brand_context.active_subscription)
+        self.assertFalse(brand_context.has_active_subscription)
+
+    def test_permissions_share_brand_context(self):
+        auth_client = APIClientFactory(user=self.user)
+
+        # IsBrand, HasActiveSub, serializer and view read the brand and subscription loaded once
+        with self.assertNumQueries(2):  # brand with subscription, blacklist
+            response = auth_client.get(reverse('blacklist-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BrandContextCacheTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.brand = BrandShortFactory(user=cls.user, has_sub=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_brand_context_cached(self):
+        BrandContext(self.user).brand
+
+        brand_context = BrandContext(self.user)
+
+        # checks that need only id of the brand and end date of its subscription don't query the database
+        with self.assertNumQueries(0):
+            self.assertEqual(brand_context.brand_id, self.brand.id)
+            self.assertTrue(brand_context.has_active_subscription)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(brand_context.brand, self.brand)
+            self.assertIsNotNone(brand_context.active_subscription)
+
+    def test_brand_context_cached_wo_active_sub(self):
+        brand = BrandShortFactory()
+        BrandContext(brand.user).brand
+
+        brand_context = BrandContext(brand.user)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(brand_context.has_active_subscription)
+            self.assertIsNone(brand_context.active_subscription)
+
+    def test_brand_context_cached_sub_expired(self):
+        # subscription expired after the context was cached, but hasn't been deactivated yet
+        cache.set(get_brand_context_cache_key(self.user.pk), {
+            'brand_id': self.brand.id,
+            'active_sub_end_date': timezone.now() - timedelta(seconds=1)
+        })
+
+        brand_context = BrandContext(self.user)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(brand_context.has_active_subscription)
+            self.assertIsNone(brand_context.active_subscription)
+
+    def test_brand_context_invalidated_on_subscription_change(self):
+        self.assertTrue(BrandContext(self.user).has_active_subscription)
+
+        subscription = Subscription.objects.get(brand=self.brand)
+        subscription.is_active = False
+        subscription.save()
+
+        self.assertFalse(BrandContext(self.user).has_active_subscription)
+
+        SubscriptionFactory(brand=self.brand)
+
+        self.assertTrue(BrandContext(self.user).has_active_subscription)
+
+    def test_brand_context_invalidated_on_brand_creation(self):
+        user = UserFactory()
+
+        self.assertIsNone(BrandContext(user).brand_id)
+
+        brand = BrandShortFactory(user=user)
+
+        self.assertEqual(BrandContext(user).brand_id, brand.id)
+
+    def test_brand_context_invalidated_by_expiry_task(self):
+        self.assertTrue(BrandContext(self.user).has_active_subscription)
+
+        # update doesn't send signals, cached end date is left in the future
+        Subscription.objects.filter(brand=self.brand).update(end_date=timezone.now() - timedelta(minutes=1))
+
+        deactivate_expired_subscriptions()
+
+        self.assertFalse(BrandContext(self.user).has_active_subscription)
+
+    def test_subscription_available_after_subscribe(self):
+        user = UserFactory()
+        BrandShortFactory(user=user)
+        auth_client = APIClientFactory(user=user)
+
+        response = auth_client.get(reverse('blacklist-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = auth_client.post(reverse('tariffs-subscribe'), {'tariff': TariffFactory(lite=True).id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = auth_client.get(reverse('blacklist-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -18,6 +18,14 @@ from core.apps.chat.utils import channels_reverse
 
 User = get_user_model()
 
+# caching is disabled in tests (see CACHES setting),
+# use this one to test caching and clear it in the beginning of the test
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 
 def get_websocket_application(
         url_pattern: str,